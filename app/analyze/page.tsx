@@ -37,41 +37,20 @@ export default function AnalyzePage() {
       setProcessing(true);
       const audioForm = new FormData();
       audioForm.append('audio', file);
-      // CONFLICT SEVERITY
-      console.log(process.env.NEXT_PUBLIC_API_URL + "/agent/generate_json");
-      const resConSev = await fetch(process.env.NEXT_PUBLIC_API_URL + "/agent/generate_json", {
+      // SINGLE UPLOAD: TRIAGE, EMOTION AND DATABASE INSERT IN ONE REQUEST
+      const res = await fetch(process.env.NEXT_PUBLIC_API_URL + "/analyze/?store=true", {
         method: 'POST',
         body: audioForm
       })
-      const conSevJSON = await resConSev.json();
-      console.log(conSevJSON);
-      setContextSev(conSevJSON.severity_score);
-      setTranscript(conSevJSON.transcript);
-      setKeyDetails(conSevJSON.triage_data);
+      const analysisJSON = await res.json();
+      console.log(analysisJSON);
+      // CONFLICT SEVERITY
+      setContextSev(analysisJSON.severity_score);
+      setTranscript(analysisJSON.transcript);
+      setKeyDetails(analysisJSON.triage_data);
       // EMOTIONAL SEVERITY
-      const resEmoSev = await fetch(process.env.NEXT_PUBLIC_API_URL + "/predict_audio", {
-        method: 'POST',
-        body: audioForm
-      })
-      const emoSevJSON = await resEmoSev.json();
-      setEmotionSev(emoSevJSON.score);
-      setEmotions(emoSevJSON.predicted_label);
-      console.log(emoSevJSON);
-      // PUSH RECORD TO DATABASE
-      const record = {
-        emotional_sev: emoSevJSON.score,
-        context_sev: conSevJSON.severity_score,
-        transcript: conSevJSON.transcript,
-        key_details: conSevJSON.triage_data,
-        is_active: true,
-        emotions: emoSevJSON.predicted_label,
-      }
-      const resSB = await fetch(process.env.NEXT_PUBLIC_API_URL + "/supabase", {
-        method: 'POST',
-        headers: { "Content-Type": "application/json", },
-        body: JSON.stringify(record),
-      })
-      console.log(resSB);
+      setEmotionSev(analysisJSON.emotion.score);
+      setEmotions(analysisJSON.emotion.predicted_label);
       // console.log(contextSev, emotionSev, transcript, keyDetails, emotions);
       setProcessing(false);
     }
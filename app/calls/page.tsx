@@ -6,12 +6,16 @@ import React, { useState } from "react";
 export default function CallsPage() {
   const [active, setActive] = useState<Record[] | null>(null);
   const [inactive, setInactive] = useState<Record[] | null>(null);
+  const [activeCursor, setActiveCursor] = useState<string | null>(null);
+  // LATEST ACTIVE ROWS FOR THE EVENT HANDLER (IT IS BOUND ONCE, SO IT CANNOT READ active DIRECTLY)
+  const activeRef = React.useRef<Record[] | null>(null);
 
   interface Record {
     id: number;
     created_at: string;
     emotional_sev: number;
     context_sev: number;
+    combined_sev: number;
     transcript: string;
     key_details: KeyDetails;
     is_active: boolean;
@@ -24,14 +28,22 @@ export default function CallsPage() {
     ongoing_threat: string;
   }
 
-  async function getActive() {
-    const activeRes = await fetch(process.env.NEXT_PUBLIC_API_URL + "/supabase/active", { method: "GET" });
-    setActive(await activeRes.json());
+  // SEVERITY-ORDERED QUEUE, ONE PAGE AT A TIME (NEXT PAGE STARTS AFTER activeCursor)
+  const queueFields = "id,created_at,emotions,emotional_sev,context_sev,transcript,key_details";
+  async function getActive(cursor: string | null = null) {
+    const params = new URLSearchParams({ active: "true", limit: "50", fields: queueFields });
+    if (cursor) params.set("cursor", cursor);
+    const activeRes = await fetch(process.env.NEXT_PUBLIC_API_URL + "/supabase/queue?" + params, { method: "GET" });
+    const page = await activeRes.json();
+    setActive((prev) => (cursor && prev ? [...prev, ...page.items] : page.items));
+    setActiveCursor(page.next_cursor);
   }
+  // FIRST PAGE OF THE SAME QUEUE, CLOSED CALLS ONLY
   async function getInactive() {
-    const inactiveRes = await fetch(process.env.NEXT_PUBLIC_API_URL + "/supabase/inactive", { method: "GET" });
-    setInactive(await inactiveRes.json());
-
+    const params = new URLSearchParams({ active: "false", limit: "50", fields: queueFields });
+    const inactiveRes = await fetch(process.env.NEXT_PUBLIC_API_URL + "/supabase/queue?" + params, { method: "GET" });
+    const page = await inactiveRes.json();
+    setInactive(page.items);
   }
 
   React.useEffect(() => {
@@ -41,6 +53,46 @@ export default function CallsPage() {
     loadAll();
   }, []);
 
+  React.useEffect(() => {
+    activeRef.current = active;
+  }, [active]);
+
+  // LIVE UPDATES: APPLY ROW-LEVEL DELTAS PUSHED BY THE BACKEND INSTEAD OF RELOADING THE TABLE
+  React.useEffect(() => {
+    const source = new EventSource(process.env.NEXT_PUBLIC_API_URL + "/supabase/events");
+    source.onmessage = (e) => {
+      const event = JSON.parse(e.data);
+      if (event.type === "resync") {
+        getActive();
+        getInactive();
+        return;
+      }
+      const call = event.call;
+      if (!call.is_active) {
+        // MOVE THE ROW TO INACTIVE; IF IT WAS NEVER LOADED THERE IS NO TRANSCRIPT TO CARRY OVER, SO RELOAD THAT TABLE
+        const existing = activeRef.current?.find((c) => c.id === call.id);
+        if (existing) {
+          const moved = { ...existing, ...call, transcript: existing.transcript };
+          setInactive((prev) => (prev ? [moved, ...prev.filter((c) => c.id !== call.id)] : prev));
+        } else {
+          getInactive();
+        }
+      }
+      setActive((prev) => {
+        if (!prev) return prev;
+        const existing = prev.find((c) => c.id === call.id);
+        const rest = prev.filter((c) => c.id !== call.id);
+        if (!call.is_active) return rest;
+        // EVENTS CARRY NO TRANSCRIPT, KEEP THE ONE ALREADY LOADED
+        const merged = { ...existing, ...call, transcript: existing?.transcript ?? "" };
+        return [...rest, merged].sort(
+          (a, b) => b.emotional_sev + b.context_sev - (a.emotional_sev + a.context_sev)
+        );
+      });
+    };
+    return () => source.close();
+  }, []);
+
   React.useEffect(() => {
     console.log("Active:", active);
     console.log("Inactive:", inactive);
@@ -103,6 +155,9 @@ export default function CallsPage() {
                   }
                 </tbody>
               </table>
+              {activeCursor ? (
+                <button onClick={() => getActive(activeCursor)}>LOAD MORE</button>
+              ) : null}
             </section>) : (<h3>LOADING...</h3>)}
 
           {/* INACTIVE TABLE */}
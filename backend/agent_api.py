@@ -1,9 +1,19 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import Literal
+import asyncio
 import agent_ranker
+from agent_ranker import TriageJSON
+from audio_io import pcm_to_float32, file_digest, AudioDecodeError
+from live_transcription import LiveCallSession
+from inference_pool import SchedulerFull
+import telemetry
 import os
 import shutil
+import tempfile
+import time
+from pathlib import Path
 
 router = APIRouter(
     prefix = "/agent",
@@ -11,37 +21,52 @@ router = APIRouter(
 )
 
 # DATA VALIDATION SCHEMAS
-class TriageJSON(BaseModel):
-    event: str = ""
-    victims: int = 1
-    injuries: str = ""
-    weapon: str = ""
-    ongoing_threat: str = ""
-
 class DetailsJSON(BaseModel):
     transcript: str = ""
     triage_data: TriageJSON
     severity_score: float = 0.0
+    mode: str = "direct"
+    timings: dict[str, float] = {}
+    cached: bool = False
 
 @router.post("/generate_json/", response_model = DetailsJSON, summary = "Generate Triage JSON from an added Audio File")
-async def generate_json(audio: UploadFile = File(...)):
+async def generate_json(
+    audio: UploadFile = File(...),
+    mode: Literal["direct", "agent"] | None = Query(None, description = "Pipeline to run, defaults to TRIAGE_MODE")
+):
     # CHECK IF GIVEN VALID AUDIO & CREATE TEMPORARY DIRECTORY FOR LOADED AUDIO
     if not audio.content_type or not audio.content_type.startswith('audio/'):
         raise HTTPException(
             status_code = 400, 
             detail = f"Invalid file. Expected audio file, received {audio.content_type} file."
         )
+    try:
+        agent_ranker.check_mode(mode)
+    except agent_ranker.AgentUnavailable as e:
+        raise HTTPException(status_code = 400, detail = str(e))
 
-    temp_audio_path = f"temp_audio_path/{audio.filename}"
+    # EACH REQUEST GETS ITS OWN TEMPORARY FILE SO CONCURRENT CALLS NEVER SHARE AUDIO
+    ext = Path(audio.filename or "").suffix or ".wav"
+    with tempfile.NamedTemporaryFile(delete = False, suffix = ext) as buffer:
+        temp_audio_path = buffer.name
 
     # LOAD AUDIO INTO MEMORY FROM TEMPORARY DIRECTORY
     try:
-        with open(temp_audio_path, "wb") as buffer:
+        start = time.perf_counter()
+        with telemetry.span("upload.copy"), open(temp_audio_path, "wb") as buffer:
             shutil.copyfileobj(audio.file, buffer)
+            telemetry.observe_size("agent", buffer.tell())
+        upload_ms = agent_ranker.elapsed_ms(start)
         print("File successfully loaded:", audio.filename)
+        # RESUBMITTED RECORDINGS (CLIENT RETRIES) ARE SERVED FROM THE RESULT CACHE BY CONTENT HASH
         context_info = await run_in_threadpool(
-            agent_ranker.run_agent
+            lambda: agent_ranker.run_triage_cached(temp_audio_path, file_digest(temp_audio_path), mode)
         )
+        context_info['timings'] = {'upload_ms': upload_ms, **context_info['timings']}
+    except SchedulerFull:
+        raise
+    except AudioDecodeError as e:
+        raise HTTPException(status_code = 400, detail = str(e))
     except Exception as e:
         raise HTTPException(
             status_code = 500, detail = f"Error loading audio: {e}"
@@ -51,4 +76,55 @@ async def generate_json(audio: UploadFile = File(...)):
         if os.path.exists(temp_audio_path):
             os.remove(temp_audio_path)
     
-    return DetailsJSON(**context_info)
\ No newline at end of file
+    return DetailsJSON(**context_info)
+
+
+# LIVE CALLS: CLIENT STREAMS RAW 16 kHz MONO PCM AS BINARY FRAMES AND SENDS THE TEXT "end" WHEN THE CALL ENDS.
+# SERVER PUSHES {"type": "partial"} TRANSCRIPT UPDATES, {"type": "triage"} PROVISIONAL SEVERITIES AND ONE {"type": "final"}
+@router.websocket("/stream")
+async def stream_call(
+    websocket: WebSocket,
+    sample_format: Literal["s16le", "f32le"] = "s16le",
+    step_s: float = 2.0
+):
+    await websocket.accept()
+    session = LiveCallSession(step_s = step_s)
+    worker = None
+
+    async def process(final: bool = False):
+        try:
+            await websocket.send_json(await run_in_threadpool(session.step, final))
+            if session.needs_triage() or (final and session.transcript()):
+                await websocket.send_json(await run_in_threadpool(session.triage, final))
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            await websocket.send_json({"type": "error", "detail": f"Error processing audio: {e}"})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                try:
+                    samples = pcm_to_float32(message["bytes"], sample_format)
+                except ValueError as e:
+                    # A MALFORMED FRAME (e.g. ODD LENGTH FOR s16le) IS DROPPED; THE CALL AND ITS TRANSCRIPT SO FAR STAY OPEN
+                    await websocket.send_json({"type": "error", "detail": f"Invalid audio frame: {e}"})
+                    continue
+                # ONE STEP IN FLIGHT PER CALL; AUDIO KEEPS BUFFERING WHILE IT RUNS
+                if session.add_audio(samples) and (worker is None or worker.done()):
+                    worker = asyncio.create_task(process())
+            elif message.get("text") == "end":
+                if worker:
+                    await worker
+                    worker = None
+                await process(final = True)
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if worker and not worker.done():
+            worker.cancel()
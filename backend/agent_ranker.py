@@ -1,130 +1,215 @@
 import json
-import whisper
+import time
+import numpy as np
 from langchain_mistralai import ChatMistralAI
 from langchain.agents import create_agent
 from langchain.tools import tool
-from os import getenv, listdir
+from langchain_core.callbacks import BaseCallbackHandler
+from pydantic import BaseModel, Field
+from os import getenv
+from pathlib import Path
 from dotenv import load_dotenv
+from stub_llm import StubTriageLLM
+from inference_pool import whisper_pool, SchedulerFull
+from result_cache import triage_cache, cache_key
+import transcription
+import severity
+import telemetry
+from audio_io import decode_audio_bytes, WHISPER_SR, AudioDecodeError
+from audio_preprocessing import VAD_ENABLED, detect_speech, speech_only, to_original_time
 
 load_dotenv()
 print("MISTRAL API Key Exists:", getenv("MISTRAL_API_KEY"))
 
-# DEFINE WHISPER TRANSCRIBER INSTANCE FOR TOOL
-transcriber = whisper.load_model("base")
-
-@tool
-def get_transcription():
-    """Transcribe audio and return text"""
-    result = transcriber.transcribe(f"temp_audio_path/{listdir('temp_audio_path')[0]}")
-    return result['text']
-
-full_transcript = ""
-triage_json = {}
-
-@tool
-def extract_info(transcript: str, json_object: str):
-    """Set transcription info and JSON object to accessible variables"""
-    global full_transcript, triage_json
-    full_transcript = transcript
-    triage_json = json_object
-
-
-# DEFINE AGENT
-llm = ChatMistralAI(
-    api_key=getenv("MISTRAL_API_KEY"),
-    base_url="https://api.mistral.ai/v1",
-    model="mistral-small-latest"
-)
-agent = create_agent(
-    tools = [get_transcription, extract_info],
-    model = llm,
-    system_prompt = "You are an AI assistant that will use tools supporting a triage system. Always use the tool get_transcription(audio_path: str) when audio needs to be transcribed. Always use extract_info(transcript: str, json_object: str) to set the transcription and JSON object variables. Follow all rules carefully.",
-)
-
-# PARSE JSON & CALCULATE SEVERITY RANK FROM BELOW RANKINGS
-event_ranks = {
-    "shooting": 5,
-    "stabbing": 4,
-    "assault": 3,
-    "domestic violence": 3,
-    "sexual assault": 4,
-    "robbery": 3,
-    "medical emergency": 5,
-    "fire": 5,
-    "traffic accident": 3,
-    "natural disaster": 5,
-    "hazard": 4,
-    "animal incident": 2,
-    "missing person": 1,
-    "public disturbance": 2
-}
-
-weapon_ranks = {
-    "firearm": 5,
-    "explosive": 5,
-    "hazardous_material": 5,
-    "blade": 4,
-    "blunt object": 3,
-    "chemical": 4,
-    "unknown": 2,
-    "none": 0
-}
-
-injury_ranks = {
-    "unresponsive": 5,
-    "critical bleeding": 5,
-    "severe burns": 5,
-    "broken bones": 4,
-    "minor bleeding": 3,
-    "minor injury": 2,
-    "none": 0,
-    "unknown": 0
-}
-
-# PRIORITY FEATURE BASED WEIGHTS 
-weights = {
-    'event': 0.3,
-    'victims': 0.15,
-    'weapon': 0.1,
-    'injuries': 0.35,
-    'ongoing': 0.1
-}
-
-def victims_rank(num_victims):
-    if num_victims == 0: return 0
-    if num_victims == 1: return 1
-    if num_victims <= 3: return 2
-    if num_victims <= 5: return 3
-    if num_victims <= 10: return 4
-    return 5
-
-def calculate_severity():
-    global triage_json
-    values = json.loads(triage_json)
-    victims_sev = victims_rank(int(values['victims']))
-    event_sev = event_ranks[values['event']]
-    weapon_sev = weapon_ranks[values['weapon']]
-    injury_sev = injury_ranks[values['injuries']]
-    ongoing_sev = 5 if values['ongoing_threat'] != "not ongoing" else 0
-    return round(
-        ((event_sev * weights['event']) +
-        (victims_sev * weights['victims']) +
-        (weapon_sev * weights['weapon']) +
-        (injury_sev * weights['injuries']) +
-        (ongoing_sev * weights['ongoing'])), 2)
+# WHISPER IS LOADED LAZILY BY transcription.py (WHISPER_BACKEND / WHISPER_MODEL), NOT AT IMPORT
+# AUDIO IS A FILE PATH OR A 16 kHz MONO FLOAT32 WAVEFORM (SEE audio_io.decode_audio_bytes)
+def transcribe_result(audio: str | np.ndarray, vad: bool | None = None, **options) -> dict:
+    # FULL WHISPER RESULT (text + timestamped segments), options GO STRAIGHT TO transcribe()
+    if not (VAD_ENABLED if vad is None else vad):
+        return whisper_pool.run(transcription.transcribe_local, audio, **options)
+
+    # ONLY DETECTED SPEECH IS SENT TO WHISPER; SEGMENT TIMESTAMPS ARE MAPPED BACK TO THE ORIGINAL AUDIO
+    waveform = audio if isinstance(audio, np.ndarray) else decode_audio_bytes(Path(audio).read_bytes())
+    speech, timeline = speech_only(waveform, WHISPER_SR, detect_speech(waveform, WHISPER_SR), gap_s = 0.2)
+    if len(speech) == 0:
+        return {"text": "", "segments": [], "language": None, "speech_s": 0.0}
+    result = whisper_pool.run(transcription.transcribe_local, speech, **options)
+    for seg in result['segments']:
+        seg['start'] = float(to_original_time(seg['start'], timeline))
+        seg['end'] = float(to_original_time(seg['end'], timeline))
+    result['speech_s'] = len(speech) / WHISPER_SR
+    return result
+
+def transcribe(audio: str | np.ndarray) -> str:
+    return transcribe_result(audio)['text']
+
+# STRUCTURED OUTPUT SCHEMA (SHARED WITH agent_api RESPONSES)
+class TriageJSON(BaseModel):
+    event: str = Field(default = "", description = "Type of event")
+    victims: int = Field(default = 1, description = "Number of victims")
+    injuries: str = Field(default = "", description = "Closest type of injury")
+    weapon: str = Field(default = "", description = "Type of weapon involved")
+    ongoing_threat: str = Field(default = "", description = "Description of an ongoing threat, else 'not ongoing'")
+
+# REQUEST-SCOPED STATE FOR ONE CALL (REPLACES THE OLD MODULE GLOBALS)
+class TriageRun:
+    def __init__(self, audio: str | np.ndarray, transcript: str = ""):
+        self.audio = audio
+        self.transcript = transcript
+        self.triage_json = "{}"
+        self.timings = {}
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def build_tools(run: TriageRun):
+    @tool
+    def get_transcription():
+        """Transcribe audio and return text"""
+        # REUSE A TRANSCRIPT FROM A FAILED DIRECT PASS INSTEAD OF RUNNING WHISPER TWICE
+        if run.transcript:
+            return run.transcript
+        start = time.perf_counter()
+        text = transcribe(run.audio)
+        run.timings['transcribe_ms'] = elapsed_ms(start)
+        return text
+
+    @tool
+    def extract_info(transcript: str, json_object: str):
+        """Set transcription info and JSON object to accessible variables"""
+        run.transcript = transcript
+        run.triage_json = json_object
+
+    return [get_transcription, extract_info]
+
+
+LLM_MODEL = "mistral-small-latest"
+
+# DEFINE LLM (TRIAGE_LLM=stub SWAPS IN A LOCAL MODEL FOR OFFLINE BENCHMARKS)
+# THE STUB ONLY SUPPORTS with_structured_output, SO THE AGENT PIPELINE (bind_tools) IS UNAVAILABLE WITH IT
+STUB_LLM = getenv("TRIAGE_LLM", "mistral") == "stub"
+
+def get_llm():
+    if STUB_LLM:
+        return StubTriageLLM(latency = float(getenv("TRIAGE_STUB_LATENCY", "0")))
+    return ChatMistralAI(
+        api_key=getenv("MISTRAL_API_KEY"),
+        base_url="https://api.mistral.ai/v1",
+        model=LLM_MODEL
+    )
+
+llm = get_llm()
+system_prompt = "You are an AI assistant that will use tools supporting a triage system. Always use the tool get_transcription(audio_path: str) when audio needs to be transcribed. Always use extract_info(transcript: str, json_object: str) to set the transcription and JSON object variables. Follow all rules carefully."
+
+def build_agent(run: TriageRun):
+    return create_agent(
+        tools = build_tools(run),
+        model = llm,
+        system_prompt = system_prompt,
+    )
+
+# PARSE JSON & CALCULATE SEVERITY RANK FROM THE ACTIVE RULE TABLE (severity_rules/, SEE severity.py)
+def calculate_severity(triage_json: str | dict):
+    values = json.loads(triage_json) if isinstance(triage_json, str) else triage_json
+    with telemetry.span("triage.severity"):
+        return severity.rules.score(values)
 
 # RETURN ALL CONTEXT INFO FOR DB
-def get_context_info(full_transcript, triage_json):
-    triage_dict = json.loads(triage_json)
+def get_context_info(run: TriageRun):
+    with telemetry.span("triage.parse"):
+        triage_dict = json.loads(run.triage_json)
     return {
-        "transcript": full_transcript,
+        "transcript": run.transcript,
         "triage_data": triage_dict,
-        "severity_score": calculate_severity()
+        "severity_score": calculate_severity(triage_dict),
+        "mode": "agent",
+        "timings": run.timings
     }
 
+# DIRECT PIPELINE: LOCAL WHISPER THEN ONE STRUCTURED-OUTPUT LLM CALL (NO AGENT LOOP)
+triage_fields = """event: The type of event (shooting, stabbing, assault, domestic violence, sexual assault, robbery, medical emergency, fire, traffic accident, natural disaster, hazard, animal incident, missing person, public disturbance) --> If there isn't a clear category choose the closest match without inventing details.
+victims: Number of victims (integer) --> If not explicitly stated, return 1
+injuries: Closest type of injury if any hint of injury is mentioned (unresponsive, critical bleeding, severe burns, broken bones, minor bleeding, minor injury), else "none"
+weapon: Type of weapon involved (firearm, explosive, hazardous_material, blade, blunt object, chemical, unknown), else "none"
+ongoing_threat: Small description if event described is currently in progress or people are at risk, else "not ongoing" --> Always give the description if the transcription is describing a threat that is currently happening, even if they mention help is on the way."""
+
+extraction_prompt = f"""You extract triage information from a 911 call transcript. Fill in the following fields:
+
+{triage_fields}
+
+Rules:
+1. If information for a field exists but it is not clear specific type (ex. there exists a weapon but don't know specific one) set to unknown.  If nothing at all then use none as appropriate.
+2. Limit text fields only to specified options for that respective field."""
+
+extractor = llm.with_structured_output(TriageJSON)
+
+def extract_triage(transcript: str) -> dict:
+    with telemetry.span("llm.extract"):
+        triage = extractor.invoke([
+            ("system", extraction_prompt),
+            ("human", transcript)
+        ])
+    return triage.model_dump()
+
+def run_direct(run: TriageRun):
+    start = time.perf_counter()
+    run.transcript = transcribe(run.audio)
+    run.timings['transcribe_ms'] = elapsed_ms(start)
+
+    start = time.perf_counter()
+    triage_dict = extract_triage(run.transcript)
+    run.timings['llm_ms'] = elapsed_ms(start)
+
+    start = time.perf_counter()
+    severity = calculate_severity(triage_dict)
+    run.timings['severity_ms'] = elapsed_ms(start)
+
+    run.triage_json = json.dumps(triage_dict)
+    return {
+        "transcript": run.transcript,
+        "triage_data": triage_dict,
+        "severity_score": severity,
+        "mode": "direct",
+        "timings": run.timings
+    }
+
+# ONE SPAN PER MISTRAL ROUND TRIP (llm.call) AND TOOL CALL (tool.<name>) INSIDE THE AGENT LOOP
+class AgentSpans(BaseCallbackHandler):
+    def __init__(self):
+        self.starts = {}
+
+    def begin(self, stage: str, run_id):
+        self.starts[run_id] = (stage, time.time())
+
+    def end(self, run_id):
+        stage, start = self.starts.pop(run_id, (None, None))
+        if stage is not None:
+            telemetry.record_span(stage, start, time.time())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.begin("llm.call", run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.begin(f"tool.{(serialized or {}).get('name', 'unknown')}", run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.end(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.end(run_id)
+
 # RUN AGENT AND PROCESS TRANSCRIPT (JSON) FOR FRONTEND
-def run_agent():
+def run_agent(audio: str | np.ndarray, transcript: str = ""):
+    run = TriageRun(audio, transcript)
+    agent = build_agent(run)
 
+    start, wall_start = time.perf_counter(), time.time()
     response = agent.invoke({
         'messages': [
             {
@@ -158,13 +243,71 @@ def run_agent():
     }"""
             }
         ]
-    })
+    }, config = {'callbacks': [AgentSpans()]})
     
+    run.timings['agent_ms'] = elapsed_ms(start)
+    telemetry.record_span("triage.agent", wall_start, time.time())
+
     print("Agent Response", "\n", response['messages'][-1].content)
-    print("Full Transcript:", full_transcript)
-    print("Triage JSON:", triage_json)
-    print("Severity:", calculate_severity())
-    return get_context_info(full_transcript, triage_json)
+    print("Full Transcript:", run.transcript)
+    print("Triage JSON:", run.triage_json)
+    return get_context_info(run)
+
+# PICK PIPELINE (TRIAGE_MODE=direct|agent), FALLING BACK TO THE AGENT IF THE DIRECT PASS FAILS
+def resolve_mode(mode: str | None) -> str:
+    return mode or getenv("TRIAGE_MODE", "direct")
+
+class AgentUnavailable(ValueError):
+    pass
+
+def check_mode(mode: str | None):
+    # ENDPOINTS CALL THIS BEFORE ANY WORK AND ANSWER 400
+    if resolve_mode(mode) == "agent" and STUB_LLM:
+        raise AgentUnavailable("Agent mode is unavailable with TRIAGE_LLM=stub, use mode=direct")
+
+def run_triage(audio: str | np.ndarray, mode: str | None = None):
+    mode = resolve_mode(mode)
+    check_mode(mode)
+    if mode == "agent":
+        return run_agent(audio)
+
+    run = TriageRun(audio)
+    try:
+        return run_direct(run)
+    except (SchedulerFull, AudioDecodeError):
+        # OVERLOADED OR UNDECODABLE, NOT A BAD EXTRACTION: THE AGENT WOULD FAIL THE SAME WAY
+        raise
+    except Exception as e:
+        if STUB_LLM:
+            # NO AGENT TO FALL BACK TO: SURFACE THE REAL FAILURE
+            raise
+        print("Direct pipeline failed, falling back to agent:", e)
+        return run_agent(audio, run.transcript)
+
+
+# RESULT CACHE: SAME AUDIO BYTES + SAME MODE, WHISPER AND LLM -> SAME TRANSCRIPT AND TriageJSON
+def triage_cache_key(digest: str, mode: str | None) -> str:
+    llm_name = "stub" if STUB_LLM else LLM_MODEL
+    version = f"{resolve_mode(mode)}|{transcription.WHISPER_BACKEND}:{transcription.WHISPER_MODEL}|{llm_name}|vad{int(VAD_ENABLED)}"
+    return cache_key(digest, version)
+
+def cached_triage(key: str) -> dict | None:
+    hit = triage_cache.get(key) if triage_cache else None
+    if hit is None:
+        return None
+    # SEVERITY IS RECOMPUTED SO RANK TABLE CHANGES APPLY TO CACHED CALLS TOO
+    return {**hit, "severity_score": calculate_severity(hit["triage_data"]), "timings": {}, "cached": True}
+
+def store_triage(key: str, context_info: dict):
+    if triage_cache:
+        triage_cache.put(key, {k: v for k, v in context_info.items() if k not in ("timings", "cached")})
 
-# print(f"temp_audio_path/{listdir('temp_audio_path')[0]}")
-# run_agent()
\ No newline at end of file
+# digest IS THE audio_io DIGEST OF THE UPLOADED BYTES; ONLY SUCCESSFUL RESULTS ARE CACHED
+def run_triage_cached(audio: str | np.ndarray, digest: str, mode: str | None = None):
+    key = triage_cache_key(digest, mode)
+    hit = cached_triage(key)
+    if hit is not None:
+        return hit
+    context_info = run_triage(audio, mode)
+    store_triage(key, context_info)
+    return context_info
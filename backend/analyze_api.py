@@ -0,0 +1,139 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Literal
+import asyncio
+import time
+
+import agent_ranker
+import voice_api
+import supabase_api
+from agent_ranker import TriageJSON
+from audio_io import decode_audio_bytes, bytes_digest, WHISPER_SR, AudioDecodeError
+from inference_pool import emotion_pool, SchedulerFull
+import telemetry
+
+router = APIRouter(
+    prefix = "/analyze",
+    tags = ["analyze"],
+)
+
+# DATA VALIDATION SCHEMAS
+class EmotionJSON(BaseModel):
+    predicted_label: str = ""
+    class_probabilities: list[float] = []
+    score: float = 0.0
+    timeline: dict | None = None
+
+class AnalysisJSON(BaseModel):
+    transcript: str = ""
+    triage_data: TriageJSON
+    severity_score: float = 0.0
+    emotion: EmotionJSON
+    record_id: int | None = None
+    mode: str = "direct"
+    timings: dict[str, float] = {}
+    cached: bool = False
+
+async def timed(func, *args):
+    start = time.perf_counter()
+    result = await run_in_threadpool(func, *args)
+    return result, agent_ranker.elapsed_ms(start)
+
+async def timed_pool(pool, func, *args):
+    start = time.perf_counter()
+    result = await pool.submit(func, *args)
+    return result, agent_ranker.elapsed_ms(start)
+
+async def ready(value):
+    return value
+
+@router.post("/", response_model = AnalysisJSON, summary = "Transcribe, triage and score emotion for one uploaded call")
+async def analyze_call(
+    audio: UploadFile = File(...),
+    store: bool = Query(False, description = "Insert the call_severities row in the same request"),
+    mode: Literal["direct", "agent"] | None = Query(None, description = "Triage pipeline to run, defaults to TRIAGE_MODE"),
+    timeline: bool = Query(False, description = "Score emotion over the whole call in sliding windows (score is the peak window)")
+):
+    if not audio.content_type or not audio.content_type.startswith('audio/'):
+        raise HTTPException(
+            status_code = 400,
+            detail = f"Invalid file. Expected audio file, received {audio.content_type} file."
+        )
+    try:
+        agent_ranker.check_mode(mode)
+    except agent_ranker.AgentUnavailable as e:
+        raise HTTPException(status_code = 400, detail = str(e))
+    if store and supabase_api.pool is None:
+        raise HTTPException(status_code = 503, detail = "No database connection")
+
+    data = await audio.read()
+    telemetry.observe_size("analyze", len(data))
+
+    # RESUBMITTED RECORDINGS SKIP WHATEVER IS ALREADY CACHED (BOTH HITS SKIP DECODING TOO)
+    digest = bytes_digest(data)
+    triage_key = agent_ranker.triage_cache_key(digest, mode)
+    emotion_key = voice_api.emotion_cache_key(digest, timeline)
+    (context_info, emotion), lookup_ms = await timed(
+        lambda: (agent_ranker.cached_triage(triage_key), voice_api.cached_emotion(emotion_key))
+    )
+    timings = {'cache_ms': lookup_ms}
+    fully_cached = context_info is not None and emotion is not None
+
+    if not fully_cached:
+        # DECODE ONCE INTO A SHARED 16 kHz BUFFER FOR BOTH MODELS
+        try:
+            waveform, timings['decode_ms'] = await timed(decode_audio_bytes, data)
+        except AudioDecodeError as e:
+            raise HTTPException(status_code = 400, detail = str(e))
+
+        # RUN TRIAGE AND EMOTION MODEL CONCURRENTLY ON THE SAME BUFFER
+        async def triage():
+            result, _ = await timed(agent_ranker.run_triage, waveform, mode)
+            await run_in_threadpool(agent_ranker.store_triage, triage_key, result)
+            return result
+
+        async def predict():
+            predict_fn = voice_api.predict_timeline if timeline else voice_api.predict_waveform
+            result, timings['emotion_ms'] = await timed_pool(emotion_pool, predict_fn, waveform, WHISPER_SR)
+            await run_in_threadpool(voice_api.store_emotion, emotion_key, result)
+            return result
+
+        try:
+            context_info, emotion = await asyncio.gather(
+                triage() if context_info is None else ready(context_info),
+                predict() if emotion is None else ready(emotion),
+            )
+        except SchedulerFull:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error analyzing audio: {e}")
+
+    timings.update(context_info['timings'])
+    context_info['timings'] = timings
+    context_info['cached'] = fully_cached
+
+    record_id = None
+    if store:
+        entry = supabase_api.TableEntry(
+            emotional_sev = emotion['score'],
+            context_sev = context_info['severity_score'],
+            transcript = context_info['transcript'],
+            key_details = context_info['triage_data'],
+            is_active = True,
+            emotions = emotion['predicted_label'],
+        )
+        try:
+            start = time.perf_counter()
+            record_id = await supabase_api.new_record(supabase_api.pool, entry.model_dump())
+            timings['db_ms'] = agent_ranker.elapsed_ms(start)
+        except supabase_api.DatabaseUnavailable:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Insertion failed: {e}")
+
+    return AnalysisJSON(
+        **context_info,
+        emotion = EmotionJSON(**emotion),
+        record_id = record_id,
+    )
@@ -0,0 +1,85 @@
+import hashlib
+import subprocess
+import numpy as np
+import librosa
+
+import telemetry
+
+# WHISPER EXPECTS 16 kHz MONO FLOAT32 (whisper.audio.SAMPLE_RATE)
+WHISPER_SR = 16000
+
+
+class AudioDecodeError(ValueError):
+    """
+    ffmpeg could not decode an upload: the client's fault, so endpoints answer 400.
+    """
+
+
+@telemetry.traced("audio.decode")
+def decode_audio_bytes(data: bytes, sr: int = WHISPER_SR, duration: float | None = None) -> np.ndarray:
+    """
+    Decode uploaded audio bytes to mono float32 at sr.
+    Same ffmpeg invocation as whisper.audio.load_audio, but reads from stdin
+    so the upload never has to be written to disk. duration stops decoding early.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", "pipe:0",
+        *(["-t", str(duration)] if duration else []),
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sr),
+        "-"
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        # ONLY THE LAST ERROR LINE (e.g. "pipe:0: Invalid data found when processing input") REACHES THE CLIENT
+        lines = e.stderr.decode(errors="ignore").strip().splitlines()
+        reason = lines[-1][:200] if lines else f"ffmpeg exited with code {e.returncode}"
+        raise AudioDecodeError(f"Could not decode audio: {reason}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Resample an already decoded waveform (no-op when rates match).
+    """
+    if orig_sr == target_sr:
+        return y
+    return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr)
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's bytes, used to key manifests and caches by audio content.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def bytes_digest(data: bytes) -> str:
+    """
+    SHA-256 of an in-memory upload, matching file_digest for the same bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def pcm_to_float32(data: bytes, sample_format: str = "s16le") -> np.ndarray:
+    """
+    Raw little-endian PCM frames (e.g. from a WebSocket) to float32 in [-1, 1].
+    """
+    if sample_format == "s16le":
+        return np.frombuffer(data, "<i2").astype(np.float32) / 32768.0
+    if sample_format == "f32le":
+        return np.frombuffer(data, "<f4").astype(np.float32)
+    raise ValueError(f"Unsupported sample format: {sample_format}")
@@ -1,12 +1,21 @@
 import os
+import json
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import librosa
 import noisereduce as nr
 import soundfile as sf
-from scipy.signal import butter, filtfilt
-import kagglehub
+import soxr
+from scipy.signal import butter, filtfilt, fftconvolve, istft, sosfilt, sosfilt_zi, stft
+
+from audio_io import file_digest
+import telemetry
 
 # Optional: download RAVDESS once via kagglehub
+# import kagglehub
 # path = kagglehub.dataset_download("uwrfkaggler/ravdess-emotional-speech-audio")
 # print("Path to dataset files:", path)
 
@@ -73,15 +82,16 @@ def preemphasis(y: np.ndarray, alpha: float = 0.97):
 
 # 6. FREQUENCY FILTERING (band-pass 80Hz–8000Hz)
 
-def bandpass_filter(
-    y: np.ndarray,
+@functools.lru_cache(maxsize=32)
+def bandpass_design(
     sr: int,
     lowcut: float = 80.0,
     highcut: float = None,
     order: int = 4,
+    output: str = "ba",
 ):
     """
-    Apply a Butterworth band-pass filter.
+    Butterworth band-pass coefficients, designed once per parameter set.
     Ensures 0 < Wn < 1 for scipy.signal.butter.
     """
     nyq = 0.5 * sr
@@ -98,11 +108,111 @@ def bandpass_filter(
     if not (0 < low < high < 1):
         raise ValueError(f"Invalid bandpass frequencies: low={low}, high={high}, sr={sr}")
 
-    b, a = butter(order, [low, high], btype="band")
+    return butter(order, [low, high], btype="band", output=output)
+
+
+def bandpass_filter(
+    y: np.ndarray,
+    sr: int,
+    lowcut: float = 80.0,
+    highcut: float = None,
+    order: int = 4,
+):
+    """
+    Apply a zero-phase Butterworth band-pass filter.
+    """
+    b, a = bandpass_design(sr, lowcut, highcut, order)
     return filtfilt(b, a, y)
 
 
+# 7. VOICE ACTIVITY DETECTION (ENERGY-BASED, NO MODEL)
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+
+
+@telemetry.traced("audio.vad")
+def detect_speech(
+    y: np.ndarray,
+    sr: int,
+    frame_ms: float = 20.0,
+    margin_db: float = 10.0,
+    floor_cap_db: float = -45.0,
+    range_db: float = 45.0,
+    min_speech_ms: float = 200.0,
+    min_silence_ms: float = 400.0,
+    pad_ms: float = 150.0,
+) -> np.ndarray:
+    """
+    Find speech in a mono waveform. Returns an (n_segments, 2) int array of
+    [start, end) sample indices.
+    A frame is speech when its RMS level is margin_db above the noise floor (10th
+    percentile frame level, capped at floor_cap_db so an all-speech window is not
+    mistaken for noise) and within range_db of the loudest frame. Gaps shorter than
+    min_silence_ms are bridged, segments shorter than min_speech_ms dropped, and
+    every segment padded by pad_ms so word edges survive.
+    """
+    hop = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(y) // hop
+    if n_frames == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    frames = np.asarray(y[:n_frames * hop], dtype=np.float32).reshape(n_frames, hop)
+    level_db = 10.0 * np.log10(np.maximum(np.mean(frames ** 2, axis=1), 1e-10))
+    floor_db = min(float(np.percentile(level_db, 10)), floor_cap_db)
+    threshold = max(floor_db + margin_db, float(level_db.max()) - range_db)
+    voiced = level_db > threshold
+
+    # RUNS OF VOICED FRAMES AS [start, end) FRAME INDICES
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.view(np.int8), [0]))))
+    runs = edges.reshape(-1, 2)
+    if len(runs) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # BRIDGE SHORT PAUSES (HANGOVER), THEN DROP BLIPS
+    min_gap = int(np.ceil(min_silence_ms / frame_ms))
+    keep = np.concatenate(([True], runs[1:, 0] - runs[:-1, 1] >= min_gap))
+    merged = np.stack([runs[keep, 0], np.maximum.reduceat(runs[:, 1], np.flatnonzero(keep))], axis=1)
+    merged = merged[merged[:, 1] - merged[:, 0] >= int(np.ceil(min_speech_ms / frame_ms))]
+
+    pad = int(sr * pad_ms / 1000)
+    segments = merged * hop
+    segments[:, 0] = np.maximum(segments[:, 0] - pad, 0)
+    segments[:, 1] = np.minimum(segments[:, 1] + pad, len(y))
+    # PADDING CAN MAKE NEIGHBOURS OVERLAP; MERGE THEM AGAIN
+    if len(segments) > 1:
+        keep = np.concatenate(([True], segments[1:, 0] > segments[:-1, 1]))
+        segments = np.stack([segments[keep, 0], np.maximum.reduceat(segments[:, 1], np.flatnonzero(keep))], axis=1)
+    return segments.astype(np.int64)
+
+
+def speech_only(y: np.ndarray, sr: int, segments: np.ndarray, gap_s: float = 0.0):
+    """
+    Concatenate the speech segments (optionally separated by gap_s of silence).
+    Returns (speech, timeline) where timeline[i] = [start in speech, start in y] in
+    seconds for segment i; pass it to to_original_time to map timestamps back.
+    """
+    gap = np.zeros(int(sr * gap_s), dtype=np.float32)
+    pieces, timeline, position = [], [], 0
+    for start, end in segments:
+        if pieces and len(gap):
+            pieces.append(gap)
+            position += len(gap)
+        pieces.append(np.asarray(y[start:end], dtype=np.float32))
+        timeline.append((position / sr, start / sr))
+        position += end - start
+    speech = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.float32)
+    return speech, np.array(timeline, dtype=np.float64).reshape(-1, 2)
+
+
+def to_original_time(t, timeline: np.ndarray):
+    """
+    Map a time (or array of times) in the speech_only() output back to the original audio.
+    """
+    idx = np.maximum(np.searchsorted(timeline[:, 0], t, side="right") - 1, 0)
+    return timeline[idx, 1] + (t - timeline[idx, 0])
+
+
 # PIPELINE
+@telemetry.traced("audio.preprocess")
 def pipeline(audio_path: str, target_sr: int = TARGET_SR) -> tuple[np.ndarray, int]:
     y, sr = load_audio(audio_path, target_sr)
     y = rms_normalize(y)
@@ -114,26 +224,414 @@ def pipeline(audio_path: str, target_sr: int = TARGET_SR) -> tuple[np.ndarray, i
     return y, sr
 
 
+# STREAMING PIPELINE: SAME STAGES AS pipeline() OVER FIXED-SIZE FLOAT32 BLOCKS.
+# STATE IS CARRIED BETWEEN BLOCKS AND EVERY BUFFER IS BLOCK-SIZED, SO MEMORY DOES NOT GROW WITH THE INPUT
+STREAM_BLOCK = 32768  # SAMPLES PER BLOCK (~2 s AT 16 kHz), A MULTIPLE OF NR_HOP
+TRIM_FRAME, TRIM_HOP = 2048, 512  # librosa.effects.trim DEFAULTS
+# noise_reduce() SETTINGS AS noisereduce APPLIES THEM: STATS FROM THE FIRST chunk_size SAMPLES (clip_noise_stationary)
+NR_N_FFT, NR_HOP, NR_PROFILE = 1024, 256, 600000
+# STFT CONTEXT EACH SIDE OF A BLOCK; 30000 (noisereduce's CHUNK PADDING) MOD NR_HOP PUTS THE FRAMES ON ITS GRID
+NR_CONTEXT = 4096 + 30000 % NR_HOP
+# BACKWARD-PASS LOOKAHEAD FOR THE ZERO-PHASE BAND-PASS; THE 80 Hz POLES DECAY FULLY WITHIN IT
+BP_LOOKAHEAD = 4096
+BP_PADLEN = 27  # filtfilt DEFAULT FOR AN ORDER-4 BAND-PASS: 3 * max(len(a), len(b))
+
+
+def read_blocks(path: str, target_sr: int = TARGET_SR, block: int = STREAM_BLOCK):
+    """
+    Decode a file incrementally into mono float32 blocks at target_sr.
+    Resampling uses soxr's streaming resampler at the quality librosa.load uses.
+    """
+    info = sf.info(path)
+    resampler = None
+    if info.samplerate != target_sr:
+        resampler = soxr.ResampleStream(info.samplerate, target_sr, 1, dtype="float32", quality="HQ")
+    for frames in sf.blocks(path, blocksize=block, dtype="float32", always_2d=True):
+        y = frames.mean(axis=1, dtype=np.float32) if frames.shape[1] > 1 else np.ascontiguousarray(frames[:, 0])
+        if resampler is not None:
+            y = resampler.resample_chunk(y)
+        if len(y):
+            yield y
+    if resampler is not None:
+        y = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if len(y):
+            yield y
+
+
+class LevelMeter:
+    """
+    Streaming version of the measurements rms_normalize and trim_silence make on the
+    whole signal: the overall RMS and the centred frame RMS librosa.effects.trim uses.
+    """
+
+    def __init__(self, frame: int = TRIM_FRAME, hop: int = TRIM_HOP):
+        self.frame, self.hop = frame, hop
+        self.squares = np.zeros(frame // 2)  # CENTRED FRAMES: ZERO PADDING BEFORE THE SIGNAL
+        self.frame_rms = []
+        self.n = 0
+        self.sum_squares = 0.0
+
+    def _frames(self, count: int):
+        cumulative = np.concatenate([[0.0], np.cumsum(self.squares)])
+        starts = np.arange(count) * self.hop
+        self.frame_rms.append(np.sqrt((cumulative[starts + self.frame] - cumulative[starts]) / self.frame))
+        self.squares = self.squares[count * self.hop:]
+
+    def update(self, y: np.ndarray):
+        squares = np.square(y, dtype=np.float64)
+        self.n += len(y)
+        self.sum_squares += squares.sum()
+        self.squares = np.concatenate([self.squares, squares])
+        if len(self.squares) >= self.frame:
+            self._frames((len(self.squares) - self.frame) // self.hop + 1)
+
+    def levels(self, target_rms: float = 0.1, top_db: float = 30.0, trim_end: bool = True):
+        """
+        (gain, start, end) matching rms_normalize and trim_silence on everything seen so far.
+        end is None with trim_end=False (more input may follow).
+        """
+        done = sum(len(r) for r in self.frame_rms)
+        remaining = 1 + self.n // self.hop - done
+        if remaining > 0:
+            saved = self.squares
+            self.squares = np.concatenate([self.squares, np.zeros(self.frame)])
+            self._frames(remaining)
+            frame_rms = np.concatenate(self.frame_rms)
+            self.frame_rms.pop()
+            self.squares = saved
+        else:
+            frame_rms = np.concatenate(self.frame_rms)
+
+        rms = np.sqrt(self.sum_squares / max(self.n, 1))
+        gain = 1.0 if rms < 1e-8 else target_rms / rms
+        # amplitude_to_db(ref=np.max) > -top_db, AS IN librosa.effects.trim
+        power = np.maximum(1e-10, np.square(frame_rms * gain))
+        nonsilent = np.flatnonzero(10 * np.log10(power) - 10 * np.log10(power.max()) > -top_db)
+        if len(nonsilent) == 0:
+            return gain, 0, 0
+        start = int(nonsilent[0] * self.hop)
+        end = min(self.n, int((nonsilent[-1] + 1) * self.hop)) if trim_end else None
+        return gain, start, end
+
+
+def scan_levels(blocks) -> tuple[float, int, int]:
+    """
+    First pass over a file: exact rms_normalize gain and trim_silence bounds.
+    """
+    meter = LevelMeter()
+    for y in blocks:
+        meter.update(y)
+    return meter.levels()
+
+
+def _leveled(blocks, gain: float, start: int, end: int | None):
+    # rms_normalize + trim_silence: SCALE IN PLACE, DROP SAMPLES OUTSIDE [start, end)
+    pos = 0
+    for y in blocks:
+        lo = max(start - pos, 0)
+        hi = len(y) if end is None else min(len(y), end - pos)
+        pos += len(y)
+        if hi > lo:
+            y = y[lo:hi]
+            y *= np.float32(gain)
+            yield y
+
+
+def _windows(blocks, block: int, left: int, right: int, chunk: int | None = None):
+    """
+    Re-block a stream into one reused float32 buffer covering [s - left, s + n + right)
+    for consecutive blocks [s, s + n); samples outside the signal are zeros.
+    Blocks are block samples long; with chunk, they also restart at every multiple of
+    chunk, so the last block of each chunk is shorter. Yields (buffer, n) where n is the
+    number of real samples in [s, s + n).
+    """
+    def size(pos: int) -> int:
+        return block if chunk is None else min(block, chunk - pos % chunk)
+
+    seg = np.zeros(left + block + right, dtype=np.float32)
+    fill, pos = left, 0
+    n = size(pos)
+    for y in blocks:
+        i = 0
+        while i < len(y):
+            need = left + n + right
+            take = min(need - fill, len(y) - i)
+            seg[fill:fill + take] = y[i:i + take]
+            fill += take
+            i += take
+            if fill == need:
+                yield seg[:need], n
+                seg[:need - n] = seg[n:need]
+                fill -= n
+                pos += n
+                n = size(pos)
+    remaining = fill - left
+    while remaining > 0:
+        need = left + n + right
+        seg[max(fill, 0):need] = 0
+        yield seg[:need], min(n, remaining)
+        seg[:need - n] = seg[n:need]
+        fill -= n
+        remaining -= n
+        pos += n
+        n = size(pos)
+
+
+def _db(spec: np.ndarray) -> np.ndarray:
+    # SAME AMPLITUDE -> dB (80 dB FLOOR PER FREQUENCY) AS noisereduce
+    db = 20 * np.log10(np.abs(spec) + np.finfo(np.float64).eps)
+    return np.maximum(db, db.max(axis=-1, keepdims=True) - 80.0)
+
+
+def _mask_smoothing(sr: int, freq_hz: float = 500.0, time_ms: float = 50.0) -> np.ndarray:
+    # noisereduce's TRIANGULAR MASK-SMOOTHING KERNEL FOR ITS DEFAULT freq_mask_smooth_hz / time_mask_smooth_ms
+    n_freq = int(freq_hz / (sr / (NR_N_FFT / 2)))
+    n_time = int(time_ms / ((NR_HOP / sr) * 1000))
+    ramp = lambda n: np.concatenate([np.linspace(0, 1, n + 1, endpoint=False), np.linspace(1, 0, n + 2)])[1:-1]
+    kernel = np.outer(ramp(n_freq), ramp(n_time))
+    return kernel / kernel.sum()
+
+
+def _noise_gated(blocks, sr: int, block: int, n_std_thresh: float = 1.0):
+    # noise_reduce: THRESHOLDS FROM THE FIRST NR_PROFILE SAMPLES, THEN EACH BLOCK GATED WITH NR_CONTEXT EITHER SIDE.
+    # noisereduce SPLITS LONGER INPUT INTO NR_PROFILE-SAMPLE CHUNKS, EACH ON ITS OWN STFT GRID, SO BLOCKS RESTART
+    # AT EVERY CHUNK BOUNDARY TO STAY ON THE SAME GRID
+    stft_args = dict(nfft=NR_N_FFT, noverlap=NR_N_FFT - NR_HOP, nperseg=NR_N_FFT)
+    blocks = iter(blocks)
+    head, size = [], 0
+    for y in blocks:
+        head.append(y)
+        size += len(y)
+        if size >= NR_PROFILE:
+            break
+    if not head:
+        return
+    profile = np.concatenate(head)
+    _, _, noise = stft(profile[:NR_PROFILE], padded=False, **stft_args)
+    noise_db = _db(noise)
+    threshold = (noise_db.mean(axis=1) + noise_db.std(axis=1) * n_std_thresh)[:, None]
+    del noise, noise_db
+    kernel = _mask_smoothing(sr)
+
+    def chained():
+        yield profile
+        yield from blocks
+
+    # RIGHT CONTEXT ROUNDED UP SO EACH FULL WINDOW IS A WHOLE NUMBER OF HOPS (istft DROPS A PARTIAL LAST HOP)
+    right = NR_CONTEXT + (-(block + 2 * NR_CONTEXT)) % NR_HOP + NR_HOP
+    for seg, n in _windows(chained(), block, NR_CONTEXT, right, chunk=NR_PROFILE):
+        _, _, spec = stft(seg, padded=False, **stft_args)
+        mask = fftconvolve((_db(spec) > threshold).astype(np.float64), kernel, mode="same")
+        _, out = istft(spec * mask, **stft_args)
+        yield out[NR_CONTEXT:NR_CONTEXT + n].astype(np.float32)
+
+
+def _preemphasized(blocks, alpha: float = 0.97):
+    # preemphasis IN PLACE, CARRYING THE LAST SAMPLE OF EACH BLOCK INTO THE NEXT
+    previous = None
+    scratch = np.empty(0, dtype=np.float32)
+    for y in blocks:
+        if len(scratch) < len(y):
+            scratch = np.empty(len(y), dtype=np.float32)
+        last = y[-1]
+        np.multiply(y[:-1], np.float32(alpha), out=scratch[:len(y) - 1])
+        y[1:] -= scratch[:len(y) - 1]
+        if previous is not None:
+            y[0] -= np.float32(alpha) * previous
+        previous = last
+        yield y
+
+
+def _bandpassed(blocks, sos: np.ndarray, block: int, lookahead: int = BP_LOOKAHEAD, padlen: int = BP_PADLEN):
+    """
+    bandpass_filter (forward-backward, odd extension at both ends like filtfilt) on a stream.
+    The forward pass carries its SOS state across blocks exactly. The backward pass of
+    each block starts lookahead samples later, by which point the truncated tail has
+    decayed to nothing; the last block is run backward from the true end as filtfilt does.
+    """
+    zi = sosfilt_zi(sos)
+    state = None
+    pending = np.zeros(0)
+    tail = np.zeros(0, dtype=np.float32)
+    for x in blocks:
+        if state is None:
+            if len(x) <= padlen:
+                raise ValueError(f"The length of the input vector x must be greater than padlen, which is {padlen}.")
+            left_ext = 2 * x[0] - x[padlen:0:-1]
+            _, state = sosfilt(sos, left_ext, zi=zi * left_ext[0])
+        forward, state = sosfilt(sos, x, zi=state)
+        tail = np.concatenate([tail, x])[-(padlen + 1):]
+        pending = np.concatenate([pending, forward])
+        while len(pending) >= block + lookahead:
+            backward = sosfilt(sos, pending[block + lookahead - 1::-1])[::-1]
+            yield backward[:block].astype(np.float32)
+            pending = pending[block:]
+    if state is None:
+        return
+    right_ext = 2 * tail[-1] - tail[-2::-1][:padlen]
+    forward, _ = sosfilt(sos, right_ext, zi=state)
+    full = np.concatenate([pending, forward])
+    backward, _ = sosfilt(sos, full[::-1], zi=zi * full[-1])
+    backward = backward[::-1][:len(pending)].astype(np.float32)
+    for i in range(0, len(backward), block):
+        yield backward[i:i + block]
+
+
+def stream_pipeline(blocks, sr: int = TARGET_SR, levels: tuple | None = None, block: int = STREAM_BLOCK):
+    """
+    pipeline() as a generator of float32 blocks. blocks are mono float32 arrays at sr
+    (any sizes) and may be modified in place.
+    levels = (gain, start, end) from scan_levels gives the exact normalisation and
+    trim of the batch pipeline (needs a first pass over the input). Without it, for
+    unbounded input, both are estimated from the first NR_PROFILE samples and trailing
+    silence is kept, since the end of the input is not known.
+    """
+    blocks = iter(blocks)
+    if levels is None:
+        meter, head = LevelMeter(), []
+        for y in blocks:
+            meter.update(y)
+            head.append(y)
+            if meter.n >= NR_PROFILE:
+                break
+        levels = meter.levels(trim_end=False)
+        blocks = (y for part in (head, blocks) for y in part)
+
+    y = _leveled(blocks, *levels)
+    y = _noise_gated(y, sr, block)
+    y = _preemphasized(y)
+    yield from _bandpassed(y, bandpass_design(sr, output="sos"), block)
+
+
+@telemetry.traced("audio.preprocess_stream")
+def stream_file(audio_path: str, target_sr: int = TARGET_SR, block: int = STREAM_BLOCK):
+    """
+    pipeline() for recordings of any length, in two streaming passes: levels, then processing.
+    """
+    levels = scan_levels(read_blocks(audio_path, target_sr, block))
+    yield from stream_pipeline(read_blocks(audio_path, target_sr, block), target_sr, levels, block)
+
+
+
+# PARALLEL, RESUMABLE DATASET DRIVER
+MANIFEST_NAME = "manifest.json"
+# BUMP WHEN pipeline() CHANGES SO EXISTING OUTPUTS ARE REBUILT (STREAM_VERSION: stream_pipeline() ONLY)
+PIPELINE_VERSION = "1"
+STREAM_VERSION = "2"
+
 
-def main():
-    raw_dir = "backend/1"
-    processed_dir = "backend/processed"
+def pipeline_params(target_sr: int = TARGET_SR, streaming: bool = False) -> str:
+    # STREAMED OUTPUT AGREES WITH pipeline() ONLY WITHIN TOLERANCE, SO IT COUNTS AS DIFFERENT PARAMS
+    return f"v{PIPELINE_VERSION}-sr{target_sr}" + (f"-stream{STREAM_VERSION}" if streaming else "")
+
+
+def load_manifest(processed_dir: str) -> dict:
+    path = os.path.join(processed_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(processed_dir: str, manifest: dict):
+    # WRITE-THEN-RENAME SO A CRASH NEVER LEAVES A HALF-WRITTEN MANIFEST
+    path = os.path.join(processed_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def process_file(in_path: str, out_path: str, target_sr: int = TARGET_SR, streaming: bool = False):
+    """
+    Worker task: run the pipeline on one file and write the result.
+    Returns (seconds of output audio, seconds spent).
+    """
+    start = time.perf_counter()
+    if streaming:
+        samples = 0
+        with sf.SoundFile(out_path, "w", target_sr, 1) as f:
+            for block in stream_file(in_path, target_sr):
+                f.write(block)
+                samples += len(block)
+        return samples / target_sr, time.perf_counter() - start
+    y_proc, sr = pipeline(in_path, target_sr)
+    sf.write(out_path, y_proc, sr)
+    return len(y_proc) / sr, time.perf_counter() - start
+
+
+def main(
+    raw_dir: str = "backend/1",
+    processed_dir: str = "backend/processed",
+    workers: int | None = None,
+    target_sr: int = TARGET_SR,
+    force: bool = False,
+    streaming: bool = False,
+):
     os.makedirs(processed_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(processed_dir)
+    params = pipeline_params(target_sr, streaming)
 
+    # FIND FILES WHOSE CONTENT OR PIPELINE PARAMS CHANGED SINCE THE LAST RUN
+    pending = []
+    skipped = 0
     for root, dirs, files in os.walk(raw_dir):
         for file in files:
             if not file.lower().endswith(".wav"):
                 continue
 
             in_path = os.path.join(root, file)
-            print("Processing:", in_path)
-
-            y_proc, sr = pipeline(in_path, TARGET_SR)
-
             out_path = os.path.join(processed_dir, file)
-            sf.write(out_path, y_proc, sr)
-            print(f"Processed: {in_path} -> {out_path}, length: {len(y_proc)/sr:.2f}s")
+            digest = file_digest(in_path)
+            entry = manifest.get(file)
+            if entry and entry["sha256"] == digest and entry["params"] == params and os.path.exists(out_path):
+                skipped += 1
+                continue
+            pending.append((file, in_path, out_path, digest))
+
+    print(f"Up to date: {skipped}, to process: {len(pending)}")
+    if not pending:
+        return
+
+    start = time.perf_counter()
+    done = failed = 0
+    audio_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_file, in_path, out_path, target_sr, streaming): (file, in_path, out_path, digest)
+            for file, in_path, out_path, digest in pending
+        }
+        for future in as_completed(futures):
+            file, in_path, out_path, digest = futures[future]
+            try:
+                duration, _ = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Failed: {in_path}: {e}")
+                continue
+
+            done += 1
+            audio_seconds += duration
+            manifest[file] = {"sha256": digest, "params": params, "output": out_path}
+            # PERSIST PROGRESS REGULARLY SO A CRASH ONLY LOSES THE LAST FEW FILES
+            if done % 25 == 0:
+                save_manifest(processed_dir, manifest)
+            print(f"Processed: {in_path} -> {out_path}, length: {duration:.2f}s")
+
+    save_manifest(processed_dir, manifest)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Processed {done} files ({failed} failed) in {elapsed:.1f}s: "
+        f"{done / elapsed:.2f} files/s, {audio_seconds / elapsed:.1f}x real time"
+    )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Preprocess raw RAVDESS audio")
+    parser.add_argument("--raw-dir", default="backend/1")
+    parser.add_argument("--processed-dir", default="backend/processed")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild everything")
+    parser.add_argument("--streaming", action="store_true", help="Block-based pipeline with bounded memory (long recordings)")
+    args = parser.parse_args()
+    main(args.raw_dir, args.processed_dir, args.workers, force=args.force, streaming=args.streaming)
@@ -0,0 +1,114 @@
+"""
+Concurrency benchmark for /agent/generate_json/.
+
+Swaps Whisper and the Mistral agent for deterministic fakes with fixed latency,
+then fires uploads at increasing concurrency and checks that every response
+carries the transcript of its own upload.
+
+Run from the backend folder:
+    python -m benchmarks.concurrent_calls --requests 64 --levels 1 2 4 8 16 --mode agent
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+import agent_ranker
+import transcription
+from agent_api import router as agent_router
+from stub_llm import StubTriageLLM
+
+
+# FAKE WHISPER: THE "TRANSCRIPT" IS THE UPLOADED BYTES, SO CROSSED AUDIO IS DETECTABLE
+class FakeTranscriber:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def transcribe(self, audio_path):
+        time.sleep(self.latency)
+        with open(audio_path, "rb") as f:
+            return {"text": f.read().decode()}
+
+
+# FAKE AGENT: SAME TOOL ORDER AS THE REAL ONE, ONE SLEEP PER LLM ROUND TRIP
+class ScriptedAgent:
+    def __init__(self, tools, latency: float):
+        self.tools = {t.name: t for t in tools}
+        self.latency = latency
+
+    def invoke(self, inputs, config = None):
+        time.sleep(self.latency)
+        text = self.tools["get_transcription"].invoke({})
+        time.sleep(self.latency)
+        triage = {
+            "event": "fire",
+            "victims": int(text.split("-")[1]) % 12,
+            "injuries": "none",
+            "weapon": "none",
+            "ongoing_threat": "not ongoing",
+        }
+        self.tools["extract_info"].invoke({"transcript": text, "json_object": json.dumps(triage)})
+        time.sleep(self.latency)
+        return {"messages": [SimpleNamespace(content = "")]}
+
+
+async def run_level(client: httpx.AsyncClient, mode: str, concurrency: int, n_requests: int):
+    sem = asyncio.Semaphore(concurrency)
+    crossed = 0
+
+    async def one(i: int):
+        nonlocal crossed
+        payload = f"call-{i}".encode()
+        async with sem:
+            res = await client.post(
+                "/agent/generate_json/",
+                params = {"mode": mode},
+                files = {"audio": (f"call-{i}.wav", payload, "audio/wav")},
+            )
+        body = res.json()
+        if res.status_code != 200 or body["transcript"] != payload.decode():
+            crossed += 1
+        elif mode == "agent" and body["triage_data"]["victims"] != i % 12:
+            crossed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    return elapsed, crossed
+
+
+async def main(args):
+    # THE FAKE "AUDIO" IS TEXT, SO IT MUST REACH THE TRANSCRIBER UNDECODED
+    agent_ranker.VAD_ENABLED = False
+    # EVERY LEVEL REPOSTS THE SAME call-{i} BODIES, SO CACHED RESULTS WOULD MEASURE THE CACHE, NOT THE PIPELINE
+    agent_ranker.triage_cache = None
+    transcription.transcriber = transcription.Transcriber(lambda: FakeTranscriber(args.whisper_latency), transcription.slots)
+    agent_ranker.create_agent = lambda tools, model, system_prompt: ScriptedAgent(tools, args.llm_latency)
+    agent_ranker.extractor = StubTriageLLM(args.llm_latency).with_structured_output(agent_ranker.TriageJSON)
+
+    app = FastAPI()
+    app.include_router(agent_router)
+    transport = httpx.ASGITransport(app = app)
+
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench") as client:
+        baseline = None
+        print(f"{'concurrency':>12} {'calls/s':>10} {'speedup':>8} {'crossed':>8}")
+        for level in args.levels:
+            elapsed, crossed = await run_level(client, args.mode, level, args.requests)
+            throughput = args.requests / elapsed
+            baseline = baseline or throughput
+            print(f"{level:>12} {throughput:>10.2f} {throughput / baseline:>7.2f}x {crossed:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Concurrent /agent/generate_json/ benchmark")
+    parser.add_argument("--mode", choices = ["direct", "agent"], default = "direct")
+    parser.add_argument("--requests", type = int, default = 64)
+    parser.add_argument("--levels", type = int, nargs = "+", default = [1, 2, 4, 8, 16])
+    parser.add_argument("--whisper-latency", type = float, default = 0.02)
+    parser.add_argument("--llm-latency", type = float, default = 0.15)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+Pickled sklearn forest (emotion_model.pkl) against the compact memory-mapped
+artifact (emotion_model_compact, written by voice_model.export_compact).
+
+Cold start (load time, peak RSS) is measured in a fresh process per format.
+Single-sample predict_proba latency and probability parity are measured on
+rows from the feature cache (or random rows if the cache is empty).
+
+Run from the backend folder after exporting:
+    python voice_model.py --export-only
+    python -m benchmarks.emotion_model_runtime --samples 2000
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def load(model_format: str):
+    # SAME LOADERS AS voice_api.load_emotion_model, WITHOUT IMPORTING voice_api (WHICH LOADS ITS OWN COPY)
+    if model_format == "compact":
+        from compact_forest import CompactForest
+        return CompactForest(BACKEND_DIR / "emotion_model_compact")
+    import joblib
+    return joblib.load(BACKEND_DIR / "emotion_model.pkl")["model"]
+
+
+def cold_start(model_format: str) -> dict:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    model = load(model_format)
+    load_s = time.perf_counter() - start
+    first = time.perf_counter()
+    model.predict_proba(np.zeros((1, model.n_features_in_ if model_format == "pickle" else len(model.feature_columns))))
+    return {
+        "load_s": load_s,
+        "first_ms": (time.perf_counter() - first) * 1000,
+        "rss_mib": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024,
+    }
+
+
+def sample_rows(n: int, n_features: int) -> np.ndarray:
+    from feature_store import FeatureStore
+    cached = np.asarray(FeatureStore().matrix)
+    rng = np.random.default_rng(0)
+    if len(cached):
+        return cached[rng.integers(len(cached), size=n)]
+    return rng.standard_normal((n, n_features))
+
+
+def main(args):
+    # spawn: EACH FORMAT IS LOADED IN A PROCESS THAT HAS NOT TOUCHED EITHER MODEL
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'format':>8} {'load ms':>9} {'1st ms':>8} {'RSS MiB':>8}")
+    for model_format in ("pickle", "compact"):
+        with ctx.Pool(1) as pool:
+            result = pool.apply(cold_start, (model_format,))
+        print(f"{model_format:>8} {1000 * result['load_s']:>9.1f} {result['first_ms']:>8.2f} {result['rss_mib']:>8.0f}")
+
+    pickled, compact = load("pickle"), load("compact")
+    X = sample_rows(args.samples, len(compact.feature_columns))
+
+    print(f"\n{'format':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, model in (("pickle", pickled), ("compact", compact)):
+        latencies = []
+        for row in X:
+            start = time.perf_counter()
+            model.predict_proba(row[None, :])
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{name:>8} {np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}")
+
+    expected, actual = pickled.predict_proba(X), compact.predict_proba(X)
+    print(f"\nparity over {len(X)} rows: max |dp| = {np.abs(expected - actual).max():.2e}, "
+          f"same label {100 * np.mean(expected.argmax(1) == actual.argmax(1)):.2f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Emotion model runtime benchmark")
+    parser.add_argument("--samples", type = int, default = 2000)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Cost of whole-call emotion timelines: voice_features.extract_window_features
+(frames computed once per call, window statistics from cumulative sums) against
+extracting every overlapping window as its own clip with extract_features_batch,
+for synthetic calls of increasing length, with a parity check between the two.
+The parity column is the largest difference of any feature, as a fraction of that
+feature's spread (std) across the call's windows; the only source of difference is
+the MFCC dB floor, which the timeline takes from the whole call.
+
+"ms / min" is the timeline cost per minute of audio and should stay flat as calls
+get longer. With --predict, voice_api.predict_timeline (VAD, resample, windows and
+one batched predict_proba) is timed as well; that needs a trained emotion model.
+
+Run from the backend folder:
+    python -m benchmarks.emotion_timeline --minutes 0.5 1 2 5 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.vad_savings import make_call
+from voice_features import extract_features_batch, extract_window_features, feature_columns
+
+SR = 22050
+
+
+def best_of(repeats: int, fn, *args, **kwargs):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main(args):
+    cols = feature_columns()
+    rng = np.random.default_rng(0)
+    predict_timeline = None
+    if args.predict:
+        from audio_io import WHISPER_SR
+        from voice_api import predict_timeline
+
+    print(f"window {args.window} s, hop {args.hop} s")
+    print(f"{'minutes':>8} {'windows':>8} {'timeline ms':>12} {'ms / min':>9} {'per-clip ms':>12} {'speedup':>8} {'max diff / spread':>18}"
+          + (f" {'predict ms':>11}" if args.predict else ""))
+    for minutes in args.minutes:
+        y, _ = make_call(rng, [], minutes * 60, args.speech_ratio, sr = SR)
+        timeline_ms, (starts, X) = best_of(args.repeats, extract_window_features, y, SR, args.window, args.hop)
+
+        # THE SAME WINDOWS CUT OUT AS CLIPS (ONE BATCHED CALL, EVERY SAMPLE EXTRACTED ONCE PER WINDOW COVERING IT)
+        offsets = np.rint(starts * SR).astype(int)
+        clips = [y[offset:offset + int(SR * args.window)] for offset in offsets]
+        clip_ms, R = best_of(args.repeats, extract_features_batch, clips, SR, max_duration = args.window)
+
+        diff = np.abs(X - R) / np.maximum(R.std(axis = 0), 1e-12)
+        worst = cols[int(diff.max(axis = 0).argmax())]
+        line = (f"{minutes:>8g} {len(starts):>8} {timeline_ms:>12.0f} {timeline_ms / minutes:>9.0f} {clip_ms:>12.0f} "
+                f"{clip_ms / timeline_ms:>7.2f}x {diff.max():>8.1e} ({worst})")
+        if predict_timeline is not None:
+            y16 = make_call(np.random.default_rng(1), [], minutes * 60, args.speech_ratio)[0]
+            predict_ms, _ = best_of(args.repeats, predict_timeline, y16, WHISPER_SR)
+            line += f" {predict_ms:>11.0f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Emotion timeline benchmark")
+    parser.add_argument("--minutes", type = float, nargs = "+", default = [0.5, 1, 2, 5, 10])
+    parser.add_argument("--window", type = float, default = 5.0)
+    parser.add_argument("--hop", type = float, default = 2.5)
+    parser.add_argument("--speech-ratio", type = float, default = 0.8)
+    parser.add_argument("--repeats", type = int, default = 3)
+    parser.add_argument("--predict", action = "store_true", help = "Also time voice_api.predict_timeline")
+    main(parser.parse_args())
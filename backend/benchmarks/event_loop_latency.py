@@ -0,0 +1,93 @@
+"""
+Latency of /supabase/active while emotion predictions are running.
+
+Compares /predict_audio/ (work on the emotion pool) with a copy of the old
+behaviour that ran the same work inline on the event loop. The database read
+is replaced with a fixed in-memory result so only event-loop stalls show up.
+
+Run from the backend folder:
+    python -m benchmarks.event_loop_latency --predictions 16 --seconds 4
+"""
+import argparse
+import asyncio
+import io
+import time
+
+import httpx
+import numpy as np
+import soundfile as sf
+from fastapi import FastAPI, UploadFile, File
+
+import supabase_api
+import voice_api
+
+
+def synthetic_wav(seconds: float, sr: int = 16000) -> bytes:
+    t = np.arange(int(seconds * sr)) / sr
+    y = 0.1 * np.sin(2 * np.pi * 180 * t) + 0.01 * np.random.default_rng(0).standard_normal(t.size)
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV")
+    return buf.getvalue()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(voice_api.router)
+    app.include_router(supabase_api.router)
+
+    # OLD BEHAVIOUR: CPU WORK DIRECTLY INSIDE THE async ENDPOINT
+    @app.post("/blocking_predict/")
+    async def blocking_predict(audio: UploadFile = File(...)):
+        return voice_api.predict_bytes(await audio.read())
+
+    return app
+
+
+async def measure(client, path: str, wav: bytes, n_predictions: int, seconds: float):
+    read_ms = []
+    stop = asyncio.Event()
+
+    async def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.get("/supabase/active")
+            read_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+    async def predictor():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            await client.post(path, files = {"audio": ("call.wav", wav, "audio/wav")})
+
+    reading = asyncio.create_task(reader())
+    await asyncio.gather(*(predictor() for _ in range(n_predictions)))
+    stop.set()
+    await reading
+    return np.array(read_ms)
+
+
+async def main(args):
+    # FIXED ROWS INSTEAD OF A DATABASE ROUND TRIP
+    async def fixed_records(pool, is_active):
+        return [{"id": 1, "is_active": is_active}]
+
+    supabase_api.pool = object()
+    supabase_api.records_by_active = fixed_records
+    # ONE WAV IS POSTED OVER AND OVER, SO CACHED RESULTS WOULD MEASURE THE CACHE, NOT THE PREDICTION
+    voice_api.emotion_cache = None
+
+    wav = synthetic_wav(args.clip_seconds)
+    transport = httpx.ASGITransport(app = build_app())
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench", timeout = None) as client:
+        for name, path in [("inline (old)", "/blocking_predict/"), ("worker pool", "/predict_audio/")]:
+            lat = await measure(client, path, wav, args.predictions, args.seconds)
+            print(f"{name:>14}: /supabase/active p50 {np.percentile(lat, 50):8.1f} ms  "
+                  f"p99 {np.percentile(lat, 99):8.1f} ms  max {lat.max():8.1f} ms  ({lat.size} reads)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Event loop latency under emotion predictions")
+    parser.add_argument("--predictions", type = int, default = 8, help = "Concurrent prediction clients")
+    parser.add_argument("--seconds", type = float, default = 4.0)
+    parser.add_argument("--clip-seconds", type = float, default = 5.0)
+    asyncio.run(main(parser.parse_args()))
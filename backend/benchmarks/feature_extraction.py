@@ -0,0 +1,104 @@
+"""
+Per-clip cost of voice_features.extract_features_batch against the original
+one-clip-at-a-time extractor (kept below as legacy_features), with a parity check.
+
+Run from the backend folder:
+    python -m benchmarks.feature_extraction --clips 200
+    python -m benchmarks.feature_extraction --data-dir processed
+"""
+import argparse
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+from voice_features import extract_features_batch, feature_columns, load_waveforms
+
+
+# ORIGINAL IMPLEMENTATION (ONE STFT PER librosa CALL, DICT BUILT KEY BY KEY)
+def legacy_features(y, sr=22050, n_mfcc=20, fmin=50, fmax=600, max_duration=5.0):
+    y = y[:int(sr * max_duration)]
+    features = {}
+
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    mfcc_mean = mfcc.mean(axis=1)
+    mfcc_std = mfcc.std(axis=1)
+    for i in range(n_mfcc):
+        features[f"mfcc_mean_{i+1}"] = float(mfcc_mean[i])
+        features[f"mfcc_std_{i+1}"] = float(mfcc_std[i])
+
+    rms = librosa.feature.rms(y=y)[0]
+    features["rms_mean"] = float(rms.mean())
+    features["rms_std"] = float(rms.std())
+    features["rms_max"] = float(rms.max())
+    features["rms_range"] = float(rms.max() - rms.min())
+
+    f0 = librosa.yin(y, fmin=fmin, fmax=fmax, sr=sr)
+    voiced_f0 = f0[~np.isnan(f0)]
+    if voiced_f0.size > 0:
+        features["pitch_mean"] = float(voiced_f0.mean())
+        features["pitch_std"] = float(voiced_f0.std())
+        features["pitch_min"] = float(voiced_f0.min())
+        features["pitch_max"] = float(voiced_f0.max())
+        features["pitch_25"] = float(np.percentile(voiced_f0, 25))
+        features["pitch_75"] = float(np.percentile(voiced_f0, 75))
+        features["pitch_range"] = float(voiced_f0.max() - voiced_f0.min())
+        features["pitch_voiced_ratio"] = float(voiced_f0.size / f0.size)
+    else:
+        for name in ["mean", "std", "min", "max", "25", "75", "range", "voiced_ratio"]:
+            features[f"pitch_{name}"] = 0.0
+
+    spec_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    spec_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+    features["spec_centroid_mean"] = float(spec_centroid.mean())
+    features["spec_centroid_std"] = float(spec_centroid.std())
+    features["spec_bandwidth_mean"] = float(spec_bandwidth.mean())
+    features["spec_bandwidth_std"] = float(spec_bandwidth.std())
+    features["spec_rolloff_mean"] = float(librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)[0].mean())
+    features["spec_flatness_mean"] = float(librosa.feature.spectral_flatness(y=y)[0].mean())
+    return features
+
+
+def synthetic_clips(n, sr, seed=0):
+    # VOICED-LIKE HARMONIC TONES WITH VIBRATO + NOISE, 2-7 s LONG
+    rng = np.random.default_rng(seed)
+    clips = []
+    for _ in range(n):
+        t = np.arange(int(sr * rng.uniform(2.0, 7.0))) / sr
+        f0 = rng.uniform(100, 300) * (1 + 0.05 * np.sin(2 * np.pi * 5 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sr
+        y = sum(np.sin(h * phase) / h for h in range(1, 6)) + 0.05 * rng.standard_normal(t.size)
+        clips.append((0.1 * y).astype(np.float32))
+    return clips
+
+
+def main(args):
+    sr = 22050
+    if args.data_dir:
+        clips = load_waveforms(sorted(Path(args.data_dir).glob("*.wav"))[:args.clips], sr)
+    else:
+        clips = synthetic_clips(args.clips, sr)
+    cols = feature_columns()
+
+    start = time.perf_counter()
+    legacy = np.array([[row[c] for c in cols] for row in (legacy_features(y, sr) for y in clips)])
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = extract_features_batch(clips, sr, n_jobs=args.jobs)
+    batch_s = time.perf_counter() - start
+
+    rel = np.abs(batch - legacy) / np.maximum(np.abs(legacy), 1e-6)
+    print(f"clips: {len(clips)}")
+    print(f"legacy:  {1000 * legacy_s / len(clips):8.2f} ms/clip")
+    print(f"batched: {1000 * batch_s / len(clips):8.2f} ms/clip  ({legacy_s / batch_s:.2f}x, n_jobs={args.jobs})")
+    print(f"max relative difference: {rel.max():.2e} ({cols[int(rel.max(axis=0).argmax())]})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Feature extraction benchmark")
+    parser.add_argument("--clips", type = int, default = 200)
+    parser.add_argument("--data-dir", default = None)
+    parser.add_argument("--jobs", type = int, default = 1)
+    main(parser.parse_args())
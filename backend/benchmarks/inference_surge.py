@@ -0,0 +1,82 @@
+"""
+Surge behaviour of InferenceScheduler against an unbounded thread pool.
+
+A CPU-bound stand-in model (NumPy matmuls) receives a burst of requests. The
+bounded scheduler rejects the overflow with SchedulerFull (503 + Retry-After
+at the API), so admitted requests keep a bounded latency; the unbounded pool
+accepts everything and every request slows down together.
+
+Run from the backend folder:
+    python -m benchmarks.inference_surge --burst 64 --workers 2 --queue 8
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference_pool import InferenceScheduler, SchedulerFull
+
+
+def fake_model(size: int):
+    a = np.random.default_rng(0).standard_normal((size, size))
+    for _ in range(4):
+        a = a @ a
+        a /= np.abs(a).max()
+    return float(a[0, 0])
+
+
+async def bounded(args):
+    pool = InferenceScheduler("bench", args.workers, args.queue, args.mode)
+    latencies, rejected = [], 0
+
+    async def one():
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            await pool.submit(fake_model, args.size)
+            latencies.append(time.perf_counter() - start)
+        except SchedulerFull:
+            rejected += 1
+
+    await asyncio.gather(*(one() for _ in range(args.burst)))
+    print("bounded scheduler:", pool.stats())
+    pool.shutdown()
+    return latencies, rejected
+
+
+async def unbounded(args):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers = args.burst)
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await loop.run_in_executor(executor, fake_model, args.size)
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(args.burst)))
+    executor.shutdown()
+    return latencies, 0
+
+
+def report(name, latencies, rejected):
+    lat = np.array(latencies) * 1000
+    print(f"{name:>10}: served {len(lat):>4}  rejected {rejected:>4}  "
+          f"p50 {np.percentile(lat, 50):8.1f} ms  p99 {np.percentile(lat, 99):8.1f} ms")
+
+
+async def main(args):
+    report("bounded", *await bounded(args))
+    report("unbounded", *await unbounded(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Inference surge benchmark")
+    parser.add_argument("--burst", type = int, default = 64)
+    parser.add_argument("--workers", type = int, default = 2)
+    parser.add_argument("--queue", type = int, default = 8)
+    parser.add_argument("--mode", choices = ["thread", "process"], default = "thread")
+    parser.add_argument("--size", type = int, default = 400)
+    asyncio.run(main(parser.parse_args()))
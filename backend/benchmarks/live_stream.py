@@ -0,0 +1,70 @@
+"""
+Streams a recording to /agent/stream at real-time pace and reports how soon
+the first partial transcript and the first provisional severity arrive.
+
+Start the server first (uvicorn main:app), then from the backend folder:
+    python -m benchmarks.live_stream path/to/call.wav --url ws://127.0.0.1:8000/agent/stream
+
+--malformed-frame first sends an odd-length s16le frame and checks the server answers
+with an error message and keeps the call open.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from audio_io import WHISPER_SR, decode_audio_bytes
+
+
+async def main(args):
+    with open(args.file, "rb") as f:
+        audio = decode_audio_bytes(f.read(), WHISPER_SR)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    frame = int(WHISPER_SR * args.frame_ms / 1000)
+
+    firsts = {}
+    async with websockets.connect(args.url) as ws:
+        start = time.perf_counter()
+
+        async def reader():
+            async for raw in ws:
+                message = json.loads(raw)
+                elapsed = time.perf_counter() - start
+                firsts.setdefault(message["type"], elapsed)
+                if message["type"] in ("triage", "final"):
+                    print(f"{elapsed:6.2f}s {message['type']:>7} severity={message['severity_score']} "
+                          f"event={message['triage_data'].get('event')}")
+                if message["type"] == "final":
+                    return
+
+        if args.malformed_frame:
+            await ws.send(b"\x00" * 3)
+            message = json.loads(await ws.recv())
+            assert message["type"] == "error", message
+            print("malformed frame:", message["detail"])
+
+        reading = asyncio.create_task(reader())
+        for i in range(0, len(pcm), frame):
+            await ws.send(pcm[i:i + frame].tobytes())
+            # PACE FRAMES AT REAL TIME LIKE A LIVE PHONE LINE
+            await asyncio.sleep(max(0.0, start + (i + frame) / WHISPER_SR / args.speed - time.perf_counter()))
+        await ws.send("end")
+        await reading
+
+    print(f"call length: {len(audio) / WHISPER_SR:.1f}s")
+    for kind, elapsed in firsts.items():
+        print(f"first {kind:>7}: {elapsed:6.2f}s after call start")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Live streaming latency benchmark")
+    parser.add_argument("file")
+    parser.add_argument("--url", default = "ws://127.0.0.1:8000/agent/stream")
+    parser.add_argument("--frame-ms", type = int, default = 100)
+    parser.add_argument("--speed", type = float, default = 1.0, help = "Playback speed multiplier")
+    parser.add_argument("--malformed-frame", action = "store_true", help = "Send an odd-length frame first and expect an error reply")
+    main_args = parser.parse_args()
+    asyncio.run(main(main_args))
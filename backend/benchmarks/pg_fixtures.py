@@ -0,0 +1,49 @@
+"""
+Shared helpers for benchmarks that need a disposable local Postgres.
+"""
+from pathlib import Path
+
+import psycopg
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def reset_schema(dsn: str):
+    # DROP AND RE-CREATE call_severities WITH EVERY MIGRATION APPLIED IN ORDER
+    with psycopg.connect(dsn, autocommit = True) as conn:
+        conn.execute("drop table if exists call_severities cascade")
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            conn.execute(path.read_text())
+
+
+def seed_calls(dsn: str, n_rows: int, active_ratio: float = 0.5):
+    # SYNTHETIC ROWS GENERATED SERVER-SIDE (1M ROWS TAKES SECONDS, NOT A MILLION ROUND TRIPS)
+    # TRANSCRIPTS MIX STREET NAMES AND SUSPECT DESCRIPTIONS OF DIFFERENT RARITY, SO SEARCHES RANGE FROM A FEW HITS TO MOST ROWS
+    with psycopg.connect(dsn, autocommit = True) as conn:
+        conn.execute(
+            """
+            insert into call_severities (created_at, emotional_sev, context_sev, transcript, key_details, is_active, emotions)
+            select
+                -- ONE CALL PER SECOND, ids IN TIME ORDER AS IN A LIVE TABLE
+                now() - ((%(n)s - g) || ' seconds')::interval,
+                round((1 + random() * 4)::numeric, 2),
+                round((random() * 5)::numeric, 2),
+                'caller reports a ' || (array['fire', 'shooting', 'robbery', 'medical emergency', 'traffic accident'])[1 + g %% 5]
+                    || ' at ' || (g %% 997) || ' ' || (array['maple', 'oak', 'cedar', 'elm', 'pine', 'birch', 'willow', 'spruce',
+                                                           'harbor', 'mission', 'valencia', 'lombard'])[1 + (g / 7) %% 12]
+                    || ' street, suspect wearing a ' || (array['red', 'black', 'grey', 'blue', 'green', 'white'])[1 + (g / 3) %% 6]
+                    || ' ' || (array['hoodie', 'jacket', 'cap', 'coat', 'vest'])[1 + (g / 11) %% 5]
+                    || case when g %% 500 = 0 then ', drove off in a yellow pickup truck' else '' end
+                    || ', ' || repeat('background detail ', 20),
+                json_build_object(
+                    'event', (array['fire', 'shooting', 'robbery', 'medical emergency', 'traffic accident'])[1 + g %% 5],
+                    'victims', 1 + g %% 4,
+                    'ongoing_threat', 'not ongoing'
+                ),
+                random() < %(active_ratio)s,
+                'normal_calm'
+            from generate_series(1, %(n)s) g
+            """,
+            {"n": n_rows, "active_ratio": active_ratio},
+        )
+        conn.execute("analyze call_severities")
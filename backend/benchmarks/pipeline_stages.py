@@ -0,0 +1,39 @@
+"""
+Per-stage latency of the direct triage pipeline, fully offline.
+
+Uses the real local Whisper model and the keyword stub in place of Mistral
+(TRIAGE_LLM=stub), with an optional simulated LLM latency.
+
+Run from the backend folder:
+    python -m benchmarks.pipeline_stages path/to/call1.wav path/to/call2.wav --repeats 5
+"""
+import argparse
+import os
+
+import numpy as np
+
+
+def main(args):
+    os.environ["TRIAGE_LLM"] = "stub"
+    os.environ["TRIAGE_STUB_LATENCY"] = str(args.llm_latency)
+    import agent_ranker
+
+    stages = {}
+    for _ in range(args.repeats):
+        for path in args.files:
+            result = agent_ranker.run_triage(path, "direct")
+            for stage, ms in result["timings"].items():
+                stages.setdefault(stage, []).append(ms)
+
+    print(f"{'stage':>14} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10}")
+    for stage, values in stages.items():
+        values = np.array(values)
+        print(f"{stage:>14} {np.percentile(values, 50):>10.1f} {np.percentile(values, 95):>10.1f} {values.mean():>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Direct pipeline stage timings")
+    parser.add_argument("files", nargs = "+")
+    parser.add_argument("--repeats", type = int, default = 3)
+    parser.add_argument("--llm-latency", type = float, default = 0.0)
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+"""
+Sizing aid for the result cache: hit rate against memory tier size for a
+skewed resubmission pattern, plus lookup cost of the memory and SQLite tiers.
+
+Recording popularity follows a Zipf distribution (a few recordings are
+resubmitted many times, most only once). The values are result-sized JSON dicts.
+
+Run from the backend folder:
+    python -m benchmarks.result_cache --requests 20000 --recordings 5000 --sizes 64 256 1024 4096
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from result_cache import ResultCache
+
+
+def fake_result(i: int) -> dict:
+    return {
+        "transcript": f"caller reports an incident on street {i} " * 8,
+        "triage_data": {"event": "fire", "victims": i % 4, "injuries": "none", "weapon": "none", "ongoing_threat": "not ongoing"},
+        "severity_score": 2.4,
+        "mode": "direct",
+    }
+
+
+def replay(cache: ResultCache, requests: np.ndarray) -> tuple[float, float]:
+    get_s = put_s = 0.0
+    for recording in requests:
+        key = f"{recording:064x}:bench"
+        start = time.perf_counter()
+        hit = cache.get(key)
+        get_s += time.perf_counter() - start
+        if hit is None:
+            start = time.perf_counter()
+            cache.put(key, fake_result(int(recording)))
+            put_s += time.perf_counter() - start
+    return get_s, put_s
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    requests = rng.zipf(args.zipf, args.requests) % args.recordings
+    print(f"{args.requests} requests over {len(np.unique(requests))} distinct recordings")
+    print(f"{'tier':>8} {'items':>6} {'hit rate':>9} {'get us':>8} {'put us':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for tier, path in [("memory", None), ("sqlite", str(Path(tmp) / f"cache-{size}.sqlite"))]:
+                # THE SQLITE RUN KEEPS ONLY 16 ITEMS IN MEMORY SO MOST HITS COME FROM DISK
+                cache = ResultCache("bench", size if path is None else 16, path, max_bytes = size * 2048)
+                get_s, put_s = replay(cache, requests)
+                stats = cache.stats()
+                print(f"{tier:>8} {size:>6} {stats['hit_rate']:>9.3f} "
+                      f"{1e6 * get_s / args.requests:>8.1f} {1e6 * put_s / max(1, stats['misses']):>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Result cache sizing benchmark")
+    parser.add_argument("--requests", type = int, default = 20000)
+    parser.add_argument("--recordings", type = int, default = 5000)
+    parser.add_argument("--zipf", type = float, default = 1.3, help = "Zipf exponent of resubmissions")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [64, 256, 1024, 4096])
+    main(parser.parse_args())
@@ -0,0 +1,151 @@
+"""
+Memory and cold start of N workers: `uvicorn main:app --workers N` (every worker
+imports the app and loads its own models) against `python serve.py --workers N`
+(models loaded once in the parent, workers forked from it).
+
+Each server is started on its own, then GET /ready is polled on fresh connections
+until N distinct worker pids have answered 200. Then the whole process tree is
+measured from /proc/<pid>/smaps_rollup: RSS counts shared pages once per process,
+so it overstates forked workers; PSS splits each shared page between the
+processes mapping it, so summed PSS is the real footprint. USS is the memory
+private to each process. With --requests, some calls are sent to
+/agent/generate_json/ and /predict_audio/ before measuring again, to check the
+shared pages survive traffic (copy-on-write only copies the pages a worker writes).
+
+TRIAGE_LLM=stub is set, so no Mistral key is needed. Whisper uses WHISPER_BACKEND /
+WHISPER_MODEL from the environment, and the emotion model must be trained.
+
+Run from the backend folder:
+    python -m benchmarks.serving_memory --workers 4 --requests 8
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.load_test import make_corpus
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def process_tree(root: int) -> list[int]:
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        try:
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            pass
+    return pids
+
+
+def smaps(pid: int) -> dict:
+    # kB FIELDS OF /proc/<pid>/smaps_rollup
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except FileNotFoundError:
+        pass
+    return fields
+
+
+def measure(root: int) -> dict:
+    # MiB SUMMED OVER THE TREE (THE uvicorn SUPERVISOR OR serve.py PARENT INCLUDED, IT IS PART OF THE DEPLOYMENT)
+    totals = {"rss": 0.0, "pss": 0.0, "uss": 0.0, "processes": 0}
+    for pid in process_tree(root):
+        fields = smaps(pid)
+        if not fields:
+            continue
+        totals["processes"] += 1
+        totals["rss"] += fields["Rss"] / 1024
+        totals["pss"] += fields["Pss"] / 1024
+        totals["uss"] += (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024
+    return totals
+
+
+def wait_ready(base_url: str, workers: int, server: subprocess.Popen, timeout: float) -> float:
+    start = time.perf_counter()
+    seen = set()
+    # NO KEEP-ALIVE: EVERY PROBE IS A NEW CONNECTION, SO ACCEPTS SPREAD OVER THE WORKERS
+    with httpx.Client(base_url = base_url, timeout = 5.0, limits = httpx.Limits(max_keepalive_connections = 0)) as client:
+        while len(seen) < workers:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"{len(seen)} of {workers} workers ready after {timeout:.0f} s")
+            try:
+                res = client.get("/ready")
+                if res.status_code == 200:
+                    seen.add(res.json()["pid"])
+                    continue
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+    return time.perf_counter() - start
+
+
+def send_calls(base_url: str, n: int):
+    corpus = make_corpus(4, 10.0)
+    with httpx.Client(base_url = base_url, timeout = 300.0, limits = httpx.Limits(max_keepalive_connections = 0)) as client:
+        for i in range(n):
+            audio = {"audio": (f"call-{i}.wav", corpus[i % len(corpus)], "audio/wav")}
+            client.post("/agent/generate_json/", files = audio).raise_for_status()
+            client.post("/predict_audio/", files = audio).raise_for_status()
+
+
+def run(label: str, cmd: list[str], args) -> dict:
+    env = dict(os.environ, TRIAGE_LLM = "stub", RESULT_CACHE_ITEMS = "0")
+    server = subprocess.Popen(cmd, cwd = BACKEND_DIR, env = env, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        ready_s = wait_ready(base_url, args.workers, server, args.timeout)
+        time.sleep(1)
+        result = {"server": label, "ready_s": ready_s, "idle": measure(server.pid)}
+        if args.requests:
+            send_calls(base_url, args.requests)
+            result["after_calls"] = measure(server.pid)
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout = 30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main(args):
+    port = str(args.port)
+    commands = {
+        "uvicorn": [sys.executable, "-m", "uvicorn", "main:app", "--port", port, "--workers", str(args.workers), "--log-level", "warning"],
+        "serve.py": [sys.executable, "serve.py", "--port", port, "--workers", str(args.workers), "--log-level", "warning"],
+    }
+    print(f"{args.workers} workers")
+    print(f"{'server':>10} {'phase':>12} {'ready s':>8} {'procs':>6} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9}")
+    for label in args.servers:
+        result = run(label, commands[label], args)
+        for phase in ("idle", "after_calls"):
+            if phase in result:
+                m = result[phase]
+                print(f"{label:>10} {phase:>12} {result['ready_s']:>8.1f} {m['processes']:>6} "
+                      f"{m['rss']:>9.0f} {m['pss']:>9.0f} {m['uss']:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Multi-worker serving memory benchmark")
+    parser.add_argument("--workers", type = int, default = 4)
+    parser.add_argument("--requests", type = int, default = 0, help = "Calls sent before measuring again")
+    parser.add_argument("--servers", nargs = "+", choices = ["uvicorn", "serve.py"], default = ["uvicorn", "serve.py"])
+    parser.add_argument("--port", type = int, default = 8766)
+    parser.add_argument("--timeout", type = float, default = 900.0, help = "Seconds for every worker to become ready")
+    main(parser.parse_args())
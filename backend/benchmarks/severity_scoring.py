@@ -0,0 +1,72 @@
+"""
+Per-record severity scoring (one rules.score call per triage record, as the
+request path does) against batch scoring (rules.score_batch / score_columns,
+as rescore.py does) on synthetic triage records.
+
+A share of the records carry labels outside the rule table, which score with
+the fallback ranks instead of raising. Throughput is reported in records per
+second; batch and per-record scores are checked to be identical.
+
+Run from the backend folder:
+    python -m benchmarks.severity_scoring --records 1000000 --unknown 0.02
+"""
+import argparse
+import time
+
+import numpy as np
+
+import severity
+
+
+def make_records(rng, rules: severity.SeverityRules, n: int, unknown: float) -> list[dict]:
+    labels = {field: list(rules.table["ranks"][field]) for field in severity.LABEL_FIELDS}
+    picks = {field: rng.integers(len(labels[field]), size=n) for field in severity.LABEL_FIELDS}
+    odd = rng.random(n) < unknown
+    victims = rng.integers(0, 15, size=n)
+    ongoing = rng.random(n) < 0.3
+    return [
+        {
+            "event": "unlisted event" if odd[i] else labels["event"][picks["event"][i]],
+            "victims": int(victims[i]),
+            "weapon": labels["weapon"][picks["weapon"][i]],
+            "injuries": labels["injuries"][picks["injuries"][i]],
+            "ongoing_threat": "suspect still on scene" if ongoing[i] else "not ongoing",
+        }
+        for i in range(n)
+    ]
+
+
+def main(args):
+    rules = severity.load_rules(args.rules)
+    records = make_records(np.random.default_rng(0), rules, args.records, args.unknown)
+    print(f"{len(records)} records, rule table {rules.version}")
+
+    sample = records[:args.per_record]
+    start = time.perf_counter()
+    single = np.array([rules.score(record) for record in sample])
+    single_rate = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch = np.concatenate([rules.score_batch(records[i:i + args.batch]) for i in range(0, len(records), args.batch)])
+    batch_rate = len(records) / (time.perf_counter() - start)
+
+    columns = [[r[k] for r in records] for k in ("event", "victims", "weapon", "injuries", "ongoing_threat")]
+    start = time.perf_counter()
+    rules.score_columns(*columns)
+    column_rate = len(records) / (time.perf_counter() - start)
+
+    print(f"{'per record':>12} {single_rate:>12,.0f} records/s")
+    print(f"{'score_batch':>12} {batch_rate:>12,.0f} records/s ({batch_rate / single_rate:.0f}x, batches of {args.batch})")
+    print(f"{'columns':>12} {column_rate:>12,.0f} records/s ({column_rate / single_rate:.0f}x)")
+    print(f"identical to per-record scores: {np.array_equal(single, batch[:len(sample)])}")
+    print(f"fallback-ranked labels: {sum(rules.unknown.values())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Severity scoring throughput benchmark")
+    parser.add_argument("--records", type = int, default = 1000000)
+    parser.add_argument("--per-record", type = int, default = 50000, help = "Records timed through the per-record path")
+    parser.add_argument("--batch", type = int, default = 5000, help = "Batch size, as rescore.py --batch")
+    parser.add_argument("--unknown", type = float, default = 0.02, help = "Share of records with an unlisted event label")
+    parser.add_argument("--rules", default = severity.SEVERITY_RULES)
+    main(parser.parse_args())
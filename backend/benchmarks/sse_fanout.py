@@ -0,0 +1,75 @@
+"""
+Fan-out cost of the in-process call event broadcaster.
+
+Connects N subscribers (each a task draining its buffer like the SSE endpoint
+does), publishes a stream of call deltas, and reports publish cost per event,
+delivery latency and how many slow clients were told to resync.
+
+Run from the backend folder:
+    python -m benchmarks.sse_fanout --subscribers 5000 --events 200
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import numpy as np
+
+from call_events import CallBroadcaster
+
+
+async def main(args):
+    tracemalloc.start()
+    broadcaster = CallBroadcaster(args.buffer)
+    latencies, resyncs = [], 0
+    done = asyncio.Event()
+    received = 0
+    total = args.subscribers * args.events
+
+    async def client(slow: bool):
+        nonlocal received, resyncs
+        subscriber = broadcaster.subscribe()
+        while not done.is_set():
+            batch = await subscriber.next_batch(1.0)
+            now = time.perf_counter()
+            for event in batch:
+                if event == '{"type": "resync"}':
+                    resyncs += 1
+                    continue
+                latencies.append(now - float(event.split('"sent": ')[1].rstrip("}")))
+                received += 1
+            if slow:
+                await asyncio.sleep(0.05)
+
+    base = tracemalloc.take_snapshot()
+    clients = [asyncio.create_task(client(i < args.slow)) for i in range(args.subscribers)]
+    await asyncio.sleep(0.1)
+    per_sub_kib = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, "filename")) / args.subscribers / 1024
+
+    publish_s = 0.0
+    for i in range(args.events):
+        start = time.perf_counter()
+        broadcaster.publish(f'{{"type": "severity", "call": {{"id": {i}}}, "sent": {time.perf_counter()}}}')
+        publish_s += time.perf_counter() - start
+        await asyncio.sleep(args.interval)
+
+    await asyncio.sleep(0.5)
+    done.set()
+    await asyncio.gather(*clients)
+
+    lat = np.array(latencies) * 1000
+    print(f"subscribers: {args.subscribers} ({args.slow} slow), events: {args.events}")
+    print(f"memory per idle subscriber: {per_sub_kib:.2f} KiB")
+    print(f"publish: {1e6 * publish_s / args.events:.0f} us/event ({1e9 * publish_s / total:.0f} ns per delivery)")
+    print(f"delivered {received}/{total}, resyncs {resyncs}")
+    print(f"delivery latency p50 {np.percentile(lat, 50):.2f} ms, p99 {np.percentile(lat, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "SSE fan-out benchmark")
+    parser.add_argument("--subscribers", type = int, default = 5000)
+    parser.add_argument("--events", type = int, default = 200)
+    parser.add_argument("--slow", type = int, default = 50, help = "Subscribers that drain slowly")
+    parser.add_argument("--buffer", type = int, default = 64)
+    parser.add_argument("--interval", type = float, default = 0.001, help = "Seconds between events")
+    asyncio.run(main(parser.parse_args()))
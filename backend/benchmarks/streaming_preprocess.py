@@ -0,0 +1,111 @@
+"""
+Batch audio_preprocessing.pipeline against the block-based stream_file on long
+recordings: peak RSS, throughput and output agreement.
+
+Each mode runs in a fresh process so its peak RSS is its own, and writes its
+output to a float WAV; the outputs are then compared block by block (SNR of the
+streaming output against the batch output, and the largest sample difference).
+The streaming pipeline follows noisereduce's 600000-sample chunk grid, so the SNR
+should stay high however long the call is; the run fails if it drops below --min-snr.
+
+Without input files a synthetic call (speech bursts over line noise, 44.1 kHz
+stereo, written in blocks) of --minutes length is generated.
+
+Run from the backend folder:
+    python -m benchmarks.streaming_preprocess --minutes 60
+    python -m benchmarks.streaming_preprocess recordings/*.wav --modes stream
+"""
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.vad_savings import make_call
+
+
+def synthetic_file(path: Path, minutes: float, sr: int = 44100):
+    # ONE MINUTE AT A TIME SO GENERATING AN HOUR NEVER HOLDS IT IN MEMORY
+    rng = np.random.default_rng(0)
+    with sf.SoundFile(path, "w", sr, 2, subtype="PCM_16") as f:
+        for _ in range(int(np.ceil(minutes))):
+            y, _ = make_call(rng, [], 60.0, 0.3, sr)
+            f.write(np.stack([y, 0.8 * y], axis=1) * 0.5)
+
+
+def run(mode: str, in_path: str, out_path: str) -> dict:
+    import audio_preprocessing
+
+    start = time.perf_counter()
+    if mode == "batch":
+        y, sr = audio_preprocessing.pipeline(in_path)
+        sf.write(out_path, y, sr, subtype = "FLOAT")
+        samples = len(y)
+    else:
+        samples = 0
+        with sf.SoundFile(out_path, "w", audio_preprocessing.TARGET_SR, 1, subtype = "FLOAT") as f:
+            for block in audio_preprocessing.stream_file(in_path):
+                f.write(block)
+                samples += len(block)
+    return {
+        "seconds": time.perf_counter() - start,
+        "audio_s": samples / audio_preprocessing.TARGET_SR,
+        # WHOLE-PROCESS PEAK (IMPORTS INCLUDED, THE SAME FOR BOTH MODES); ru_maxrss IS KiB ON LINUX
+        "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(reference: str, candidate: str, block: int = 1 << 20) -> tuple[float, float, int]:
+    signal = noise = worst = 0.0
+    with sf.SoundFile(reference) as a, sf.SoundFile(candidate) as b:
+        lengths = (a.frames, b.frames)
+        for x, y in zip(a.blocks(block, dtype = "float64"), b.blocks(block, dtype = "float64")):
+            n = min(len(x), len(y))
+            d = x[:n] - y[:n]
+            signal += np.sum(x[:n] ** 2)
+            noise += np.sum(d ** 2)
+            worst = max(worst, float(np.abs(d).max(initial = 0.0)))
+    snr = 10 * np.log10(signal / noise) if noise else float("inf")
+    return snr, worst, lengths[0] - lengths[1]
+
+
+def main(args):
+    with tempfile.TemporaryDirectory(prefix = "stream-bench-") as tmp:
+        bench(args, Path(tmp))
+
+
+def bench(args, tmp: Path):
+    files = args.files
+    if not files:
+        path = tmp / "synthetic.wav"
+        synthetic_file(path, args.minutes)
+        files = [str(path)]
+
+    # spawn: NO AUDIO OR ALLOCATOR STATE INHERITED FROM THIS PROCESS
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'file':>24} {'mode':>7} {'audio min':>10} {'seconds':>8} {'x real':>7} {'peak RSS':>9} (MiB)")
+    for in_path in files:
+        outputs = {}
+        for mode in args.modes:
+            outputs[mode] = str(tmp / f"{Path(in_path).stem}-{mode}.wav")
+            with ctx.Pool(1) as pool:
+                result = pool.apply(run, (mode, in_path, outputs[mode]))
+            print(f"{Path(in_path).name[-24:]:>24} {mode:>7} {result['audio_s'] / 60:>10.1f} {result['seconds']:>8.1f} "
+                  f"{result['audio_s'] / result['seconds']:>7.0f} {result['rss_mib']:>9.0f}")
+        if len(outputs) == 2:
+            snr, worst, length_diff = compare(outputs["batch"], outputs["stream"])
+            print(f"{'':>24} stream vs batch: SNR {snr:.1f} dB, max |diff| {worst:.2e}, length diff {length_diff}")
+            assert snr >= args.min_snr and length_diff == 0, f"{in_path}: streamed output diverges from the batch pipeline"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Streaming vs batch preprocessing benchmark")
+    parser.add_argument("files", nargs = "*", help = "Recordings to process (default: one synthetic call)")
+    parser.add_argument("--minutes", type = float, default = 60.0, help = "Length of the synthetic call")
+    parser.add_argument("--modes", nargs = "+", choices = ["batch", "stream"], default = ["batch", "stream"])
+    parser.add_argument("--min-snr", type = float, default = 80.0, help = "Smallest acceptable stream vs batch SNR (dB)")
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Overhead of the telemetry spans (telemetry.py) on the local analysis pipeline.
+
+Each iteration runs what /analyze/ runs on a synthetic call, minus Whisper and
+Mistral: audio.vad, audio.resample, features.extract and model.emotion through
+voice_api.predict_waveform, then the direct triage path (stub LLM on a fixed
+transcript, rule-table severity). Iterations alternate between telemetry off,
+on, and on with Chrome tracing, so drift hits all three alike. The spans are the
+same ones the server records; Whisper and LLM spans wrap much longer calls, so
+the relative overhead there is smaller still.
+
+Needs a trained emotion model (python voice_model.py). Run from the backend folder:
+    python -m benchmarks.telemetry_overhead --iterations 60
+"""
+import argparse
+import time
+
+import numpy as np
+
+import telemetry
+import agent_ranker
+import voice_api
+from audio_io import WHISPER_SR
+from stub_llm import StubTriageLLM
+from benchmarks.vad_savings import make_call
+
+TRANSCRIPT = "There's a fire in the kitchen and my neighbour is burned, please hurry, the smoke is still here"
+
+
+def run_once(y: np.ndarray):
+    voice_api.predict_waveform(y, WHISPER_SR)
+    triage = agent_ranker.extract_triage(TRANSCRIPT)
+    agent_ranker.calculate_severity(triage)
+
+
+def main(args):
+    agent_ranker.extractor = StubTriageLLM().with_structured_output(agent_ranker.TriageJSON)
+    rng = np.random.default_rng(0)
+    y, _ = make_call(rng, [], args.call_seconds, 0.4)
+    run_once(y)
+
+    configs = {"off": (False, False), "spans": (True, False), "spans+trace": (True, True)}
+    times = {name: [] for name in configs}
+    spans_per_run = 0
+    for _ in range(args.iterations):
+        for name, (enabled, trace) in configs.items():
+            telemetry.enabled, telemetry.trace_enabled = enabled, trace
+            before = sum(count for _, _, count in telemetry.stage_seconds.snapshot().values())
+            start = time.perf_counter()
+            run_once(y)
+            times[name].append(time.perf_counter() - start)
+            if name == "spans":
+                spans_per_run = sum(count for _, _, count in telemetry.stage_seconds.snapshot().values()) - before
+
+    base = np.median(times["off"])
+    print(f"{args.call_seconds:.0f}s call, {spans_per_run} spans per run, {args.iterations} iterations")
+    print(f"{'config':>12} {'median ms':>10} {'overhead':>9}")
+    for name, values in times.items():
+        median = np.median(values)
+        print(f"{name:>12} {1000 * median:>10.2f} {100 * (median - base) / base:>8.2f}%")
+
+    # MICRO: COST OF ONE EMPTY SPAN, SO THE MEDIANS ABOVE CAN BE SANITY-CHECKED AGAINST NOISE
+    for trace in (False, True):
+        telemetry.enabled, telemetry.trace_enabled = True, trace
+        start = time.perf_counter()
+        for _ in range(100000):
+            with telemetry.span("bench.empty"):
+                pass
+        print(f"empty span{' + trace' if trace else ''}: {(time.perf_counter() - start) * 10:.2f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Telemetry overhead benchmark")
+    parser.add_argument("--iterations", type = int, default = 60)
+    parser.add_argument("--call-seconds", type = float, default = 30.0)
+    main(parser.parse_args())
@@ -0,0 +1,84 @@
+"""
+Real-time factor, load time and peak RSS of the transcription backends on a fixed
+set of local clips.
+
+Each configuration runs in a fresh process so its memory is measured on its own.
+RTF is processing time divided by audio duration (below 1.0 is faster than real
+time). Transcripts are compared word by word against the first configuration.
+
+Run from the backend folder (faster-whisper must be installed for "faster" configs):
+    python -m benchmarks.transcription_backends clips/*.wav --configs openai:tiny openai:base faster:base:int8
+"""
+import argparse
+import difflib
+import multiprocessing
+import resource
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_io import WHISPER_SR, decode_audio_bytes
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss IS KiB ON LINUX
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(spec: str, clips: list[np.ndarray], threads: int) -> dict:
+    from transcription import OpenAIWhisper, FasterWhisper
+
+    name, model_size, *rest = spec.split(":")
+    baseline = peak_rss_mib()
+    start = time.perf_counter()
+    if name == "openai":
+        model = OpenAIWhisper(model_size)
+    else:
+        model = FasterWhisper(model_size, rest[0] if rest else "int8", threads)
+    load_s = time.perf_counter() - start
+    # FIRST DECODE INCLUDES ONE-OFF SETUP, KEEP IT OUT OF THE RTF
+    model.transcribe(clips[0])
+
+    rtf, texts = [], []
+    for clip in clips:
+        start = time.perf_counter()
+        texts.append(model.transcribe(clip)["text"].strip())
+        rtf.append((time.perf_counter() - start) / (len(clip) / WHISPER_SR))
+    return {
+        "load_s": load_s,
+        "rtf": np.array(rtf),
+        "rss_mib": peak_rss_mib() - baseline,
+        "texts": texts,
+    }
+
+
+def agreement(a: list[str], b: list[str]) -> float:
+    ratios = [difflib.SequenceMatcher(None, x.lower().split(), y.lower().split()).ratio() for x, y in zip(a, b)]
+    return float(np.mean(ratios))
+
+
+def main(args):
+    clips = [decode_audio_bytes(Path(path).read_bytes()) for path in args.files]
+    audio_s = sum(len(clip) for clip in clips) / WHISPER_SR
+    print(f"{len(clips)} clips, {audio_s:.1f}s of audio")
+
+    # spawn: NO MODEL OR ALLOCATOR STATE INHERITED FROM THIS PROCESS
+    ctx = multiprocessing.get_context("spawn")
+    reference = None
+    print(f"{'config':>20} {'load s':>8} {'RTF p50':>8} {'RTF p95':>8} {'RSS MiB':>8} {'agree':>6}")
+    for spec in args.configs:
+        with ctx.Pool(1) as pool:
+            result = pool.apply(measure, (spec, clips, args.threads))
+        reference = reference or result["texts"]
+        print(f"{spec:>20} {result['load_s']:>8.2f} {np.percentile(result['rtf'], 50):>8.3f} "
+              f"{np.percentile(result['rtf'], 95):>8.3f} {result['rss_mib']:>8.0f} {agreement(reference, result['texts']):>6.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Transcription backend benchmark")
+    parser.add_argument("files", nargs = "+")
+    parser.add_argument("--configs", nargs = "+", default = ["openai:base", "faster:base:int8"],
+                        help = "backend:model[:compute_type], e.g. openai:tiny or faster:small:int8")
+    parser.add_argument("--threads", type = int, default = 0, help = "CPU threads for faster-whisper (0 = default)")
+    main(parser.parse_args())
@@ -0,0 +1,109 @@
+"""
+Compute saved by the VAD stage (audio_preprocessing.detect_speech) on
+silence-heavy calls.
+
+Each synthetic call is mostly hold time: line noise, mains hum and silence,
+with short bursts of speech. The speech comes from the given clips (e.g.
+processed RAVDESS files) or, without clips, from a voiced harmonic stand-in.
+The benchmark reports how much audio the VAD keeps, how much true speech it
+catches, what the VAD costs, and the time spent on feature extraction over
+the whole call with and without it. With --whisper it also times transcription.
+
+Run from the backend folder:
+    python -m benchmarks.vad_savings --calls 10 --call-seconds 120
+    python -m benchmarks.vad_savings processed/*.wav --whisper
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_io import WHISPER_SR, decode_audio_bytes
+from audio_preprocessing import detect_speech, speech_only
+from voice_features import extract_features_batch
+
+
+def synthetic_speech(rng, seconds: float, sr: int) -> np.ndarray:
+    # HARMONIC "VOICE" WITH A WANDERING PITCH AND SYLLABLE-RATE AMPLITUDE MODULATION
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, 6))
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    return (0.15 * voice * envelope).astype(np.float32)
+
+
+def make_call(rng, clips, seconds: float, speech_ratio: float, sr: int = WHISPER_SR):
+    """
+    Returns (waveform, boolean mask of true speech samples).
+    """
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    y = (0.002 * rng.standard_normal(n) + 0.003 * np.sin(2 * np.pi * 60 * t)).astype(np.float32)
+    truth = np.zeros(n, dtype=bool)
+
+    spoken = 0
+    while spoken < speech_ratio * n:
+        burst = clips[rng.integers(len(clips))] if clips else synthetic_speech(rng, rng.uniform(1.5, 6), sr)
+        start = int(rng.integers(0, max(1, n - len(burst))))
+        end = min(n, start + len(burst))
+        y[start:end] += burst[:end - start]
+        spoken += end - start - truth[start:end].sum()
+        truth[start:end] = True
+    return y, truth
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    clips = [decode_audio_bytes(Path(path).read_bytes()) for path in args.files]
+    calls = [make_call(rng, clips, args.call_seconds, args.speech_ratio) for _ in range(args.calls)]
+
+    model = None
+    if args.whisper:
+        from transcription import make_backend
+        model = make_backend()
+        model.transcribe(np.zeros(WHISPER_SR, dtype=np.float32))
+
+    totals = dict(audio=0.0, kept=0.0, recall=0.0, vad=0.0, feat_full=0.0, feat_vad=0.0, asr_full=0.0, asr_vad=0.0)
+    for y, truth in calls:
+        segments, vad_s = timed(detect_speech, y, WHISPER_SR)
+        speech, _ = speech_only(y, WHISPER_SR, segments)
+        detected = np.zeros(len(y), dtype=bool)
+        for start, end in segments:
+            detected[start:end] = True
+
+        totals["audio"] += len(y) / WHISPER_SR
+        totals["kept"] += len(speech) / WHISPER_SR
+        totals["recall"] += (detected & truth).sum() / truth.sum()
+        totals["vad"] += vad_s
+        # WHOLE-CALL FEATURES (max_duration COVERS THE CALL) WITH AND WITHOUT THE VAD
+        totals["feat_full"] += timed(extract_features_batch, [y], WHISPER_SR, max_duration=args.call_seconds)[1]
+        totals["feat_vad"] += vad_s + timed(extract_features_batch, [speech], WHISPER_SR, max_duration=args.call_seconds)[1]
+        if model is not None:
+            totals["asr_full"] += timed(model.transcribe, y)[1]
+            totals["asr_vad"] += vad_s + timed(model.transcribe, speech)[1]
+
+    n = len(calls)
+    print(f"{n} calls, {totals['audio']:.0f}s of audio, {100 * args.speech_ratio:.0f}% speech")
+    print(f"kept by VAD:      {100 * totals['kept'] / totals['audio']:.1f}% of audio, speech recall {100 * totals['recall'] / n:.1f}%")
+    print(f"VAD cost:         {1000 * totals['vad'] / n:.1f} ms per call ({totals['audio'] / totals['vad']:.0f}x real time)")
+    print(f"features:         {totals['feat_full']:.2f}s -> {totals['feat_vad']:.2f}s ({totals['feat_full'] / totals['feat_vad']:.1f}x)")
+    if model is not None:
+        print(f"transcription:    {totals['asr_full']:.2f}s -> {totals['asr_vad']:.2f}s ({totals['asr_full'] / totals['asr_vad']:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "VAD compute savings benchmark")
+    parser.add_argument("files", nargs = "*", help = "Speech clips to place in the calls (default: synthetic voice)")
+    parser.add_argument("--calls", type = int, default = 10)
+    parser.add_argument("--call-seconds", type = float, default = 120.0)
+    parser.add_argument("--speech-ratio", type = float, default = 0.25)
+    parser.add_argument("--whisper", action = "store_true", help = "Also time transcription (loads WHISPER_MODEL)")
+    main(parser.parse_args())
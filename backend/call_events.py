@@ -0,0 +1,111 @@
+import asyncio
+import json
+from collections import deque
+from os import getenv
+
+import psycopg
+
+# CALL_EVENTS_SOURCE=local FANS OUT EVENTS PUBLISHED BY THIS PROCESS (ONE WORKER).
+# CALL_EVENTS_SOURCE=postgres LISTENS ON THE call_events CHANNEL FED BY migrations/002_call_events.sql,
+# SO EVERY WORKER SEES WRITES FROM EVERY OTHER WORKER (AND FROM DIRECT SQL).
+CALL_EVENTS_SOURCE = getenv("CALL_EVENTS_SOURCE", "local")
+CHANNEL = "call_events"
+# COLUMNS SENT IN EVENTS; TRANSCRIPTS STAY OUT OF THE PUSH CHANNEL
+EVENT_COLUMNS = ["id", "created_at", "emotional_sev", "context_sev", "combined_sev", "key_details", "is_active", "emotions"]
+
+
+class Subscriber:
+    """
+    One connected client. Holds at most buffer_size undelivered events; if the client
+    falls further behind, the backlog is dropped and it is told to resync instead of
+    letting memory grow.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.events = deque(maxlen = buffer_size)
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def push(self, event: str):
+        if len(self.events) == self.events.maxlen:
+            self.events.clear()
+            self.overflowed = True
+        self.events.append(event)
+        self.ready.set()
+
+    async def next_batch(self, timeout: float) -> list[str]:
+        """
+        Wait up to timeout for events; returns [] on timeout (caller sends a heartbeat).
+        """
+        if not self.events and not self.overflowed:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        if self.overflowed:
+            self.overflowed = False
+            self.events.clear()
+            return [json.dumps({"type": "resync"})]
+        batch = list(self.events)
+        self.events.clear()
+        return batch
+
+
+class CallBroadcaster:
+    """
+    In-process fan-out of row-level call deltas (insert, severity, deactivated, update).
+    publish() serializes each event once and only appends it to per-client buffers, so
+    its cost is independent of how slow any client is.
+    """
+
+    def __init__(self, buffer_size: int = 64):
+        self.buffer_size = buffer_size
+        self.subscribers: set[Subscriber] = set()
+        self.published = 0
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.buffer_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: dict | str):
+        payload = event if isinstance(event, str) else json.dumps(event, default = str)
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.push(payload)
+
+
+broadcaster = CallBroadcaster(int(getenv("CALL_EVENTS_BUFFER", "64")))
+
+
+def publish_local(event: dict):
+    # NO-OP WHEN POSTGRES IS THE SOURCE, OTHERWISE THE TRIGGER AND THE APP WOULD BOTH SEND IT
+    if CALL_EVENTS_SOURCE == "local":
+        broadcaster.publish(event)
+
+
+async def listen_postgres(conninfo: str):
+    """
+    Relay NOTIFY payloads from the call_events channel to local subscribers, reconnecting
+    with backoff if the connection drops. Runs as a background task for the app's lifetime.
+    """
+    delay = 1.0
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit = True) as conn:
+                await conn.execute(f"listen {CHANNEL}")
+                delay = 1.0
+                # CLIENTS MAY HAVE MISSED EVENTS WHILE WE WERE DISCONNECTED
+                broadcaster.publish({"type": "resync"})
+                async for notify in conn.notifies():
+                    broadcaster.publish(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Call event listener disconnected:", e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
@@ -0,0 +1,109 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# BUMP WHEN THE ON-DISK LAYOUT CHANGES
+FORMAT_VERSION = 1
+ARRAYS = ["feature", "threshold", "left", "right", "roots", "leaf_values"]
+
+
+def export_forest(forest, classes, feature_columns, out_dir, source_digest: str = ""):
+    """
+    Flatten a fitted sklearn RandomForestClassifier into plain .npy arrays:
+        feature[n]      split feature per node, -1 for leaves
+        threshold[n]    split threshold (float64, as sklearn compares it)
+        left/right[n]   global child node indices; for leaves left holds the row in leaf_values
+        roots[t]        root node of each tree
+        leaf_values[l]  class probabilities of each leaf (already normalised, float32)
+    plus meta.json with the classes, feature order and the digest of the source model.
+    Leaves store probabilities once instead of every node carrying a value row, which
+    is most of the size of the pickle.
+    """
+    feature, threshold, left, right, roots, leaf_values = [], [], [], [], [], []
+    offset = n_leaves = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        leaf_rows = np.cumsum(is_leaf) - 1 + n_leaves
+
+        value = tree.value[is_leaf, 0, :]
+        leaf_values.append(value / value.sum(axis=1, keepdims=True))
+        feature.append(np.where(is_leaf, -1, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, leaf_rows, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        roots.append(offset)
+
+        offset += tree.node_count
+        n_leaves += int(is_leaf.sum())
+        max_depth = max(max_depth, tree.max_depth)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "roots": np.array(roots, dtype=np.int32),
+        "leaf_values": np.concatenate(leaf_values).astype(np.float32),
+    }
+    for name, array in arrays.items():
+        np.save(out_dir / f"{name}.npy", array)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "classes": [str(c) for c in classes],
+        "feature_columns": list(feature_columns),
+        "n_trees": len(roots),
+        "n_nodes": offset,
+        "n_leaves": n_leaves,
+        "max_depth": max_depth,
+        "source_digest": source_digest,
+    }
+    # meta.json IS WRITTEN LAST (ATOMICALLY) SO A HALF-EXPORTED DIRECTORY IS NEVER LOADED
+    tmp_path = out_dir / "meta.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp_path, out_dir / "meta.json")
+    return meta
+
+
+class CompactForest:
+    """
+    Inference-only random forest over the arrays written by export_forest.
+    Arrays are memory-mapped, so loading is near-instant and worker processes share
+    the pages through the OS cache. predict_proba walks every tree for every row at
+    once, one tree level per NumPy step, and matches sklearn's predict_proba.
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            self.meta = json.load(f)
+        if self.meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {self.meta['format_version']} in {path}")
+        for name in ARRAYS:
+            setattr(self, name, np.load(path / f"{name}.npy", mmap_mode="r"))
+        self.classes = np.array(self.meta["classes"])
+        self.feature_columns = self.meta["feature_columns"]
+        self.max_depth = self.meta["max_depth"]
+
+    def predict_proba(self, X) -> np.ndarray:
+        # sklearn TREES COMPARE float32 FEATURES AGAINST float64 THRESHOLDS
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(np.asarray(self.roots), (X.shape[0], len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, np.maximum(feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+
+        return self.leaf_values[self.left[nodes]].mean(axis=1, dtype=np.float64)
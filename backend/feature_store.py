@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from audio_io import file_digest
+from voice_features import FEATURE_VERSION, extract_features_files, feature_columns
+
+DEFAULT_ROOT = Path(__file__).resolve().parent / "feature_cache"
+
+
+class FeatureStore:
+    """
+    On-disk cache of voice_features rows keyed by audio content hash.
+    Each extraction parameter set gets its own directory, so changing sr, n_mfcc,
+    fmin, fmax, max_duration (or FEATURE_VERSION) automatically starts a fresh store.
+
+    Layout of <root>/<params_key>/:
+        features.npy  float64 matrix, one row per cached file, feature_columns(n_mfcc) order
+        keys.json     SHA-256 of each row's source file, in row order
+        params.json   the extraction parameters (for humans)
+        train-<hash>.npy  the latest training matrix (training_matrix), older ones are removed
+    """
+
+    def __init__(
+        self,
+        root=DEFAULT_ROOT,
+        sr=22050,
+        n_mfcc=20,
+        fmin=50,
+        fmax=600,
+        max_duration=5.0
+    ):
+        self.params = {
+            "sr": sr,
+            "n_mfcc": n_mfcc,
+            "fmin": fmin,
+            "fmax": fmax,
+            "max_duration": max_duration,
+            "feature_version": FEATURE_VERSION,
+        }
+        key = hashlib.sha256(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:16]
+        self.dir = Path(root) / key
+        self.columns = feature_columns(n_mfcc)
+        self.matrix_path = self.dir / "features.npy"
+        self.keys_path = self.dir / "keys.json"
+        self._load()
+
+    def _load(self):
+        if self.matrix_path.exists() and self.keys_path.exists():
+            with open(self.keys_path) as f:
+                self.keys = json.load(f)
+            self.matrix = np.load(self.matrix_path, mmap_mode="r")
+        else:
+            self.keys = []
+            self.matrix = np.empty((0, len(self.columns)))
+        self.index = {digest: row for row, digest in enumerate(self.keys)}
+
+    def _append(self, digests, rows):
+        # REWRITE THEN RENAME SO AN INTERRUPTED RUN NEVER CORRUPTS THE STORE
+        self.dir.mkdir(parents=True, exist_ok=True)
+        matrix = np.concatenate([np.asarray(self.matrix), rows])
+        keys = self.keys + digests
+
+        tmp_matrix = self.dir / "features.tmp.npy"
+        np.save(tmp_matrix, matrix)
+        tmp_keys = self.dir / "keys.tmp.json"
+        with open(tmp_keys, "w") as f:
+            json.dump(keys, f)
+        with open(self.dir / "params.json", "w") as f:
+            json.dump(self.params, f, indent=1)
+
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_keys, self.keys_path)
+        self._load()
+
+    def features_for(self, file_paths, batch_size=64, n_jobs=-1, progress=None):
+        """
+        Feature matrix for file_paths (rows in the same order), extracting only
+        files whose content isn't cached yet. progress wraps the batch iterator (e.g. tqdm).
+        """
+        file_paths = list(file_paths)
+        digests = [file_digest(path) for path in file_paths]
+
+        # DEDUPLICATE SO IDENTICAL FILES ARE EXTRACTED ONCE
+        missing = {}
+        for path, digest in zip(file_paths, digests):
+            if digest not in self.index and digest not in missing:
+                missing[digest] = path
+        print(f"Feature cache: {len(file_paths) - len(missing)} cached, {len(missing)} to extract")
+
+        if missing:
+            rows = np.empty((len(missing), len(self.columns)))
+            batches = extract_features_files(
+                list(missing.values()),
+                self.params["sr"],
+                self.params["n_mfcc"],
+                self.params["fmin"],
+                self.params["fmax"],
+                self.params["max_duration"],
+                batch_size=batch_size,
+                n_jobs=n_jobs,
+            )
+            if progress is not None:
+                batches = progress(batches, total=-(-len(missing) // batch_size))
+            for start, batch in batches:
+                rows[start:start + len(batch)] = batch
+            self._append(list(missing), rows)
+
+        return self.matrix[[self.index[digest] for digest in digests]]
+
+    def training_matrix(self, file_paths, **kwargs):
+        """
+        features_for(file_paths) saved once as its own .npy and returned memory-mapped,
+        so process-pool workers (joblib) map the same file instead of each receiving
+        a pickled copy of the matrix. Only the latest training matrix is kept.
+        """
+        X = np.ascontiguousarray(self.features_for(file_paths, **kwargs))
+        path = self.dir / f"train-{hashlib.sha256(X.tobytes()).hexdigest()[:16]}.npy"
+        if not path.exists():
+            tmp_path = self.dir / "train.tmp.npy"
+            np.save(tmp_path, X)
+            os.replace(tmp_path, path)
+            # STALE MATRICES FROM EARLIER DATASETS; A RUN STILL MAPPING ONE KEEPS ITS PAGES UNTIL IT UNMAPS
+            for stale in self.dir.glob("train-*.npy"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        return np.load(path, mmap_mode="r")
@@ -0,0 +1,155 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from os import getenv
+
+import numpy as np
+
+import telemetry
+
+
+class SchedulerFull(Exception):
+    """
+    Raised when a scheduler's bounded queue is full; endpoints map it to 503 + Retry-After.
+    """
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} inference queue is full, retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args, kwargs, submitted_at):
+    # RUNS IN THE WORKER (THREAD OR PROCESS); WALL-CLOCK TIMES SO THEY COMPARE ACROSS PROCESSES
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return started_at, time.time(), result
+
+
+class InferenceScheduler:
+    """
+    Fixed pool of model workers in front of a bounded queue.
+    At most workers + max_queue calls are admitted at once; anything beyond that is
+    rejected immediately with SchedulerFull instead of oversubscribing the CPU.
+    Workers are threads (shared memory, models must be safe to call concurrently or
+    pooled) or processes (each imports its own model copy).
+    """
+
+    def __init__(self, name: str, workers: int = 1, max_queue: int = 8, mode: str = "thread"):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.mode = mode
+        if mode == "process":
+            self.executor = ProcessPoolExecutor(max_workers = workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = name)
+
+        self.lock = threading.Lock()
+        self.in_system = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_ms = deque(maxlen = 1000)
+        self.run_ms = deque(maxlen = 1000)
+
+    def _admit(self):
+        with self.lock:
+            if self.in_system >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise SchedulerFull(self.name, self.retry_after())
+            self.in_system += 1
+            self.submitted += 1
+
+    def _finish(self, submitted_at, lane, future):
+        with self.lock:
+            self.in_system -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            started_at, finished_at, _ = future.result()
+            self.completed += 1
+            self.wait_ms.append((started_at - submitted_at) * 1000)
+            self.run_ms.append((finished_at - started_at) * 1000)
+        telemetry.record_span(f"queue.{self.name}", submitted_at, started_at, telemetry.queue_wait_seconds, (self.name,), lane)
+        telemetry.record_span(f"pool.{self.name}", started_at, finished_at, lane = lane)
+
+    def _submit(self, fn, args, kwargs):
+        self._admit()
+        submitted_at = time.time()
+        lane = telemetry.trace_lane.get()
+        try:
+            if self.mode == "process":
+                future = self.executor.submit(_timed_call, fn, args, kwargs, submitted_at)
+            else:
+                # THREAD WORKERS RUN IN THE CALLER'S CONTEXT, SO THEIR SPANS LAND ON THE REQUEST'S TRACE LANE
+                future = self.executor.submit(contextvars.copy_context().run, _timed_call, fn, args, kwargs, submitted_at)
+        except Exception:
+            with self.lock:
+                self.in_system -= 1
+            raise
+        future.add_done_callback(lambda f: self._finish(submitted_at, lane, f))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Blocking call for code already running in a worker thread (e.g. agent tools).
+        """
+        return self._submit(fn, args, kwargs).result()[2]
+
+    async def submit(self, fn, *args, **kwargs):
+        """
+        Awaitable call for endpoints; the event loop is never blocked by the model.
+        """
+        future = self._submit(fn, args, kwargs)
+        return (await asyncio.wrap_future(future))[2]
+
+    def queue_depth(self) -> int:
+        return max(0, self.in_system - self.workers)
+
+    def retry_after(self) -> int:
+        # TIME FOR THE CURRENT BACKLOG TO DRAIN AT THE RECENT AVERAGE SERVICE TIME
+        avg_run_s = (sum(self.run_ms) / len(self.run_ms) / 1000) if self.run_ms else 1.0
+        return max(1, math.ceil(avg_run_s * (self.queue_depth() + 1) / self.workers))
+
+    def stats(self) -> dict:
+        with self.lock:
+            waits = np.array(self.wait_ms) if self.wait_ms else np.zeros(1)
+            runs = np.array(self.run_ms) if self.run_ms else np.zeros(1)
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self.in_system, self.workers),
+                "queue_depth": self.queue_depth(),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_ms_p50": round(float(np.percentile(waits, 50)), 1),
+                "wait_ms_p95": round(float(np.percentile(waits, 95)), 1),
+                "wait_ms_max": round(float(waits.max()), 1),
+                "run_ms_p50": round(float(np.percentile(runs, 50)), 1),
+                "run_ms_p95": round(float(np.percentile(runs, 95)), 1),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait = False, cancel_futures = True)
+
+
+# CONFIGURED FROM ENV: INFERENCE_MODE=thread|process, WHISPER_WORKERS, EMOTION_WORKERS, INFERENCE_QUEUE
+INFERENCE_MODE = getenv("INFERENCE_MODE", "thread")
+WHISPER_WORKERS = int(getenv("WHISPER_WORKERS", "1"))
+EMOTION_WORKERS = int(getenv("EMOTION_WORKERS", "2"))
+INFERENCE_QUEUE = int(getenv("INFERENCE_QUEUE", "16"))
+
+whisper_pool = InferenceScheduler("whisper", WHISPER_WORKERS, INFERENCE_QUEUE, INFERENCE_MODE)
+emotion_pool = InferenceScheduler("emotion", EMOTION_WORKERS, INFERENCE_QUEUE, INFERENCE_MODE)
+
+
+def all_stats() -> dict:
+    return {pool.name: pool.stats() for pool in (whisper_pool, emotion_pool)}
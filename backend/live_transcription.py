@@ -0,0 +1,118 @@
+import threading
+import numpy as np
+
+import agent_ranker
+from audio_io import WHISPER_SR
+
+
+class LiveCallSession:
+    """
+    Rolling-window transcription and provisional triage for one live call.
+
+    Audio arrives in arbitrary frame sizes through add_audio(). Each step()
+    re-transcribes only the uncommitted tail of the call (at most max_window_s).
+    Whisper segments that end more than margin_s before the end of the buffer are
+    committed and their audio dropped, so the cost per step stays bounded no
+    matter how long the call runs.
+    """
+
+    def __init__(
+        self,
+        sr: int = WHISPER_SR,
+        step_s: float = 2.0,
+        max_window_s: float = 30.0,
+        margin_s: float = 1.5,
+        min_words: int = 6,
+        triage_every_words: int = 10,
+    ):
+        self.sr = sr
+        self.step_s = step_s
+        self.max_window_s = max_window_s
+        self.margin_s = margin_s
+        self.min_words = min_words
+        self.triage_every_words = triage_every_words
+
+        # add_audio() RUNS ON THE EVENT LOOP WHILE step() RUNS IN A WORKER THREAD
+        self.lock = threading.Lock()
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.pending_start_s = 0.0
+        self.received_s = 0.0
+        self.unprocessed = 0
+
+        self.committed = []
+        self.tentative = ""
+        self.triaged_words = 0
+
+    def add_audio(self, samples: np.ndarray) -> bool:
+        """
+        Append samples; returns True once enough new audio arrived for a step.
+        """
+        with self.lock:
+            self.pending = np.concatenate([self.pending, samples])
+            self.unprocessed += len(samples)
+            self.received_s += len(samples) / self.sr
+            return self.unprocessed >= self.step_s * self.sr
+
+    def transcript(self) -> str:
+        return " ".join(self.committed + ([self.tentative] if self.tentative else []))
+
+    def step(self, final: bool = False) -> dict:
+        with self.lock:
+            audio = self.pending.copy()
+            self.unprocessed = 0
+
+        if len(audio) > 0:
+            # CONDITION WHISPER ON THE TAIL OF WHAT WAS ALREADY COMMITTED
+            prompt = " ".join(self.committed)[-200:] or None
+            segments = agent_ranker.transcribe_result(audio, initial_prompt=prompt)['segments']
+            duration = len(audio) / self.sr
+
+            if final:
+                commit = segments
+            else:
+                commit = [seg for seg in segments if seg['end'] <= duration - self.margin_s]
+                # NEVER LET THE WINDOW GROW PAST max_window_s, EVEN WITHOUT A STABLE BOUNDARY
+                if not commit and duration >= self.max_window_s:
+                    commit = segments[:-1] or segments
+
+            if commit:
+                commit_end = commit[-1]['end']
+            elif not segments and duration >= self.max_window_s:
+                # NO SPEECH AT ALL: KEEP ONLY THE MARGIN IN CASE A WORD IS STARTING
+                commit_end = duration - self.margin_s
+            else:
+                commit_end = 0.0
+
+            with self.lock:
+                self.pending = self.pending[int(commit_end * self.sr):]
+                self.pending_start_s += commit_end
+            self.committed += [seg['text'].strip() for seg in commit if seg['text'].strip()]
+            self.tentative = " ".join(seg['text'].strip() for seg in segments[len(commit):])
+
+        return {
+            "type": "partial",
+            "committed": " ".join(self.committed),
+            "tentative": self.tentative,
+            "audio_s": round(self.received_s, 2),
+        }
+
+    def needs_triage(self) -> bool:
+        words = len(self.transcript().split())
+        if self.triaged_words == 0:
+            return words >= self.min_words
+        return words - self.triaged_words >= self.triage_every_words
+
+    def triage(self, final: bool = False) -> dict:
+        text = self.transcript()
+        self.triaged_words = len(text.split())
+        triage_dict = agent_ranker.extract_triage(text)
+        # LABELS OUTSIDE THE RANK TABLES SCORE WITH THE RULE TABLE'S FALLBACK RANKS
+        severity = agent_ranker.calculate_severity(triage_dict)
+        return {
+            "type": "final" if final else "triage",
+            "transcript": text,
+            "triage_data": triage_dict,
+            "severity_score": severity,
+            "provisional": not final,
+            "audio_s": round(self.received_s, 2),
+        }
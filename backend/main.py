@@ -1,32 +1,78 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-import psycopg
 import os
+import asyncio
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from agent_api import router as agent_router
 from voice_api import router as voice_router
-from supabase_api import router as supabase_router, set_connection
+from supabase_api import router as supabase_router, make_pool, set_pool
+from analyze_api import router as analyze_router
+import supabase_api
+import voice_api
+import inference_pool
+import transcription
+import result_cache
+import telemetry
+import call_events
 
 # CONNECT TO SUPABASE DB
 load_dotenv()
 print("SUPABASE URL Exists:", os.getenv("SUPABASE_URL"))
 
-connection = None
+pool = None
+
+# MODELS WARMED IN THIS PROCESS, BY THE LIFESPAN OR BEFORE fork() BY serve.py; /ready IS 503 UNTIL BOTH ARE
+warm = {"whisper": False, "emotion": False}
+
+async def warmup_models():
+    # LOAD WHISPER NOW (ONE WARMUP PER WORKER) INSTEAD OF ON THE FIRST CALL; WHISPER_WARMUP=0 KEEPS IT LAZY
+    if not warm["whisper"] and os.getenv("WHISPER_WARMUP", "1") == "1":
+        try:
+            whisper_pool = inference_pool.whisper_pool
+            await asyncio.gather(*(whisper_pool.submit(transcription.warmup) for _ in range(whisper_pool.workers)))
+            warm["whisper"] = True
+            print("Whisper Ready:", transcription.WHISPER_BACKEND, transcription.WHISPER_MODEL)
+        except Exception as e:
+            print("Whisper Warmup Failed:", e)
+    if not warm["emotion"]:
+        try:
+            await asyncio.gather(*(inference_pool.emotion_pool.submit(voice_api.warmup) for _ in range(inference_pool.emotion_pool.workers)))
+            warm["emotion"] = True
+        except Exception as e:
+            print("Emotion Model Warmup Failed:", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global connection
+    global pool
+    # A MISSING OPTIONAL BACKEND (faster-whisper) STOPS STARTUP WITH AN INSTALL HINT, EVEN WITH WHISPER_WARMUP=0
+    transcription.check_backend()
     try:
-        connection = psycopg.connect(os.getenv("SUPABASE_URL"))
-        print("Connection Made:", connection)
-        set_connection(connection)
+        pool = make_pool(os.getenv("SUPABASE_URL"))
+        await pool.open()
+        set_pool(pool)
+        # NOT pool.wait(): IT CLOSES THE POOL ON TIMEOUT. A FAILED CHECKOUT LEAVES THE POOL OPEN AND
+        # RECONNECTING IN THE BACKGROUND, SO REQUESTS GET 503 UNTIL THE DATABASE IS REACHABLE
+        async with pool.connection(timeout = 10):
+            pass
+        print("Connection Pool Ready:", pool.get_stats())
     except Exception as e:
         print("Connection Failed:", e)
+    await warmup_models()
+    # MULTI-WORKER DEPLOYMENTS RELAY DATABASE NOTIFICATIONS INSTEAD OF IN-PROCESS EVENTS
+    listener = None
+    if call_events.CALL_EVENTS_SOURCE == "postgres":
+        listener = asyncio.create_task(call_events.listen_postgres(os.getenv("SUPABASE_URL")))
     yield
-    if connection:
-        connection.close()
-        print("Connection Stopped")
+    if listener:
+        listener.cancel()
+    if pool:
+        await pool.close()
+        print("Connection Pool Closed")
+    inference_pool.whisper_pool.shutdown()
+    inference_pool.emotion_pool.shutdown()
+    telemetry.dump_trace()
 
 app = FastAPI(
     title="AI Triage App",
@@ -43,10 +89,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# PER-ROUTE LATENCY AND A TRACE LANE PER REQUEST (THE SSE STREAM IS LONG-LIVED, SO IT ISN'T TIMED)
+app.add_middleware(telemetry.TelemetryMiddleware, skip = {"/metrics", "/supabase/events"})
+
 # INCLUDE API ENPOINT ROUTERS
 app.include_router(agent_router)
 app.include_router(voice_router)
 app.include_router(supabase_router)
+app.include_router(analyze_router)
+
+# FULL INFERENCE QUEUE -> 503 WITH A RETRY HINT INSTEAD OF PILING WORK ONTO THE CPU
+@app.exception_handler(inference_pool.SchedulerFull)
+async def scheduler_full_handler(request: Request, exc: inference_pool.SchedulerFull):
+    return JSONResponse(
+        status_code = 503,
+        content = {"detail": str(exc), "retry_after": exc.retry_after},
+        headers = {"Retry-After": str(exc.retry_after)},
+    )
+
+# DATABASE DOWN OR POOL EXHAUSTED -> 503 WITH A RETRY HINT (THE POOL KEEPS RECONNECTING IN THE BACKGROUND)
+@app.exception_handler(supabase_api.DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: supabase_api.DatabaseUnavailable):
+    return JSONResponse(
+        status_code = 503,
+        content = {"detail": str(exc), "retry_after": exc.retry_after},
+        headers = {"Retry-After": str(exc.retry_after)},
+    )
+
+@app.get("/inference/stats", summary = "Queue depth, wait and run times of the model worker pools")
+async def inference_stats():
+    return inference_pool.all_stats()
+
+@app.get("/cache/stats", summary = "Hit/miss counters and sizes of the transcript/triage and emotion result caches")
+async def cache_stats():
+    return result_cache.all_stats()
+
+# PROMETHEUS SCRAPE TARGET: STAGE / REQUEST / QUEUE-WAIT / PAYLOAD HISTOGRAMS PLUS POOL AND CACHE GAUGES (PER PROCESS)
+@app.get("/metrics", summary = "Prometheus metrics", response_class = PlainTextResponse)
+async def metrics():
+    pools = inference_pool.all_stats()
+    caches = result_cache.all_stats()
+    extra = [
+        *telemetry.gauge("inference_queue_depth", "Calls waiting for a model worker",
+                         {(("pool", name),): stats["queue_depth"] for name, stats in pools.items()}),
+        *telemetry.gauge("inference_in_flight", "Calls running on a model worker",
+                         {(("pool", name),): stats["in_flight"] for name, stats in pools.items()}),
+        *telemetry.gauge("inference_rejected_total", "Calls rejected with 503",
+                         {(("pool", name),): stats["rejected"] for name, stats in pools.items()}, "counter"),
+        *telemetry.gauge("result_cache_lookups_total", "Result cache lookups by outcome",
+                         {(("cache", name), ("result", result)): stats[key] for name, stats in caches.items()
+                          for result, key in (("memory", "hits_memory"), ("disk", "hits_disk"), ("miss", "misses"))}, "counter"),
+    ]
+    return PlainTextResponse(telemetry.expose(extra), media_type = "text/plain; version=0.0.4")
+
+# CHROME TRACE OF RECENT SPANS (TRACE_ENABLED=1); OPEN IN chrome://tracing OR ui.perfetto.dev
+@app.get("/debug/trace", summary = "Recent spans as a Chrome trace")
+async def debug_trace(clear: bool = False):
+    trace = telemetry.chrome_trace()
+    if clear:
+        telemetry.trace_events.clear()
+    return trace
+
+# READINESS PROBE: 200 ONLY ONCE THIS WORKER'S MODELS ARE WARM (LIVENESS IS GET /)
+@app.get("/ready", summary = "Readiness of this worker: 503 until its models are warm")
+async def ready():
+    checks = {
+        "whisper": warm["whisper"] or ("lazy" if os.getenv("WHISPER_WARMUP", "1") != "1" else False),
+        "emotion": warm["emotion"],
+        "database": pool is not None and not pool.closed,
+    }
+    is_ready = bool(checks["whisper"] and checks["emotion"])
+    return JSONResponse(status_code = 200 if is_ready else 503, content = {"ready": is_ready, "pid": os.getpid(), "checks": checks})
 
 @app.get("/")
 async def root():
@@ -0,0 +1,12 @@
+-- BASE TABLE (SAME AS THE README SETUP); SKIP ON AN EXISTING SUPABASE PROJECT
+create table if not exists public.call_severities (
+  id bigint generated by default as identity not null,
+  created_at timestamp with time zone not null default now(),
+  emotional_sev real null default '0'::real,
+  context_sev real null default '0'::real,
+  transcript text null default ''''''::text,
+  key_details json null default '{}'::json,
+  is_active boolean null default true,
+  emotions text null default ''::text,
+  constraint call_severities_pkey primary key (id)
+) TABLESPACE pg_default;
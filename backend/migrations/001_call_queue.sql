@@ -0,0 +1,11 @@
+-- SEVERITY-ORDERED CALL QUEUE (GET /supabase/queue)
+-- combined_sev IS WHAT THE DASHBOARD SORTS BY; STORING IT LETS THE INDEX SERVE THE ORDER BY.
+-- NOTE: ADDING A STORED GENERATED COLUMN REWRITES THE TABLE ONCE.
+alter table public.call_severities
+  add column if not exists combined_sev real
+  generated always as (coalesce(emotional_sev, 0) + coalesce(context_sev, 0)) stored;
+
+-- KEYSET INDEX: EACH PAGE IS ONE INDEX RANGE SCAN FROM THE CURSOR, NO OFFSET.
+-- ON A LARGE LIVE TABLE RUN THIS SEPARATELY WITH "create index concurrently".
+create index if not exists call_severities_queue_idx
+  on public.call_severities (is_active, combined_sev desc, created_at desc, id desc);
@@ -0,0 +1,38 @@
+-- ROW-LEVEL CALL DELTAS ON THE call_events CHANNEL (USED WHEN CALL_EVENTS_SOURCE=postgres)
+-- PAYLOAD MATCHES call_events.EVENT_COLUMNS; TRANSCRIPTS ARE LEFT OUT TO STAY UNDER NOTIFY'S 8 KB LIMIT.
+create or replace function public.notify_call_event() returns trigger
+language plpgsql as $$
+declare
+  kind text;
+begin
+  if tg_op = 'INSERT' then
+    kind := 'insert';
+  elsif new.is_active is distinct from old.is_active and not new.is_active then
+    kind := 'deactivated';
+  elsif new.emotional_sev is distinct from old.emotional_sev or new.context_sev is distinct from old.context_sev then
+    kind := 'severity';
+  else
+    kind := 'update';
+  end if;
+
+  perform pg_notify('call_events', json_build_object(
+    'type', kind,
+    'call', json_build_object(
+      'id', new.id,
+      'created_at', new.created_at,
+      'emotional_sev', new.emotional_sev,
+      'context_sev', new.context_sev,
+      'combined_sev', new.combined_sev,
+      'key_details', new.key_details,
+      'is_active', new.is_active,
+      'emotions', new.emotions
+    )
+  )::text);
+  return new;
+end;
+$$;
+
+drop trigger if exists call_severities_notify on public.call_severities;
+create trigger call_severities_notify
+  after insert or update on public.call_severities
+  for each row execute function public.notify_call_event();
@@ -0,0 +1,13 @@
+-- RULE TABLE VERSION (severity_rules/) THAT PRODUCED context_sev; NULL = SCORED BEFORE VERSIONING OR BY A CLIENT.
+-- rescore.py SKIPS ROWS ALREADY AT THE TARGET VERSION, SO AN INTERRUPTED RUN RESUMES WHERE IT STOPPED.
+alter table public.call_severities
+  add column if not exists severity_version text;
+
+-- A BULK RE-SCORE WOULD SEND ONE NOTIFY PER ROW; rescore.py SETS call_events.muted FOR ITS OWN
+-- TRANSACTIONS AND SENDS A SINGLE resync INSTEAD. EVERY OTHER WRITE STILL NOTIFIES AS BEFORE.
+drop trigger if exists call_severities_notify on public.call_severities;
+create trigger call_severities_notify
+  after insert or update on public.call_severities
+  for each row
+  when (coalesce(current_setting('call_events.muted', true), '') <> 'on')
+  execute function public.notify_call_event();
@@ -0,0 +1,19 @@
+-- TRANSCRIPT SEARCH (GET /supabase/search)
+-- key_details BECOMES jsonb SO IT CAN BE INDEXED; READERS (->>, row_to_json, THE NOTIFY TRIGGER) ARE UNCHANGED.
+-- NOTE: THE TYPE CHANGE AND THE STORED GENERATED COLUMN EACH REWRITE THE TABLE ONCE.
+alter table public.call_severities
+  alter column key_details type jsonb using key_details::jsonb,
+  alter column key_details set default '{}'::jsonb;
+
+-- ENGLISH STEMMING: "shooting" MATCHES "shot", "streets" MATCHES "street"
+alter table public.call_severities
+  add column if not exists transcript_tsv tsvector
+  generated always as (to_tsvector('english', coalesce(transcript, ''))) stored;
+
+-- ON A LARGE LIVE TABLE RUN THESE SEPARATELY WITH "create index concurrently".
+create index if not exists call_severities_transcript_idx
+  on public.call_severities using gin (transcript_tsv);
+
+-- jsonb_path_ops ONLY SERVES CONTAINMENT (key_details @> '{"event": "fire"}'), AT A FRACTION OF THE DEFAULT SIZE
+create index if not exists call_severities_key_details_idx
+  on public.call_severities using gin (key_details jsonb_path_ops);
@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import psycopg
+from dotenv import load_dotenv
+
+import call_events
+import severity
+
+# LABELS COME OUT OF key_details IN SQL, SO PYTHON NEVER PARSES THE JSON DOCUMENTS
+SELECT_QUERY = """
+    select id,
+           key_details->>'event',
+           key_details->>'victims',
+           key_details->>'weapon',
+           key_details->>'injuries',
+           key_details->>'ongoing_threat',
+           context_sev
+    from call_severities
+    where id > %(after)s
+      and severity_version is distinct from %(version)s
+      {complete}
+    order by id
+    limit %(batch)s
+"""
+# ROWS STORED BEFORE key_details KEPT weapon / injuries CAN'T BE RE-SCORED EXACTLY
+COMPLETE_FILTER = "and key_details->>'weapon' is not null and key_details->>'injuries' is not null"
+
+UPDATE_QUERY = """
+    update call_severities as c
+    set context_sev = v.sev, severity_version = %(version)s
+    from unnest(%(ids)s::bigint[], %(scores)s::real[]) as v(id, sev)
+    where c.id = v.id
+"""
+
+
+def score_rows(rules: severity.SeverityRules, rows: list[tuple]) -> np.ndarray:
+    columns = list(zip(*rows))
+    return rules.score_columns(
+        columns[1],
+        [severity.parse_victims(v) for v in columns[2]],
+        columns[3],
+        columns[4],
+        columns[5],
+    )
+
+
+def rescore(conn, rules: severity.SeverityRules, batch: int = 5000, limit: int | None = None,
+            include_incomplete: bool = False, dry_run: bool = False) -> dict:
+    """
+    Recompute context_sev for every stored call not yet scored by this rule table
+    version, walking the primary key in keyset batches. Each batch is one SELECT and
+    one set-based UPDATE in its own transaction, so the job can be stopped at any point
+    and resumed: finished rows carry severity_version and are skipped on the next run.
+    combined_sev (a stored generated column) and the queue index follow automatically.
+    """
+    query = SELECT_QUERY.format(complete = "" if include_incomplete else COMPLETE_FILTER)
+    after = 0
+    totals = {"scanned": 0, "changed": 0, "updated": 0}
+    deltas = []
+    start = time.perf_counter()
+
+    while limit is None or totals["scanned"] < limit:
+        size = batch if limit is None else min(batch, limit - totals["scanned"])
+        rows = conn.execute(query, {"after": after, "version": rules.version, "batch": size}).fetchall()
+        if not rows:
+            break
+        after = rows[-1][0]
+
+        scores = score_rows(rules, rows).astype(np.float32)
+        stored = np.array([np.nan if r[6] is None else r[6] for r in rows], dtype=np.float32)
+        changed = scores != stored
+        totals["scanned"] += len(rows)
+        totals["changed"] += int(changed.sum())
+        deltas.append((scores - np.nan_to_num(stored))[changed])
+
+        if not dry_run:
+            with conn.transaction():
+                # MUTES THE PER-ROW call_events TRIGGER (migration 003); ONE resync IS SENT AT THE END
+                conn.execute("set local call_events.muted = 'on'")
+                conn.execute(UPDATE_QUERY, {"version": rules.version, "ids": [r[0] for r in rows], "scores": scores.tolist()})
+            totals["updated"] += len(rows)
+
+        elapsed = time.perf_counter() - start
+        print(f"\r{totals['scanned']} rows, {totals['changed']} changed, {totals['scanned'] / elapsed:.0f} rows/s", end = "", flush = True)
+    print()
+
+    if totals["updated"]:
+        # POSTGRES SOURCE: EVERY SERVER WORKER RELAYS THIS. LOCAL SOURCE: ONLY REACHES CLIENTS WHEN rescore()
+        # RUNS INSIDE THE SERVER PROCESS; A STANDALONE RUN CAN'T REACH ANOTHER PROCESS'S BROADCASTER
+        conn.execute("""select pg_notify('call_events', '{"type": "resync"}')""")
+        call_events.publish_local({"type": "resync"})
+
+    deltas = np.concatenate(deltas) if deltas else np.zeros(0)
+    totals.update(
+        version = rules.version,
+        seconds = round(time.perf_counter() - start, 2),
+        mean_delta = round(float(deltas.mean()), 3) if len(deltas) else 0.0,
+        max_abs_delta = round(float(np.abs(deltas).max()), 3) if len(deltas) else 0.0,
+        unknown_labels = dict(rules.unknown.most_common(20)),
+    )
+    if not include_incomplete:
+        totals["skipped_incomplete"] = conn.execute(
+            "select count(*) from call_severities "
+            "where key_details->>'weapon' is null or key_details->>'injuries' is null"
+        ).fetchone()[0]
+    return totals
+
+
+def main(args):
+    load_dotenv()
+    rules = severity.load_rules(args.rules)
+    print(f"Re-scoring with rule table {rules.version}" + (" (dry run)" if args.dry_run else ""))
+    if call_events.CALL_EVENTS_SOURCE != "postgres" and not args.dry_run:
+        print("Note: the final resync is sent with pg_notify, so dashboards only refresh on their own when the "
+              "server runs with CALL_EVENTS_SOURCE=postgres; otherwise reload them after the run.")
+    with psycopg.connect(args.db or os.getenv("SUPABASE_URL"), autocommit = True) as conn:
+        totals = rescore(conn, rules, args.batch, args.limit, args.include_incomplete, args.dry_run)
+    for name, value in totals.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Re-score stored context_sev values with a severity rule table")
+    parser.add_argument("--rules", default = severity.SEVERITY_RULES, help = "Rule table version (severity_rules/) or JSON path")
+    parser.add_argument("--db", default = None, help = "Postgres connection string (default: SUPABASE_URL)")
+    parser.add_argument("--batch", type = int, default = 5000, help = "Rows per SELECT + UPDATE transaction")
+    parser.add_argument("--limit", type = int, default = None, help = "Stop after this many rows")
+    parser.add_argument("--include-incomplete", action = "store_true",
+                        help = "Also re-score rows without weapon / injuries, using the fallback ranks")
+    parser.add_argument("--dry-run", action = "store_true", help = "Report what would change without writing")
+    main(parser.parse_args())
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+
+
+def cache_key(digest: str, version: str) -> str:
+    """
+    Content address for one recording (audio_io digest) under one model configuration:
+    the same bytes analysed by a different model or pipeline mode never share an entry.
+    """
+    return digest + ":" + version
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serialisable results.
+    Memory tier: LRU of at most max_items entries, checked first.
+    Disk tier (optional, when path is set): SQLite table shared by every worker process
+    on the machine, with entries older than ttl_s treated as misses and least recently
+    used entries evicted once the stored values exceed max_bytes.
+    """
+
+    def __init__(self, name: str, max_items: int = 1024, path: str | None = None, ttl_s: float = 86400.0, max_bytes: int = 256 << 20):
+        self.name = name
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = 0
+
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection | None:
+        # CALLER HOLDS self.lock. OPENED ON FIRST USE, SO A PREFORKING PARENT (serve.py) THAT ONLY
+        # IMPORTS THIS MODULE NEVER CARRIES A SQLITE CONNECTION ACROSS fork()
+        if self._db is None and self.path:
+            db = sqlite3.connect(self.path, check_same_thread = False, isolation_level = None)
+            db.execute("pragma journal_mode = wal")
+            db.execute(
+                "create table if not exists results ("
+                "cache text, key text, value text, size integer, created real, accessed real, "
+                "primary key (cache, key))"
+            )
+            db.execute("create index if not exists results_accessed on results (cache, accessed)")
+            self._db = db
+        return self._db
+
+    def _remember(self, key: str, value: dict):
+        # CALLER HOLDS self.lock
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last = False)
+            self.evictions += 1
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self.memory[key]
+
+            if self.db is not None:
+                # A BROKEN OR LOCKED DISK TIER IS A MISS, NEVER A FAILED REQUEST
+                try:
+                    value = self._get_disk(key)
+                except sqlite3.Error as e:
+                    print(f"{self.name} cache read failed:", e)
+                    value = None
+                if value is not None:
+                    self._remember(key, value)
+                    self.hits["disk"] += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def _get_disk(self, key: str) -> dict | None:
+        # CALLER HOLDS self.lock
+        now = time.time()
+        row = self.db.execute(
+            "select value, created from results where cache = ? and key = ?", (self.name, key)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_s:
+            self.db.execute("delete from results where cache = ? and key = ?", (self.name, key))
+            return None
+        self.db.execute("update results set accessed = ? where cache = ? and key = ?", (now, self.name, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        with self.lock:
+            self._remember(key, value)
+            if self.db is None:
+                return
+            payload = json.dumps(value)
+            now = time.time()
+            try:
+                self.db.execute(
+                    "insert or replace into results values (?, ?, ?, ?, ?, ?)",
+                    (self.name, key, payload, len(payload), now, now),
+                )
+                self._evict_disk(now)
+            except sqlite3.Error as e:
+                print(f"{self.name} cache write failed:", e)
+
+    def _evict_disk(self, now: float):
+        # CALLER HOLDS self.lock. EXPIRED ROWS FIRST, THEN LEAST RECENTLY USED UNTIL UNDER max_bytes
+        self.db.execute("delete from results where cache = ? and created < ?", (self.name, now - self.ttl_s))
+        total = self.db.execute("select coalesce(sum(size), 0) from results where cache = ?", (self.name,)).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self.db.execute(
+            "select key, size from results where cache = ? order by accessed", (self.name,)
+        ):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((self.name, key))
+            freed += size
+        self.db.executemany("delete from results where cache = ? and key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            stats = {
+                "memory_items": len(self.memory),
+                "max_items": self.max_items,
+                "hits_memory": self.hits["memory"],
+                "hits_disk": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+            if self.db is not None:
+                items, size = self.db.execute(
+                    "select count(*), coalesce(sum(size), 0) from results where cache = ?", (self.name,)
+                ).fetchone()
+                stats.update(disk_items = items, disk_bytes = size, max_bytes = self.max_bytes)
+            return stats
+
+
+# CONFIGURED FROM ENV: RESULT_CACHE_ITEMS (PER CACHE, 0 DISABLES), RESULT_CACHE_PATH (SQLITE FILE, UNSET = MEMORY ONLY),
+# RESULT_CACHE_TTL (SECONDS ON DISK), RESULT_CACHE_MAX_MB (DISK SIZE PER CACHE)
+RESULT_CACHE_ITEMS = int(getenv("RESULT_CACHE_ITEMS", "1024"))
+RESULT_CACHE_PATH = getenv("RESULT_CACHE_PATH") or None
+RESULT_CACHE_TTL = float(getenv("RESULT_CACHE_TTL", "86400"))
+RESULT_CACHE_MAX_MB = float(getenv("RESULT_CACHE_MAX_MB", "256"))
+
+def make_cache(name: str) -> ResultCache | None:
+    if RESULT_CACHE_ITEMS <= 0:
+        return None
+    return ResultCache(name, RESULT_CACHE_ITEMS, RESULT_CACHE_PATH, RESULT_CACHE_TTL, int(RESULT_CACHE_MAX_MB * (1 << 20)))
+
+# TRANSCRIPT + TriageJSON + SEVERITY, AND EMOTION PREDICTIONS
+triage_cache = make_cache("triage")
+emotion_cache = make_cache("emotion")
+
+
+def all_stats() -> dict:
+    return {cache.name: cache.stats() for cache in (triage_cache, emotion_cache) if cache is not None}
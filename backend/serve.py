@@ -0,0 +1,142 @@
+"""
+Preforking production server for main:app.
+
+`uvicorn main:app --workers N` starts N fresh interpreters, and each one imports the
+app, unpickles its own emotion model and loads its own Whisper replicas, so model
+memory and cold start scale with N. Here the parent imports the app and warms the
+models once, freezes the heap (gc.freeze) and then fork()s the workers. Every worker
+shares the parent's model pages copy-on-write and only adds its own request state,
+and a crashed worker is replaced by a new fork that is ready at once.
+
+Each worker still runs the app lifespan (its own database pool and event listener)
+and answers GET /ready with 200 once its models are warm, so a load balancer or
+orchestrator readiness probe can use it directly.
+
+Whisper is preloaded for WHISPER_BACKEND=openai (the parent decodes single-threaded
+so no OpenMP pool exists at fork; workers then get --torch-threads each). The
+faster backend starts CTranslate2 threads when the model is built, which do not
+survive fork(), so with it every worker loads its own model in its lifespan.
+
+Run from the backend folder:
+    python serve.py --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+
+def preload(whisper: bool):
+    import main
+    import transcription
+    import voice_api
+
+    if whisper:
+        import torch
+        torch.set_num_threads(1)
+        transcription.warmup()
+        main.warm["whisper"] = True
+        print("Whisper Preloaded:", transcription.WHISPER_BACKEND, transcription.WHISPER_MODEL, "x", transcription.slots)
+    voice_api.warmup()
+    main.warm["emotion"] = True
+    return main.app
+
+
+def run_worker(app, sock: socket.socket, args):
+    # CHILD: DEFAULT SIGNALS UNTIL UVICORN INSTALLS ITS OWN, COLLECTION BACK ON (THE FROZEN HEAP STAYS UNTOUCHED)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    if args.preload_whisper:
+        import torch
+        torch.set_num_threads(args.torch_threads or max(1, (os.cpu_count() or 1) // args.workers))
+    config = uvicorn.Config(app, lifespan = "on", log_level = args.log_level, timeout_keep_alive = args.keep_alive)
+    uvicorn.Server(config).run(sockets = [sock])
+
+
+def main(args):
+    # NO COLLECTIONS WHILE THE MODELS LOAD, SO LONG-LIVED OBJECTS AREN'T INTERLEAVED WITH FREED HOLES
+    gc.disable()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+
+    start = time.perf_counter()
+    app = preload(args.preload_whisper)
+    print(f"Models loaded in {time.perf_counter() - start:.1f}s, forking {args.workers} workers")
+    # EVERYTHING ALIVE NOW MOVES TO THE PERMANENT GENERATION: WORKER COLLECTIONS NEVER WRITE TO THOSE PAGES
+    gc.freeze()
+
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, args)
+            except BaseException as e:
+                print("Worker Failed:", e)
+                code = 1
+            finally:
+                # NEVER RETURN INTO THE PARENT'S LOOP (OR ITS atexit HANDLERS)
+                os._exit(code)
+        workers[pid] = time.monotonic()
+        print("Worker Started:", pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if started is None:
+            continue
+        print("Worker Exited:", pid, "code", os.waitstatus_to_exitcode(status))
+        if not stopping:
+            # A WORKER THAT DIES STRAIGHT AFTER STARTING (e.g. BAD CONFIG) ISN'T RESPAWNED IN A TIGHT LOOP
+            if time.monotonic() - started < 5:
+                time.sleep(1)
+            spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Preforking server: models loaded once, shared by every worker")
+    parser.add_argument("--host", default = "0.0.0.0")
+    parser.add_argument("--port", type = int, default = 8000)
+    parser.add_argument("--workers", type = int, default = 2)
+    parser.add_argument("--backlog", type = int, default = 2048)
+    parser.add_argument("--keep-alive", type = int, default = 5, help = "Idle keep-alive timeout (s)")
+    parser.add_argument("--torch-threads", type = int, default = 0, help = "PyTorch threads per worker (0 = cores / workers)")
+    parser.add_argument("--no-preload-whisper", dest = "preload_whisper", action = "store_false",
+                        help = "Load Whisper in each worker instead of the parent")
+    parser.add_argument("--log-level", default = "info")
+    args = parser.parse_args()
+    if os.getenv("WHISPER_BACKEND", "openai") != "openai":
+        args.preload_whisper = False
+    main(args)
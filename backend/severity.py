@@ -0,0 +1,109 @@
+import json
+from collections import Counter
+from os import getenv
+from pathlib import Path
+
+import numpy as np
+
+RULES_DIR = Path(__file__).resolve().parent / "severity_rules"
+LABEL_FIELDS = ("event", "weapon", "injuries")
+MAX_UNKNOWN = 1000
+
+
+def normalise(label) -> str:
+    return str(label).strip().lower() if label is not None else ""
+
+
+class SeverityRules:
+    """
+    One versioned rule table (severity_rules/<version>.json): per-field label ranks,
+    the fallback rank for labels outside each table, the victim-count bins and the
+    feature weights. Labels are compiled to integer codes once, so scoring a batch
+    is a few array lookups and one weighted sum instead of dict lookups per record.
+    """
+
+    def __init__(self, table: dict):
+        self.version = table["version"]
+        self.table = table
+        self.weights = np.array([table["weights"][k] for k in ("event", "victims", "weapon", "injuries", "ongoing")])
+        self.victims_bins = np.array(table["victims_bins"])
+        # COMPARED EXACTLY, AS THE ORIGINAL calculate_severity DID: ANY OTHER TEXT (EVEN EMPTY OR MISSING) IS ONGOING
+        self.not_ongoing = table["ongoing"]["not_ongoing"]
+        self.ongoing_rank = float(table["ongoing"]["rank"])
+
+        # CODE i < len(labels) IS A KNOWN LABEL; THE LAST SLOT OF EACH RANK ARRAY IS THE FALLBACK
+        self.codes, self.ranks = {}, {}
+        for field in LABEL_FIELDS:
+            labels = {normalise(label): rank for label, rank in table["ranks"][field].items()}
+            self.codes[field] = {label: i for i, label in enumerate(labels)}
+            self.ranks[field] = np.array([*labels.values(), table["fallback"][field]], dtype=np.float64)
+        self.unknown = Counter()
+
+    def encode(self, field: str, labels) -> np.ndarray:
+        codes = self.codes[field]
+        fallback = len(codes)
+        encoded = np.fromiter((codes.get(normalise(label), fallback) for label in labels), dtype=np.intp)
+        if (encoded == fallback).any():
+            # COUNTS OF UNSEEN LABELS, SO A NEW TABLE VERSION CAN RANK THE COMMON ONES (BOUNDED)
+            for label, code in zip(labels, encoded):
+                key = f"{field}:{normalise(label)}"
+                if code == fallback and (key in self.unknown or len(self.unknown) < MAX_UNKNOWN):
+                    self.unknown[key] += 1
+        return encoded
+
+    def score_columns(self, event, victims, weapon, injuries, ongoing) -> np.ndarray:
+        """
+        Scores for column-wise inputs (sequences of equal length): label columns are
+        strings, victims is numeric, ongoing is the ongoing_threat text.
+        Same formula and rounding as the original per-record calculate_severity.
+        """
+        victims = np.asarray(victims, dtype=np.float64)
+        features = (
+            self.ranks["event"][self.encode("event", event)],
+            np.searchsorted(self.victims_bins, victims, side = "left"),
+            self.ranks["weapon"][self.encode("weapon", weapon)],
+            self.ranks["injuries"][self.encode("injuries", injuries)],
+            np.fromiter(
+                (self.ongoing_rank if text != self.not_ongoing else 0.0 for text in ongoing),
+                dtype=np.float64, count=len(victims),
+            ),
+        )
+        # SUMMED IN THE ORIGINAL ORDER (NOT A DOT PRODUCT) SO SCORES MATCH THE OLD FORMULA BIT FOR BIT
+        total = np.zeros(len(victims))
+        for column, weight in zip(features, self.weights):
+            total += column * weight
+        return np.round(total, 2)
+
+    def score_batch(self, records: list[dict]) -> np.ndarray:
+        return self.score_columns(
+            [r.get("event") for r in records],
+            [parse_victims(r.get("victims")) for r in records],
+            [r.get("weapon") for r in records],
+            [r.get("injuries") for r in records],
+            [r.get("ongoing_threat") for r in records],
+        )
+
+    def score(self, record: dict) -> float:
+        return float(self.score_batch([record])[0])
+
+
+def parse_victims(value) -> int:
+    # LLM OUTPUT IS AN INT, STORED JSON MAY HOLD A STRING OR NOTHING; THE PROMPT'S DEFAULT IS 1
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
+def load_rules(name: str) -> SeverityRules:
+    """
+    name is a version in severity_rules/ ("v1") or a path to a JSON rule table.
+    """
+    path = Path(name) if name.endswith(".json") else RULES_DIR / f"{name}.json"
+    with open(path) as f:
+        return SeverityRules(json.load(f))
+
+
+# ACTIVE RULE TABLE (SEVERITY_RULES = VERSION NAME OR PATH TO A JSON FILE)
+SEVERITY_RULES = getenv("SEVERITY_RULES", "v1")
+rules = load_rules(SEVERITY_RULES)
@@ -0,0 +1,73 @@
+import time
+
+# LOCAL KEYWORD-BASED STAND-IN FOR ChatMistralAI SO THE TRIAGE PIPELINE CAN RUN OFFLINE
+# ONLY SUPPORTS with_structured_output(...).invoke(...), NOT TOOL CALLING FOR THE AGENT
+
+event_keywords = {
+    "shooting": ["shot", "shooting", "gun", "shooter"],
+    "stabbing": ["stab", "stabbed", "knife"],
+    "fire": ["fire", "smoke", "burning", "flames"],
+    "medical emergency": ["not breathing", "heart attack", "unconscious", "overdose", "seizure"],
+    "traffic accident": ["crash", "car accident", "collision", "hit by a car"],
+    "robbery": ["robbed", "robbery", "stole", "break-in"],
+    "domestic violence": ["husband", "wife", "boyfriend", "girlfriend"],
+    "assault": ["attacked", "beating", "punched", "fight"],
+    "missing person": ["missing", "can't find"],
+}
+
+weapon_keywords = {
+    "firearm": ["gun", "shot", "rifle", "pistol"],
+    "blade": ["knife", "stab", "blade"],
+    "blunt object": ["bat", "hammer", "pipe"],
+    "explosive": ["bomb", "explosion"],
+}
+
+injury_keywords = {
+    "unresponsive": ["unresponsive", "not breathing", "unconscious"],
+    "critical bleeding": ["bleeding a lot", "blood everywhere", "bleeding badly"],
+    "severe burns": ["burned", "burns"],
+    "broken bones": ["broken", "fractured"],
+    "minor bleeding": ["bleeding", "cut"],
+    "minor injury": ["hurt", "injured", "bruised"],
+}
+
+ongoing_keywords = ["still here", "right now", "outside my", "he's coming", "she's coming", "hurry"]
+
+
+def first_match(text: str, table: dict, default: str):
+    for label, words in table.items():
+        if any(word in text for word in words):
+            return label
+    return default
+
+
+def extract_from_text(text: str) -> dict:
+    text = text.lower()
+    ongoing = next((word for word in ongoing_keywords if word in text), None)
+    return {
+        "event": first_match(text, event_keywords, "public disturbance"),
+        "victims": 1,
+        "injuries": first_match(text, injury_keywords, "none"),
+        "weapon": first_match(text, weapon_keywords, "none"),
+        "ongoing_threat": f"caller reports '{ongoing}'" if ongoing else "not ongoing",
+    }
+
+
+class StructuredStub:
+    def __init__(self, schema, latency: float):
+        self.schema = schema
+        self.latency = latency
+
+    def invoke(self, messages):
+        # LAST MESSAGE CARRIES THE TRANSCRIPT, MATCHING extract_triage()
+        time.sleep(self.latency)
+        _, transcript = messages[-1]
+        return self.schema(**extract_from_text(transcript))
+
+
+class StubTriageLLM:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def with_structured_output(self, schema):
+        return StructuredStub(schema, self.latency)
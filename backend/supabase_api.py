@@ -1,27 +1,79 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from psycopg import sql
 import psycopg
 import psycopg.rows
+import base64
 import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from os import getenv
+from call_events import broadcaster, publish_local, EVENT_COLUMNS
+import telemetry
 
 router = APIRouter(
     prefix= "/supabase",
     tags = ["supabase"]
 )
 
-# ESTABLISH CONNECTOIN
-connection = None
+# ESTABLISH CONNECTION POOL (DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT FROM ENV)
+pool = None
 
-def set_connection(new_connection: psycopg.Connection):
-    global connection
-    connection = new_connection
+def make_pool(conninfo: str) -> AsyncConnectionPool:
+    # check=... VALIDATES EACH CONNECTION ON CHECKOUT; BROKEN ONES ARE REPLACED IN THE BACKGROUND
+    return AsyncConnectionPool(
+        conninfo,
+        min_size = int(getenv("DB_POOL_MIN", "2")),
+        max_size = int(getenv("DB_POOL_MAX", "10")),
+        timeout = float(getenv("DB_POOL_TIMEOUT", "10")),
+        max_idle = 300,
+        reconnect_timeout = 300,
+        check = AsyncConnectionPool.check_connection,
+        open = False,
+    )
+
+def set_pool(new_pool: AsyncConnectionPool | None):
+    global pool
+    pool = new_pool
+
+class DatabaseUnavailable(Exception):
+    """
+    No connection within DB_POOL_TIMEOUT, or the server went away mid-query.
+    main.py answers 503 with Retry-After, like a full inference queue.
+    """
+    def __init__(self, detail: str, retry_after: int = int(getenv("DB_RETRY_AFTER", "5"))):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+@asynccontextmanager
+async def timed_connection(pool: AsyncConnectionPool, op: str):
+    # db.pool_wait = CHECKOUT (POOL EXHAUSTED OR RECONNECTING), db.<op> = QUERIES + THE COMMIT ON EXIT
+    start = time.time()
+    acquired = None
+    try:
+        async with pool.connection() as conn:
+            acquired = time.time()
+            telemetry.record_span("db.pool_wait", start, acquired)
+            yield conn
+    except PoolTimeout as e:
+        raise DatabaseUnavailable(f"Database unavailable: {e}") from e
+    except psycopg.OperationalError as e:
+        raise DatabaseUnavailable(f"Database connection failed: {e}") from e
+    finally:
+        if acquired is not None:
+            telemetry.record_span(f"db.{op}", acquired, time.time())
 
 # DATA VALIDATION SCHEMAS
 class KeyDetails(BaseModel):
     event: str = ""
     victims: int = 0
     ongoing_threat: str = ""
+    # KEPT SO STORED CALLS CAN BE RE-SCORED WHEN THE SEVERITY RULES CHANGE (rescore.py)
+    injuries: str | None = None
+    weapon: str | None = None
 
 
 class TableEntry(BaseModel):
@@ -32,51 +84,442 @@ class TableEntry(BaseModel):
     is_active: bool = True
     emotions: str = ""
 
+class CallUpdate(BaseModel):
+    emotional_sev: float | None = None
+    context_sev: float | None = None
+    is_active: bool | None = None
+
 # POST (ADD FULL RECORD)
-def new_record(connection: psycopg.Connection, values: dict):
+INSERT_QUERY = """
+    insert into call_severities (emotional_sev, context_sev, transcript, key_details, is_active, emotions)
+    values (%(emotional_sev)s, %(context_sev)s, %(transcript)s, %(key_details)s, %(is_active)s, %(emotions)s)
+    returning id, created_at
+"""
+
+def insert_params(values: dict) -> dict:
     details = values.copy()
     details['key_details'] = json.dumps(values['key_details'])
-    query = """
-        insert into call_severities (emotional_sev, context_sev, transcript, key_details, is_active, emotions)
-        values (%(emotional_sev)s, %(context_sev)s, %(transcript)s, %(key_details)s, %(is_active)s, %(emotions)s)
-        returning id
-    """
+    return details
 
-    with connection.cursor() as curs:
-        curs.execute(query, details)
-        entry_id = curs.fetchone()[0]
-        connection.commit()
-        return entry_id
+def insert_event(values: dict, entry_id: int, created_at: datetime) -> dict:
+    # SAME FIELDS AS THE NOTIFY TRIGGER PAYLOAD; created_at IS SET BY THE DATABASE
+    call = {col: values.get(col) for col in EVENT_COLUMNS}
+    call.update(id = entry_id, created_at = created_at, combined_sev = values['emotional_sev'] + values['context_sev'])
+    return {"type": "insert", "call": call}
+
+async def new_record(pool: AsyncConnectionPool, values: dict):
+    # pool.connection() COMMITS ON EXIT (ROLLS BACK ON ERROR) AND RETURNS THE CONNECTION
+    async with timed_connection(pool, "insert") as conn:
+        async with conn.cursor() as curs:
+            await curs.execute(INSERT_QUERY, insert_params(values))
+            entry_id, created_at = await curs.fetchone()
+
+    # PUBLISHED AFTER THE COMMIT ABOVE, SO SUBSCRIBERS NEVER SEE A ROLLED-BACK ROW
+    publish_local(insert_event(values, entry_id, created_at))
+    return entry_id
 
 @router.post("/", summary = "Add new processed call entry")
 async def add_new_call(call: TableEntry):
-    if connection is None:
+    if pool is None:
         raise HTTPException(status_code = 503, detail = "No database connection")
     try:
-        return await run_in_threadpool(new_record, connection, call.model_dump())
+        return await new_record(pool, call.model_dump())
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code = 500, detail = f"Insertion failed: {e}")
-    
+
+# POST (BULK INSERT: JSON LIST OR NDJSON, WRITTEN IN CHUNKED TRANSACTIONS)
+BULK_CHUNK = int(getenv("BULK_CHUNK", "500"))
+BULK_MAX_ROWS = int(getenv("BULK_MAX_ROWS", "100000"))
+
+async def insert_chunk(pool: AsyncConnectionPool, rows: list[dict]) -> list[tuple[int, datetime] | str]:
+    """
+    Insert one chunk in a single transaction with executemany (pipelined, one round trip
+    per chunk). If the chunk fails, retry it row by row under savepoints so one bad row
+    only costs itself; failed rows come back as their error message instead of (id, created_at).
+    """
+    params = [insert_params(values) for values in rows]
+    try:
+        async with timed_connection(pool, "insert_chunk") as conn:
+            async with conn.cursor() as curs:
+                await curs.executemany(INSERT_QUERY, params, returning = True)
+                ids = []
+                while True:
+                    ids.append(tuple(await curs.fetchone()))
+                    if not curs.nextset():
+                        break
+        return ids
+    except DatabaseUnavailable:
+        raise
+    except Exception:
+        if len(rows) == 1:
+            raise
+
+    results = []
+    async with timed_connection(pool, "insert_rows") as conn:
+        async with conn.cursor() as curs:
+            for row in params:
+                try:
+                    async with conn.transaction():
+                        await curs.execute(INSERT_QUERY, row)
+                        results.append(tuple(await curs.fetchone()))
+                except Exception as e:
+                    results.append(str(e))
+    return results
+
+async def bulk_rows(request: Request):
+    """
+    Yield (index, row) for every item in the body. NDJSON bodies are parsed line by line
+    as they arrive, so a long replay never has to sit in memory at once.
+    """
+    if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+        buffer, index = b"", 0
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code = 400, detail = "Body is not valid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code = 400, detail = "Expected a JSON list of calls")
+        for index, item in enumerate(items):
+            yield index, item
+
+async def bulk_insert(pool: AsyncConnectionPool, request: Request, chunk_size: int):
+    ids, errors = [], []
+    pending: list[tuple[int, dict]] = []
+
+    async def flush():
+        try:
+            results = await insert_chunk(pool, [values for _, values in pending])
+        except DatabaseUnavailable:
+            # NOTHING COMMITTED YET: THE WHOLE REQUEST IS RETRYABLE (503). AFTER THAT, EARLIER CHUNKS ARE
+            # ALREADY STORED, SO THE REST IS REPORTED PER ROW LIKE ANY OTHER FAILURE
+            if not any(entry_id is not None for entry_id in ids):
+                raise
+            results = ["Database unavailable"] * len(pending)
+        except Exception as e:
+            results = [str(e)] * len(pending)
+        inserted = []
+        for (index, values), result in zip(pending, results):
+            if isinstance(result, tuple):
+                ids[index] = result[0]
+                inserted.append(insert_event(values, *result))
+            else:
+                errors.append({"index": index, "error": result})
+        # A BACKFILL WOULD OVERFLOW EVERY CLIENT BUFFER ANYWAY; ONE RESYNC IS CHEAPER
+        if len(inserted) > broadcaster.buffer_size:
+            publish_local({"type": "resync"})
+        else:
+            for event in inserted:
+                publish_local(event)
+        pending.clear()
+
+    async for index, item in bulk_rows(request):
+        if index >= BULK_MAX_ROWS:
+            # EARLIER CHUNKS ARE ALREADY COMMITTED, SO REPORT THE CUTOFF INSTEAD OF FAILING THE REQUEST
+            errors.append({"index": index, "error": f"Row limit of {BULK_MAX_ROWS} reached, rest of the body ignored"})
+            break
+        # ids STAYS ALIGNED WITH THE INPUT: EACH SLOT IS FILLED ONCE ITS CHUNK IS COMMITTED
+        ids.append(None)
+        try:
+            entry = TableEntry.model_validate_json(item) if isinstance(item, bytes) else TableEntry.model_validate(item)
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        pending.append((index, entry.model_dump()))
+        if len(pending) >= chunk_size:
+            await flush()
+    if pending:
+        await flush()
+
+    return {"inserted": sum(entry_id is not None for entry_id in ids), "ids": ids, "errors": errors}
+
+@router.post("/bulk", summary = "Insert many calls (JSON list or NDJSON) in chunked transactions")
+async def add_calls_bulk(request: Request, chunk_size: int = Query(BULK_CHUNK, ge = 1, le = 10000)):
+    if pool is None:
+        raise HTTPException(status_code = 503, detail = "No database connection")
+    if request.headers.get("content-length"):
+        telemetry.observe_size("bulk", int(request.headers["content-length"]))
+    return await bulk_insert(pool, request, chunk_size)
+
 # GET (ALL ACTIVE RECORDS)
-def records_by_active(connection: psycopg.Connection, is_active: bool):
+async def records_by_active(pool: AsyncConnectionPool, is_active: bool):
     query = """select * from call_severities where is_active = %(is_active)s;"""
     clean_json_recs = []
 
-    with connection.cursor(row_factory = psycopg.rows.dict_row) as curs:
-        curs.execute(query, {'is_active': is_active})
-        raw_json_recs = curs.fetchall()
+    async with timed_connection(pool, "active") as conn:
+        async with conn.cursor(row_factory = psycopg.rows.dict_row) as curs:
+            await curs.execute(query, {'is_active': is_active})
+            raw_json_recs = await curs.fetchall()
 
-        for entry in raw_json_recs:
-            if isinstance(entry['key_details'], str):
-                entry['key_details'] = json.loads(entry['key_details'])
-            clean_json_recs.append(entry)
-        return clean_json_recs
+            for entry in raw_json_recs:
+                if isinstance(entry['key_details'], str):
+                    entry['key_details'] = json.loads(entry['key_details'])
+                clean_json_recs.append(entry)
+            return clean_json_recs
 
 @router.get("/active", summary = "Get active records")
 async def get_active():
-    if connection is None:
+    if pool is None:
         raise HTTPException(status_code = 503, detail = "No database connection")
     try:
-        return await run_in_threadpool(records_by_active, connection, True)
+        return await records_by_active(pool, True)
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
-        raise HTTPException(status_code = 500, detail = f"Error while querying: {e}")
\ No newline at end of file
+        raise HTTPException(status_code = 500, detail = f"Error while querying: {e}")
+
+
+# GET (SEVERITY-ORDERED QUEUE, KEYSET PAGINATED; NEEDS migrations/001_call_queue.sql)
+QUEUE_COLUMNS = ["id", "created_at", "emotional_sev", "context_sev", "combined_sev", "transcript", "key_details", "is_active", "emotions"]
+# LIST VIEWS SKIP THE (LARGE) TRANSCRIPT UNLESS ASKED FOR
+DEFAULT_QUEUE_FIELDS = [col for col in QUEUE_COLUMNS if col != "transcript"]
+# ALWAYS RETURNED: THE KEYSET COLUMNS
+KEYSET_COLUMNS = ["combined_sev", "created_at", "id"]
+
+def encode_cursor(combined_sev: float, created_at: datetime, entry_id: int) -> str:
+    raw = json.dumps([combined_sev, created_at.isoformat(), entry_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    combined_sev, created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(combined_sev), datetime.fromisoformat(created_at), int(entry_id)
+
+async def queue_page(pool: AsyncConnectionPool, is_active: bool, fields: list[str], limit: int, cursor: str | None):
+    columns = [col for col in QUEUE_COLUMNS if col in fields or col in KEYSET_COLUMNS]
+    params = {'is_active': is_active, 'limit': limit}
+    keyset = sql.SQL("")
+    if cursor:
+        params['sev'], params['created_at'], params['id'] = decode_cursor(cursor)
+        keyset = sql.SQL("and (combined_sev, created_at, id) < (%(sev)s::real, %(created_at)s, %(id)s)")
+
+    # POSTGRES SERIALIZES EACH ROW (row_to_json), SO PYTHON NEVER PARSES key_details OR TRANSCRIPTS
+    query = sql.SQL("""
+        select row_to_json(page)::text, page.combined_sev, page.created_at, page.id
+        from (
+            select {columns} from call_severities
+            where is_active = %(is_active)s {keyset}
+            order by combined_sev desc, created_at desc, id desc
+            limit %(limit)s
+        ) page
+        order by page.combined_sev desc, page.created_at desc, page.id desc
+    """).format(columns = sql.SQL(", ").join(map(sql.Identifier, columns)), keyset = keyset)
+
+    async with timed_connection(pool, "queue") as conn:
+        async with conn.cursor() as curs:
+            await curs.execute(query, params)
+            rows = await curs.fetchall()
+
+    next_cursor = encode_cursor(*rows[-1][1:]) if len(rows) == limit else None
+    return '{"items": [' + ",".join(row[0] for row in rows) + '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+
+@router.get("/queue", summary = "Severity-ordered call queue with keyset pagination")
+async def get_queue(
+    active: bool = True,
+    limit: int = Query(50, ge = 1, le = 500),
+    cursor: str | None = Query(None, description = "next_cursor from the previous page"),
+    fields: str | None = Query(None, description = f"Comma-separated columns from {QUEUE_COLUMNS}; transcript is omitted by default")
+):
+    if pool is None:
+        raise HTTPException(status_code = 503, detail = "No database connection")
+
+    requested = fields.split(",") if fields else DEFAULT_QUEUE_FIELDS
+    unknown = [field for field in requested if field not in QUEUE_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code = 400, detail = f"Unknown fields: {unknown}")
+    try:
+        if cursor:
+            decode_cursor(cursor)
+    except Exception:
+        raise HTTPException(status_code = 400, detail = "Invalid cursor")
+
+    try:
+        body = await queue_page(pool, active, requested, limit, cursor)
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code = 500, detail = f"Error while querying: {e}")
+    return Response(content = body, media_type = "application/json")
+
+
+# GET (RANKED TRANSCRIPT SEARCH, KEYSET PAGINATED; NEEDS migrations/004_transcript_search.sql)
+# q USES WEB SEARCH SYNTAX: "exact phrase", or, -excluded
+SEARCH_CANDIDATES = int(getenv("SEARCH_CANDIDATES", "1000"))
+SNIPPET_OPTIONS = "MaxFragments=2, MinWords=5, MaxWords=15, FragmentDelimiter=' ... '"
+
+def encode_search_cursor(rank: float, entry_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, entry_id]).encode()).decode()
+
+def decode_search_cursor(cursor: str):
+    rank, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(rank), int(entry_id)
+
+async def search_page(pool: AsyncConnectionPool, text: str, filters: dict, limit: int, cursor: str | None):
+    """
+    One page of calls whose transcript matches text, best ts_rank_cd first (newest first on ties).
+    Only the SEARCH_CANDIDATES newest matches are ranked, so a query matching most of the
+    table costs about the same as a selective one; "truncated" says when older matches were left out.
+    Snippets (ts_headline re-parses the transcript) are built for the returned page only.
+    """
+    params = {'q': text, 'limit': limit, 'candidates': SEARCH_CANDIDATES + 1, 'snippet': SNIPPET_OPTIONS, **filters}
+    conditions = [sql.SQL("c.transcript_tsv @@ websearch_to_tsquery('english', %(q)s)")]
+    if filters.get('event') is not None:
+        # SERVED BY THE jsonb_path_ops GIN INDEX
+        conditions.append(sql.SQL("c.key_details @> %(event_details)s::jsonb"))
+        params['event_details'] = json.dumps({'event': filters['event']})
+    if filters.get('active') is not None:
+        conditions.append(sql.SQL("c.is_active = %(active)s"))
+    if filters.get('min_sev') is not None:
+        conditions.append(sql.SQL("c.combined_sev >= %(min_sev)s"))
+    if filters.get('max_sev') is not None:
+        conditions.append(sql.SQL("c.combined_sev <= %(max_sev)s"))
+    if filters.get('since') is not None:
+        conditions.append(sql.SQL("c.created_at >= %(since)s"))
+    if filters.get('until') is not None:
+        conditions.append(sql.SQL("c.created_at < %(until)s"))
+    keyset = sql.SQL("")
+    if cursor:
+        params['rank'], params['id'] = decode_search_cursor(cursor)
+        keyset = sql.SQL("where (rank, id) < (%(rank)s::real, %(id)s)")
+
+    # POSTGRES SERIALIZES EACH ROW (row_to_json), SO PYTHON NEVER PARSES key_details OR TRANSCRIPTS
+    query = sql.SQL("""
+        with candidates as (
+            select c.id, ts_rank_cd(c.transcript_tsv, websearch_to_tsquery('english', %(q)s)) as rank
+            from call_severities c
+            where {conditions}
+            order by c.id desc
+            limit %(candidates)s
+        ),
+        hits as (
+            select * from (select id, rank, count(*) over () as n_candidates from candidates) counted {keyset}
+            order by rank desc, id desc
+            limit %(limit)s
+        )
+        select row_to_json(page)::text, hits.rank, hits.id, hits.n_candidates
+        from hits, lateral (
+            select {columns}, hits.rank, ts_headline('english', c.transcript, websearch_to_tsquery('english', %(q)s), %(snippet)s) as snippet
+            from call_severities c
+            where c.id = hits.id
+        ) page
+        order by hits.rank desc, hits.id desc
+    """).format(
+        conditions = sql.SQL(" and ").join(conditions),
+        keyset = keyset,
+        columns = sql.SQL(", ").join(sql.SQL("c.{}").format(sql.Identifier(col)) for col in DEFAULT_QUEUE_FIELDS),
+    )
+
+    async with timed_connection(pool, "search") as conn:
+        async with conn.cursor() as curs:
+            # NEVER A PREPARED (GENERIC) PLAN: HOW SELECTIVE THE WORDS ARE DECIDES BETWEEN THE GIN INDEX AND A NEWEST-FIRST SCAN
+            await curs.execute(query, params, prepare = False)
+            rows = await curs.fetchall()
+
+    next_cursor = encode_search_cursor(rows[-1][1], rows[-1][2]) if len(rows) == limit else None
+    # matches = RANKED CANDIDATES (ALL MATCHES UNLESS truncated); ONE EXTRA CANDIDATE IS FETCHED TO DETECT THE CAP
+    matches = rows[0][3] if rows else 0
+    meta = {"matches": min(matches, SEARCH_CANDIDATES), "truncated": matches > SEARCH_CANDIDATES}
+    return '{"items": [' + ",".join(row[0] for row in rows) + '], "next_cursor": ' + json.dumps(next_cursor) + ", " + json.dumps(meta)[1:]
+
+@router.get("/search", summary = "Ranked full-text search over call transcripts")
+async def search_calls(
+    q: str = Query(..., min_length = 1, max_length = 200, description = 'Words to find, e.g. oak street "red hoodie" -fire'),
+    event: str | None = Query(None, description = "Only calls with this key_details event"),
+    active: bool | None = None,
+    min_sev: float | None = Query(None, description = "Lowest combined_sev"),
+    max_sev: float | None = Query(None, description = "Highest combined_sev"),
+    since: datetime | None = Query(None, description = "Calls created at or after this time"),
+    until: datetime | None = Query(None, description = "Calls created before this time"),
+    limit: int = Query(20, ge = 1, le = 100),
+    cursor: str | None = Query(None, description = "next_cursor from the previous page"),
+):
+    if pool is None:
+        raise HTTPException(status_code = 503, detail = "No database connection")
+    try:
+        if cursor:
+            decode_search_cursor(cursor)
+    except Exception:
+        raise HTTPException(status_code = 400, detail = "Invalid cursor")
+
+    filters = {'event': event, 'active': active, 'min_sev': min_sev, 'max_sev': max_sev, 'since': since, 'until': until}
+    try:
+        body = await search_page(pool, q, filters, limit, cursor)
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code = 500, detail = f"Error while searching: {e}")
+    return Response(content = body, media_type = "application/json")
+
+# PATCH (SEVERITY CHANGES / DEACTIVATION)
+async def update_record(pool: AsyncConnectionPool, entry_id: int, changes: dict):
+    assignments = sql.SQL(", ").join(
+        sql.SQL("{} = {}").format(sql.Identifier(col), sql.Placeholder(col)) for col in changes
+    )
+    query = sql.SQL("update call_severities set {} where id = %(id)s returning {}").format(
+        assignments, sql.SQL(", ").join(map(sql.Identifier, EVENT_COLUMNS))
+    )
+    async with timed_connection(pool, "update") as conn:
+        async with conn.cursor(row_factory = psycopg.rows.dict_row) as curs:
+            await curs.execute(query, {**changes, 'id': entry_id})
+            call = await curs.fetchone()
+
+    if call is not None:
+        if changes.get('is_active') is False:
+            kind = "deactivated"
+        elif 'emotional_sev' in changes or 'context_sev' in changes:
+            kind = "severity"
+        else:
+            kind = "update"
+        publish_local({"type": kind, "call": call})
+    return call
+
+@router.patch("/{entry_id}", summary = "Update severities or deactivate a call")
+async def patch_call(entry_id: int, update: CallUpdate):
+    if pool is None:
+        raise HTTPException(status_code = 503, detail = "No database connection")
+    changes = update.model_dump(exclude_none = True)
+    if not changes:
+        raise HTTPException(status_code = 400, detail = "No changes given")
+    try:
+        call = await update_record(pool, entry_id, changes)
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code = 500, detail = f"Update failed: {e}")
+    if call is None:
+        raise HTTPException(status_code = 404, detail = f"No call with id {entry_id}")
+    return call
+
+# SERVER-SENT EVENTS: ROW-LEVEL DELTAS ONLY ({"type": insert|severity|deactivated|update|resync, "call": {...}})
+@router.get("/events", summary = "Stream call inserts and updates as server-sent events")
+async def call_events(heartbeat: float = Query(15.0, ge = 1.0, le = 60.0)):
+    subscriber = broadcaster.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                batch = await subscriber.next_batch(heartbeat)
+                if not batch:
+                    # COMMENT LINE KEEPS PROXIES FROM CLOSING AN IDLE STREAM
+                    yield ": ping\n\n"
+                    continue
+                yield "".join(f"data: {event}\n\n" for event in batch)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type = "text/event-stream",
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
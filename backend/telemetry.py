@@ -0,0 +1,222 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import getenv
+
+# CONFIGURED FROM ENV: TELEMETRY_ENABLED (SPANS + HISTOGRAMS, DEFAULT ON), TRACE_ENABLED (ALSO KEEP CHROME TRACE
+# EVENTS, DEFAULT OFF), TRACE_MAX_EVENTS (RING BUFFER SIZE), TRACE_PATH (FILE WRITTEN AT SHUTDOWN)
+enabled = getenv("TELEMETRY_ENABLED", "1") == "1"
+trace_enabled = getenv("TRACE_ENABLED", "0") == "1"
+TRACE_MAX_EVENTS = int(getenv("TRACE_MAX_EVENTS", "100000"))
+TRACE_PATH = getenv("TRACE_PATH") or None
+
+# SECONDS: 1 ms .. 2 min COVERS A SEVERITY LOOKUP UP TO A LONG WHISPER DECODE OR AGENT LOOP
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# BYTES: 1 KiB .. 64 MiB
+SIZE_BUCKETS = tuple(float(1 << n) for n in range(10, 27, 2))
+
+# TRACE LANE FOR THE CURRENT REQUEST (SET BY THE HTTP MIDDLEWARE); SPANS OUTSIDE A REQUEST USE THEIR THREAD
+trace_lane: ContextVar[int | None] = ContextVar("trace_lane", default = None)
+
+# perf_counter FOR DURATIONS, ANCHORED TO THE WALL CLOCK SO WORKER TIMESTAMPS (time.time) LINE UP IN THE TRACE
+_WALL_US = time.time() * 1e6
+_PERF_NS = time.perf_counter_ns()
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed buckets and one series per label tuple.
+    observe() is a bisect and three additions under a lock.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # [PER-BUCKET COUNTS (+Inf LAST), SUM, COUNT]
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {labels: ([*counts], total, count) for labels, (counts, total, count) in self.series.items()}
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            base = ",".join(f'{k}="{escape(v)}"' for k, v in zip(self.label_names, labels))
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stage_seconds = Histogram("triage_stage_seconds", "Time spent in each pipeline stage (model, llm, db, audio, ...)", ("stage",))
+request_seconds = Histogram("http_request_seconds", "End-to-end HTTP request latency", ("method", "route", "status"))
+queue_wait_seconds = Histogram("inference_queue_wait_seconds", "Time a model call waited for a pool worker", ("pool",))
+payload_bytes = Histogram("payload_bytes", "Size of uploaded audio and request bodies", ("endpoint",), SIZE_BUCKETS)
+HISTOGRAMS = [request_seconds, stage_seconds, queue_wait_seconds, payload_bytes]
+
+trace_events = deque(maxlen = TRACE_MAX_EVENTS)
+
+
+def _trace(name: str, ts_us: float, dur_us: float, lane: int | None, args: dict | None):
+    event = {"name": name, "cat": name.split(" ", 1)[0].split(".", 1)[0], "ph": "X", "ts": ts_us, "dur": dur_us,
+             "pid": os.getpid(), "tid": lane if lane is not None else threading.get_ident()}
+    if args:
+        event["args"] = args
+    trace_events.append(event)
+
+
+@contextmanager
+def span(stage: str, **args):
+    """
+    Time a block as one pipeline stage: observed in triage_stage_seconds{stage=...} and,
+    with TRACE_ENABLED=1, kept as a Chrome trace event on the current request's lane.
+    """
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        stage_seconds.observe((end - start) / 1e9, stage)
+        if trace_enabled:
+            _trace(stage, _WALL_US + (start - _PERF_NS) / 1000, (end - start) / 1000, trace_lane.get(), args)
+
+
+def traced(stage: str):
+    """
+    Decorator form of span() for functions that are always one stage.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record_span(stage: str, started_at: float, finished_at: float, histogram: Histogram | None = None,
+                labels: tuple[str, ...] = (), lane: int | None = None):
+    """
+    Record a stage measured elsewhere (wall-clock seconds, e.g. from a pool worker process).
+    Observed in histogram (default triage_stage_seconds{stage=...}) under labels; lane
+    defaults to the current request's.
+    """
+    if not enabled:
+        return
+    seconds = max(0.0, finished_at - started_at)
+    if histogram is None:
+        stage_seconds.observe(seconds, stage)
+    else:
+        histogram.observe(seconds, *labels)
+    if trace_enabled:
+        _trace(stage, started_at * 1e6, seconds * 1e6, lane if lane is not None else trace_lane.get(), None)
+
+
+def observe_size(endpoint: str, size: int):
+    if enabled:
+        payload_bytes.observe(float(size), endpoint)
+
+
+_lanes = itertools.count(1)
+
+
+class TelemetryMiddleware:
+    """
+    ASGI middleware: http_request_seconds per route template (not raw path, so ids don't
+    explode the series) and a trace lane per request, so concurrent requests' spans
+    don't interleave in the Chrome trace. Routes in skip (long-lived streams, the
+    metrics endpoint itself) are passed through untimed.
+    """
+
+    def __init__(self, app, skip: set[str] = frozenset()):
+        self.app = app
+        self.skip = skip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled or scope["path"] in self.skip:
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        lane = next(_lanes)
+        token = trace_lane.set(lane)
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            end = time.perf_counter_ns()
+            trace_lane.reset(token)
+            # FASTAPI STORES THE MATCHED ROUTE IN THE SCOPE
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe((end - start) / 1e9, scope["method"], route, str(status))
+            if trace_enabled:
+                _trace(f"http {scope['method']} {route}", _WALL_US + (start - _PERF_NS) / 1000, (end - start) / 1000, lane, {"status": status})
+
+
+def expose(extra: list[str] | None = None) -> str:
+    """
+    Prometheus text exposition of every histogram, plus caller-supplied gauge lines.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    lines.extend(extra or [])
+    return "\n".join(lines) + "\n"
+
+
+def gauge(name: str, help_text: str, samples: dict, kind: str = "gauge") -> list[str]:
+    # samples: {((label, value), ...): sample}; kind="counter" FOR MONOTONIC TOTALS KEPT ELSEWHERE
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        base = ",".join(f'{k}="{escape(v)}"' for k, v in labels)
+        lines.append(f"{name}{{{base}}} {value}")
+    return lines
+
+
+def chrome_trace() -> dict:
+    # LOAD IN chrome://tracing OR https://ui.perfetto.dev
+    return {"traceEvents": list(trace_events), "displayTimeUnit": "ms"}
+
+
+def dump_trace(path: str | None = TRACE_PATH):
+    if path and trace_events:
+        with open(path, "w") as f:
+            json.dump(chrome_trace(), f)
+        print("Trace written:", path, len(trace_events), "events")
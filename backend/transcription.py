@@ -0,0 +1,189 @@
+import importlib.util
+import queue
+import threading
+import time
+import zlib
+from os import getenv
+
+import numpy as np
+
+from audio_io import WHISPER_SR, decode_audio_bytes
+from inference_pool import INFERENCE_MODE, WHISPER_WORKERS
+import telemetry
+
+# CONFIGURED FROM ENV:
+#   WHISPER_BACKEND=openai (openai-whisper, PyTorch) | faster (faster-whisper / CTranslate2) | stub (canned transcripts, load tests)
+#   WHISPER_MODEL=tiny|base|small|... (same names for both backends)
+#   WHISPER_COMPUTE_TYPE=int8 (faster only: int8, int8_float32, float32, ...)
+#   WHISPER_THREADS=0 (faster only: CPU threads per replica, 0 = CTranslate2 default)
+WHISPER_BACKEND = getenv("WHISPER_BACKEND", "openai")
+WHISPER_MODEL = getenv("WHISPER_MODEL", "base")
+WHISPER_COMPUTE_TYPE = getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_THREADS = int(getenv("WHISPER_THREADS", "0"))
+WHISPER_STUB_LATENCY = float(getenv("WHISPER_STUB_LATENCY", "0"))
+
+
+class OpenAIWhisper:
+    """
+    Reference openai-whisper model. Not safe to call concurrently: it installs KV-cache
+    hooks on the model per decode, so every concurrent transcription needs its own replica.
+    """
+    concurrent = False
+
+    def __init__(self, model_size: str):
+        # IMPORTED HERE SO MODULES THAT NEVER TRANSCRIBE DON'T PAY FOR TORCH
+        import whisper
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio: str | np.ndarray, **options) -> dict:
+        return self.model.transcribe(audio, **options)
+
+
+class FasterWhisper:
+    """
+    CTranslate2 port of the same checkpoints (faster-whisper), quantized to int8 on CPU by
+    default. One model serves `workers` concurrent calls, so it is shared, not replicated.
+    Results are converted to openai-whisper's {"text", "segments", "language"} shape.
+    """
+    concurrent = True
+
+    def __init__(self, model_size: str, compute_type: str = "int8", cpu_threads: int = 0, workers: int = 1):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            model_size,
+            device = "cpu",
+            compute_type = compute_type,
+            cpu_threads = cpu_threads,
+            num_workers = workers,
+        )
+
+    def transcribe(self, audio: str | np.ndarray, **options) -> dict:
+        segments, info = self.model.transcribe(audio, **options)
+        # segments IS A LAZY GENERATOR: DECODING ACTUALLY HAPPENS WHILE IT IS CONSUMED
+        segments = [
+            {"id": i, "start": seg.start, "end": seg.end, "text": seg.text}
+            for i, seg in enumerate(segments)
+        ]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+
+# STUB TRANSCRIPTS COVER SEVERAL EVENTS SO THE KEYWORD STUB LLM (stub_llm.py) PRODUCES VARIED TRIAGE
+STUB_TRANSCRIPTS = [
+    "There's smoke and flames coming out of the building next door, please hurry.",
+    "Someone was shot outside my house, he's bleeding a lot and the shooter is still here.",
+    "My father collapsed, he's unconscious and not breathing.",
+    "There was a crash at the intersection, one driver is hurt.",
+    "Somebody broke in and stole my laptop while I was out.",
+]
+
+
+class StubWhisper:
+    """
+    Offline stand-in for load tests: sleeps for a fixed latency and returns one of
+    STUB_TRANSCRIPTS, picked by a checksum of the audio so the same upload always
+    gets the same text. Same {"text", "segments", "language"} shape as the real backends,
+    with one segment spanning the whole input so streaming sessions commit audio as usual.
+    """
+    concurrent = True
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def transcribe(self, audio: str | np.ndarray, **options) -> dict:
+        if isinstance(audio, np.ndarray):
+            checksum = zlib.crc32(audio.tobytes())
+        else:
+            with open(audio, "rb") as f:
+                data = f.read()
+            checksum = zlib.crc32(data)
+            # FILES ARE DECODED LIKE THE REAL BACKENDS DO, FOR THE DURATION
+            audio = decode_audio_bytes(data)
+        time.sleep(self.latency)
+        text = STUB_TRANSCRIPTS[checksum % len(STUB_TRANSCRIPTS)]
+        end = round(len(audio) / WHISPER_SR, 2)
+        return {"text": text, "segments": [{"id": 0, "start": 0.0, "end": end, "text": text}], "language": "en"}
+
+
+# IMPORT NAME AND INSTALL HINT PER BACKEND; faster-whisper IS OPTIONAL (requirements-faster.txt)
+BACKEND_PACKAGES = {
+    "openai": ("whisper", "pip install -r requirements.txt"),
+    "faster": ("faster_whisper", "pip install -r requirements-faster.txt"),
+}
+
+def check_backend(name: str = WHISPER_BACKEND):
+    """
+    Fail at startup, not on the first call, when the configured backend isn't installed.
+    """
+    if name not in BACKEND_PACKAGES:
+        return
+    module, hint = BACKEND_PACKAGES[name]
+    if importlib.util.find_spec(module) is None:
+        raise RuntimeError(f"WHISPER_BACKEND={name} needs the {module} package, which is not installed ({hint})")
+
+
+def make_backend(name: str = WHISPER_BACKEND, model_size: str = WHISPER_MODEL, workers: int = 1):
+    if name == "openai":
+        return OpenAIWhisper(model_size)
+    if name == "faster":
+        return FasterWhisper(model_size, WHISPER_COMPUTE_TYPE, WHISPER_THREADS, workers)
+    if name == "stub":
+        return StubWhisper(WHISPER_STUB_LATENCY)
+    raise ValueError(f"Unknown WHISPER_BACKEND {name!r}, expected 'openai', 'faster' or 'stub'")
+
+
+class Transcriber:
+    """
+    Lazily loaded set of transcription replicas. Nothing is loaded until the first
+    transcribe() (or an explicit warmup()), so importing the API modules stays cheap.
+    Each call checks out a replica for its duration; backends that are safe to call
+    concurrently share one model across all slots.
+    """
+
+    def __init__(self, factory, slots: int = 1):
+        self.factory = factory
+        self.slots = slots
+        self.replicas = queue.Queue()
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            model = self.factory()
+            self.replicas.put(model)
+            for _ in range(self.slots - 1):
+                self.replicas.put(model if getattr(model, "concurrent", False) else self.factory())
+            self.loaded = True
+
+    def transcribe(self, audio: str | np.ndarray, **options) -> dict:
+        if not self.loaded:
+            with telemetry.span("model.whisper.load"):
+                self.load()
+        # WAIT FOR A FREE REPLICA (NONZERO ONLY WHEN CALLERS BYPASS whisper_pool)
+        with telemetry.span("model.whisper.replica_wait"):
+            model = self.replicas.get()
+        try:
+            with telemetry.span("model.whisper"):
+                return model.transcribe(audio, **options)
+        finally:
+            self.replicas.put(model)
+
+
+# THREAD WORKERS SHARE THIS PROCESS AND NEED ONE SLOT EACH; PROCESS WORKERS EACH IMPORT THEIR OWN
+slots = WHISPER_WORKERS if INFERENCE_MODE == "thread" else 1
+transcriber = Transcriber(lambda: make_backend(workers = slots), slots)
+
+
+# MODULE-LEVEL SO THEY CAN BE SENT TO whisper_pool WORKERS IN EITHER MODE
+def transcribe_local(audio: str | np.ndarray, **options) -> dict:
+    return transcriber.transcribe(audio, **options)
+
+def warmup():
+    # LOAD EVERY REPLICA AND RUN ONE SHORT DECODE SO THE FIRST REAL CALL PAYS NO SETUP COST
+    transcriber.load()
+    transcriber.transcribe(np.zeros(WHISPER_SR, dtype = np.float32))
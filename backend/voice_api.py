@@ -1,10 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import joblib
 import numpy as np
-import tempfile
 from pathlib import Path
+from os import getenv
 
-from voice_features import extract_features, emotion_to_score
+from fastapi.concurrency import run_in_threadpool
+from voice_features import extract_features_batch, extract_window_features, emotion_to_score, FEATURE_VERSION
+from audio_io import resample, decode_audio_bytes, bytes_digest, file_digest, WHISPER_SR, AudioDecodeError
+from audio_preprocessing import VAD_ENABLED, detect_speech, speech_only, to_original_time
+from inference_pool import emotion_pool, SchedulerFull
+from result_cache import emotion_cache, cache_key
+from compact_forest import CompactForest
+import telemetry
 
 
 router = APIRouter(
@@ -14,31 +21,56 @@ router = APIRouter(
 
 
 MODEL_PATH = Path(__file__).resolve().parent / "emotion_model.pkl"
+COMPACT_PATH = Path(__file__).resolve().parent / "emotion_model_compact"
+# EMOTION_MODEL_FORMAT=auto (COMPACT ARTIFACT IF EXPORTED, ELSE PICKLE) | compact | pickle
+EMOTION_MODEL_FORMAT = getenv("EMOTION_MODEL_FORMAT", "auto")
 
-bundle = joblib.load(MODEL_PATH)
-rf_model = bundle["model"]
-label_encoder = bundle["label_encoder"]
-feature_cols = bundle["feature_columns"]
+def load_emotion_model(model_format: str = EMOTION_MODEL_FORMAT):
+    """
+    Returns (model with predict_proba, class labels, feature columns, source model digest).
+    The compact artifact (voice_model.export_compact) is memory-mapped and loads in
+    milliseconds; the pickle needs a full unpickle of the sklearn forest.
+    """
+    if model_format == "compact" or (model_format == "auto" and (COMPACT_PATH / "meta.json").exists()):
+        forest = CompactForest(COMPACT_PATH)
+        return forest, forest.classes, forest.feature_columns, forest.meta["source_digest"]
+    bundle = joblib.load(MODEL_PATH)
+    model = bundle["model"]
+    classes = bundle["label_encoder"].inverse_transform(model.classes_)
+    return model, classes, bundle["feature_columns"], file_digest(MODEL_PATH)
 
+rf_model, class_labels, feature_cols, model_digest = load_emotion_model()
 
+# FEATURES ARE EXTRACTED AT THIS RATE DURING TRAINING (voice_features.extract_features DEFAULTS)
+FEATURE_SR = 22050
+MAX_DURATION = 5.0
+# WITH VAD, UP TO THIS MUCH OF AN UPLOAD IS SCANNED FOR THE FIRST MAX_DURATION SECONDS OF SPEECH
+VAD_SCAN_S = 30.0
+# TIMELINE MODE: THE WHOLE CALL (UP TO TIMELINE_MAX_S) IN MAX_DURATION WINDOWS STARTING EVERY TIMELINE_HOP_S
+TIMELINE_HOP_S = float(getenv("EMOTION_TIMELINE_HOP_S", "2.5"))
+TIMELINE_MAX_S = float(getenv("EMOTION_TIMELINE_MAX_S", "3600"))
 
-@router.post("/")
-async def predict_audio(audio: UploadFile = File(...)):
-    if audio.content_type not in ("audio/wav", "audio/x-wav", "audio/wave", "audio/mpeg", "audio/mp3"):
-        raise HTTPException(status_code=400, detail="Please upload a WAV file")
-    
-    ext = Path(audio.filename).suffix or ".wav"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-        tmp.write(await audio.read())
-        tmp_path = tmp.name
-    
-    feats = extract_features(tmp_path)
+# RESULT CACHE KEYS CHANGE WHEN THE MODEL FILE OR THE FEATURE PIPELINE DOES
+# BOTH FORMATS OF THE SAME MODEL SHARE A DIGEST (THEIR PROBABILITIES MATCH)
+EMOTION_VERSION = f"{model_digest[:16]}|{FEATURE_VERSION}|{FEATURE_SR}|{MAX_DURATION}|vad{int(VAD_ENABLED)}"
+TIMELINE_VERSION = f"{EMOTION_VERSION}|timeline{TIMELINE_HOP_S}|{TIMELINE_MAX_S}"
 
-    x =  np.array([[feats[col] for col in feature_cols]])
-    
-    probs = rf_model.predict_proba(x)[0]
+def emotion_cache_key(digest: str, timeline: bool = False) -> str:
+    return cache_key(digest, TIMELINE_VERSION if timeline else EMOTION_VERSION)
+
+def cached_emotion(key: str) -> dict | None:
+    return emotion_cache.get(key) if emotion_cache else None
+
+def store_emotion(key: str, emotion: dict):
+    if emotion_cache:
+        emotion_cache.put(key, emotion)
+
+# x IS A (1, n_features) MATRIX ALREADY IN feature_cols ORDER
+def predict_features(x: np.ndarray):
+    with telemetry.span("model.emotion"):
+        probs = rf_model.predict_proba(x)[0]
     pred_idx = int(np.argmax(probs))
-    pred_label = label_encoder.inverse_transform([pred_idx])[0]
+    pred_label = str(class_labels[pred_idx])
 
     score = emotion_to_score(pred_label)
 
@@ -47,3 +79,121 @@ async def predict_audio(audio: UploadFile = File(...)):
         "class_probabilities": probs.tolist(),
         "score": score
     }
+
+def warmup():
+    # ONE PREDICTION SO THE FOREST (OR THE PAGES OF THE MEMORY-MAPPED COMPACT MODEL) IS RESIDENT BEFORE THE FIRST CALL
+    predict_features(np.zeros((1, len(feature_cols))))
+
+# PREDICT FROM AN ALREADY DECODED MONO WAVEFORM (SHARED BUFFER FROM /analyze/)
+def predict_waveform(y: np.ndarray, sr: int):
+    # HOLD MUSIC AND SILENCE WOULD OTHERWISE FILL THE WINDOW (AND YIN PITCH STATS); NO SPEECH FOUND -> RAW AUDIO
+    if VAD_ENABLED:
+        speech, _ = speech_only(y, sr, detect_speech(y, sr))
+        if len(speech) > 0:
+            y = speech
+    # ONLY THE FIRST MAX_DURATION SECONDS ARE USED, SO ONLY THOSE ARE RESAMPLED
+    with telemetry.span("audio.resample"):
+        y = resample(y[:int(sr * MAX_DURATION)], sr, FEATURE_SR)
+    x = extract_features_batch([y], FEATURE_SR, max_duration=MAX_DURATION, columns=feature_cols)
+    return predict_features(x)
+
+# PREDICT FROM UPLOADED BYTES: DECODED IN MEMORY (NO TEMP FILE), ONLY THE FIRST MAX_DURATION (VAD_SCAN_S WITH VAD) SECONDS.
+# SAME 16 kHz DECODE + RESAMPLE AS /analyze/, MIRRORING THE 16 kHz PROCESSED TRAINING FILES
+def predict_bytes(data: bytes):
+    y = decode_audio_bytes(data, WHISPER_SR, duration=VAD_SCAN_S if VAD_ENABLED else MAX_DURATION)
+    return predict_waveform(y, WHISPER_SR)
+
+def predict_timeline(y: np.ndarray, sr: int):
+    """
+    Emotion over the whole call instead of its first MAX_DURATION seconds: the model
+    scores every overlapping window in one predict_proba batch. The call's label and
+    score are those of the peak (highest scoring) window, so distress late in a call
+    still raises emotional_sev; "timeline" adds every window, the mean score and the
+    trend (least-squares slope of the window scores, per minute).
+    With VAD, silence is cut first and window times are mapped back to the call.
+    """
+    y = y[:int(sr * TIMELINE_MAX_S)]
+    speech_map = None
+    if VAD_ENABLED:
+        speech, speech_map = speech_only(y, sr, detect_speech(y, sr))
+        if len(speech) > 0:
+            y = speech
+        else:
+            speech_map = None
+    with telemetry.span("audio.resample"):
+        y = resample(y, sr, FEATURE_SR)
+    starts, x = extract_window_features(y, FEATURE_SR, MAX_DURATION, TIMELINE_HOP_S, columns=feature_cols)
+    with telemetry.span("model.emotion"):
+        probs = rf_model.predict_proba(x)
+
+    labels = [str(class_labels[i]) for i in probs.argmax(axis=1)]
+    scores = np.array([emotion_to_score(label) for label in labels])
+    ends = np.minimum(starts + MAX_DURATION, len(y) / FEATURE_SR)
+    # TREND IS FITTED ON SPEECH TIME (BEFORE MAPPING), SO LONG SILENCES DON'T FLATTEN IT
+    trend = np.polyfit((starts + ends) / 120.0, scores, 1)[0] if len(scores) > 1 else 0.0
+    if speech_map is not None:
+        starts, ends = to_original_time(starts, speech_map), to_original_time(ends, speech_map)
+    peak = int(np.argmax(scores))
+
+    return {
+        "predicted_label": labels[peak],
+        "class_probabilities": probs[peak].tolist(),
+        "score": float(scores[peak]),
+        "timeline": {
+            "classes": [str(label) for label in class_labels],
+            "windows": [
+                {
+                    "start_s": round(float(start), 2),
+                    "end_s": round(float(end), 2),
+                    "predicted_label": label,
+                    "score": float(score),
+                    "class_probabilities": row.tolist(),
+                }
+                for start, end, label, score, row in zip(starts, ends, labels, scores, probs)
+            ],
+            "peak_score": float(scores[peak]),
+            "peak_start_s": round(float(starts[peak]), 2),
+            "mean_score": round(float(scores.mean()), 3),
+            "trend_per_min": round(float(trend), 3),
+        },
+    }
+
+def predict_timeline_bytes(data: bytes):
+    return predict_timeline(decode_audio_bytes(data, WHISPER_SR, duration=TIMELINE_MAX_S), WHISPER_SR)
+
+
+ACCEPTED_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/mpeg", "audio/mp3")
+
+async def cached_predict(audio: UploadFile, predict, timeline: bool):
+    if audio.content_type not in ACCEPTED_TYPES:
+        raise HTTPException(status_code=400, detail="Please upload a WAV file")
+    
+    data = await audio.read()
+    telemetry.observe_size("voice", len(data))
+
+    # DECODE, FEATURE EXTRACTION AND THE FOREST ALL RUN ON THE EMOTION WORKER POOL, OFF THE EVENT LOOP
+    key = emotion_cache_key(bytes_digest(data), timeline)
+    hit = await run_in_threadpool(cached_emotion, key)
+    if hit is not None:
+        return hit
+    try:
+        emotion = await emotion_pool.submit(predict, data)
+        await run_in_threadpool(store_emotion, key, emotion)
+        return emotion
+    except SchedulerFull:
+        raise
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting emotion: {e}")
+
+
+@router.post("/")
+async def predict_audio(audio: UploadFile = File(...)):
+    return await cached_predict(audio, predict_bytes, timeline=False)
+
+
+@router.post("/timeline")
+async def predict_audio_timeline(audio: UploadFile = File(...)):
+    # WHOLE CALL IN OVERLAPPING WINDOWS: PEAK WINDOW AS THE RESULT, PLUS EVERY WINDOW AND THE TREND
+    return await cached_predict(audio, predict_timeline_bytes, timeline=True)
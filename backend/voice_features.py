@@ -1,5 +1,368 @@
+import warnings
 import numpy as np
 import librosa
+from joblib import Parallel, delayed
+
+import telemetry
+
+# FRAME PARAMETERS (librosa DEFAULTS, SO FEATURES MATCH THE ORIGINAL PER-CALL EXTRACTION)
+N_FFT = 2048
+HOP_LENGTH = 512
+TOP_DB = 80.0
+# BUMP WHEN EXTRACTION CHANGES SO CACHED FEATURES (feature_store.py) ARE INVALIDATED
+FEATURE_VERSION = "2"
+
+
+def feature_columns(n_mfcc=20):
+    """
+    Canonical feature order (same order the trained bundle's feature_columns were built in).
+    """
+    cols = []
+    for i in range(n_mfcc):
+        cols += [f"mfcc_mean_{i+1}", f"mfcc_std_{i+1}"]
+    cols += ["rms_mean", "rms_std", "rms_max", "rms_range"]
+    cols += [
+        "pitch_mean", "pitch_std", "pitch_min", "pitch_max",
+        "pitch_25", "pitch_75", "pitch_range", "pitch_voiced_ratio",
+    ]
+    cols += [
+        "spec_centroid_mean", "spec_centroid_std",
+        "spec_bandwidth_mean", "spec_bandwidth_std",
+        "spec_rolloff_mean", "spec_flatness_mean",
+    ]
+    return cols
+
+
+def _power_to_db(S):
+    # librosa.power_to_db(ref=1.0, top_db=80) BUT THE top_db FLOOR IS PER CLIP, NOT PER BATCH
+    log_spec = 10.0 * np.log10(np.maximum(1e-10, S))
+    peak = log_spec.max(axis=(-2, -1), keepdims=True)
+    return np.maximum(log_spec, peak - TOP_DB)
+
+
+def _features_block(Y, sr, n_mfcc, fmin, fmax):
+    """
+    Features for k equal-length clips Y[k, n], returned as a (k, n_features) matrix
+    in feature_columns() order. One magnitude STFT per clip feeds the mel/MFCC and
+    all spectral features; RMS and YIN work on the time signal as before.
+    """
+    k = Y.shape[0]
+    out = np.empty((k, 2 * n_mfcc + 18), dtype=np.float64)
+
+    S = np.abs(librosa.stft(Y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+
+    mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr)
+    mfcc = librosa.feature.mfcc(S=_power_to_db(mel), n_mfcc=n_mfcc)
+    out[:, 0:2 * n_mfcc:2] = mfcc.mean(axis=-1)
+    out[:, 1:2 * n_mfcc:2] = mfcc.std(axis=-1)
+    col = 2 * n_mfcc
+
+    rms = librosa.feature.rms(y=Y, frame_length=N_FFT, hop_length=HOP_LENGTH)[:, 0]
+    rms_max = rms.max(axis=-1)
+    out[:, col] = rms.mean(axis=-1)
+    out[:, col + 1] = rms.std(axis=-1)
+    out[:, col + 2] = rms_max
+    out[:, col + 3] = rms_max - rms.min(axis=-1)
+    col += 4
+
+    f0 = librosa.yin(Y, fmin=fmin, fmax=fmax, sr=sr)
+    # YIN returns np.nan for unvoiced frames
+    voiced_count = (~np.isnan(f0)).sum(axis=-1)
+    with warnings.catch_warnings():
+        # ALL-NaN ROWS (NO VOICED FRAMES) ARE ZEROED BELOW
+        warnings.simplefilter("ignore", RuntimeWarning)
+        pitch_min = np.nanmin(f0, axis=-1)
+        pitch_max = np.nanmax(f0, axis=-1)
+        pitch_25, pitch_75 = np.nanpercentile(f0, [25, 75], axis=-1)
+        pitch = np.stack([
+            np.nanmean(f0, axis=-1),
+            np.nanstd(f0, axis=-1),
+            pitch_min,
+            pitch_max,
+            pitch_25,
+            pitch_75,
+            pitch_max - pitch_min,
+            voiced_count / f0.shape[-1],
+        ], axis=-1)
+    pitch[voiced_count == 0] = 0.0
+    out[:, col:col + 8] = pitch
+    col += 8
+
+    spec_centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[:, 0]
+    spec_bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr)[:, 0]
+    spec_rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr, roll_percent=0.85)[:, 0]
+    spec_flatness = librosa.feature.spectral_flatness(S=S)[:, 0]
+
+    out[:, col] = spec_centroid.mean(axis=-1)
+    out[:, col + 1] = spec_centroid.std(axis=-1)
+    out[:, col + 2] = spec_bandwidth.mean(axis=-1)
+    out[:, col + 3] = spec_bandwidth.std(axis=-1)
+    out[:, col + 4] = spec_rolloff.mean(axis=-1)
+    out[:, col + 5] = spec_flatness.mean(axis=-1)
+
+    return out
+
+
+@telemetry.traced("features.extract")
+def extract_features_batch(
+    waveforms,
+    sr=22050,
+    n_mfcc=20,
+    fmin=50,
+    fmax=600,
+    max_duration=5.0,
+    columns=None,
+    n_jobs=1
+):
+    """
+    Feature matrix for many mono waveforms at sr, one row per waveform.
+    Clips are truncated to max_duration and grouped by length, so every group of
+    equal-length clips (e.g. all clips longer than max_duration) is processed as
+    one multichannel array. columns reorders the output (e.g. a bundle's feature_columns).
+    """
+    max_len = int(sr * max_duration)
+    clips = [np.asarray(y, dtype=np.float32)[:max_len] for y in waveforms]
+    for i, y in enumerate(clips):
+        if len(y) < 2:
+            raise ValueError(f"Audio too short: waveform {i}")
+
+    groups = {}
+    for i, y in enumerate(clips):
+        groups.setdefault(len(y), []).append(i)
+    blocks = list(groups.values())
+
+    if n_jobs == 1:
+        results = [_features_block(np.stack([clips[i] for i in idx]), sr, n_mfcc, fmin, fmax) for idx in blocks]
+    else:
+        results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_features_block)(np.stack([clips[i] for i in idx]), sr, n_mfcc, fmin, fmax) for idx in blocks
+        )
+
+    X = np.empty((len(clips), 2 * n_mfcc + 18), dtype=np.float64)
+    for idx, block in zip(blocks, results):
+        X[idx] = block
+
+    if columns is not None:
+        base = {name: i for i, name in enumerate(feature_columns(n_mfcc))}
+        X = X[:, [base[c] for c in columns]]
+    return X
+
+
+def _frame_features(Y, sr, n_mfcc, fmin, fmax, db_peak=None):
+    """
+    Per-frame features of Y[..., n] as one (..., n_mfcc + 6, n_frames) array, rows:
+    MFCCs, RMS, YIN pitch (NaN when unvoiced), spectral centroid, bandwidth, rolloff
+    and flatness. The MFCC dB floor is TOP_DB below db_peak (default: the loudest
+    mel bin of Y), which is returned with the frames.
+    """
+    S = np.abs(librosa.stft(Y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr)
+    log_mel = 10.0 * np.log10(np.maximum(1e-10, mel))
+    peak = log_mel.max() if db_peak is None else db_peak
+    frames = np.concatenate([
+        librosa.feature.mfcc(S=np.maximum(log_mel, peak - TOP_DB), n_mfcc=n_mfcc),
+        librosa.feature.rms(y=Y, frame_length=N_FFT, hop_length=HOP_LENGTH),
+        librosa.yin(Y, fmin=fmin, fmax=fmax, sr=sr)[..., None, :],
+        librosa.feature.spectral_centroid(S=S, sr=sr),
+        librosa.feature.spectral_bandwidth(S=S, sr=sr),
+        librosa.feature.spectral_rolloff(S=S, sr=sr, roll_percent=0.85),
+        librosa.feature.spectral_flatness(S=S),
+    ], axis=-2)
+    return frames.astype(np.float64), peak
+
+
+def _window_layout(n_samples, sr, window_s, hop_s):
+    """
+    Start frames of the windows over a call of n_samples, the frames per window, and
+    how many frames at the head and tail of a window_s clip reach into its STFT
+    padding. The last window is aligned to the end of the call so the tail is never
+    dropped; a call shorter than one window is a single window of its own frames.
+    """
+    n_frames = 1 + n_samples // HOP_LENGTH
+    n_clip = int(sr * window_s)
+    win = 1 + n_clip // HOP_LENGTH
+    if n_frames <= win:
+        return np.array([0]), n_frames, 0, 0
+    n_head = -(-(N_FFT // 2) // HOP_LENGTH)
+    n_tail = win - ((n_clip - N_FFT // 2) // HOP_LENGTH + 1)
+    if win <= n_head + n_tail:
+        raise ValueError(f"Window of {window_s} s is shorter than one FFT frame")
+    hop = max(1, round(sr * hop_s / HOP_LENGTH))
+    starts = np.arange(0, n_frames - win + 1, hop)
+    if starts[-1] != n_frames - win:
+        starts = np.append(starts, n_frames - win)
+    return starts, win, n_head, n_tail
+
+
+def _window_sums(F, starts, length):
+    # SUMS OF F (d, T) OVER FRAMES [s, s + length) FOR EVERY s IN starts, FROM ONE CUMULATIVE SUM: (n_windows, d)
+    C = np.zeros((F.shape[0], F.shape[1] + 1), dtype=np.float64)
+    np.cumsum(F, axis=-1, out=C[:, 1:])
+    return (C[:, starts + length] - C[:, starts]).T
+
+
+def _window_moments(F, head, tail, starts, win):
+    """
+    Mean and population std of every row of F (d, T) per window, as (n_windows, d).
+    Window i is head[i] (d, E), then F[:, s + E : s + win - nt], then tail[i] (d, nt).
+    """
+    n_head = head.shape[-1]
+    interior = win - n_head - tail.shape[-1]
+    s1 = _window_sums(F, starts + n_head, interior) + head.sum(axis=-1) + tail.sum(axis=-1)
+    s2 = _window_sums(F * F, starts + n_head, interior) + (head * head).sum(axis=-1) + (tail * tail).sum(axis=-1)
+    mean = s1 / win
+    return mean, np.sqrt(np.maximum(s2 / win - mean ** 2, 0.0))
+
+
+def _window_values(f, head, tail, starts, win):
+    # EVERY WINDOW'S FRAMES OF ONE ROW f (T,) AS AN (n_windows, win) COPY, EDGE FRAMES TAKEN FROM head / tail
+    W = np.lib.stride_tricks.sliding_window_view(f, win)[starts]
+    W[:, :head.shape[-1]] = head
+    W[:, win - tail.shape[-1]:] = tail
+    return W
+
+
+@telemetry.traced("features.timeline")
+def extract_window_features(
+    y,
+    sr=22050,
+    window_s=5.0,
+    hop_s=2.5,
+    n_mfcc=20,
+    fmin=50,
+    fmax=600,
+    columns=None
+):
+    """
+    Features for overlapping windows over a whole mono waveform, one row per window
+    in feature_columns() order (or columns). Returns (window start times in s, X).
+    The STFT, MFCC, RMS, YIN and spectral frames are computed once for the whole
+    call: each window's means and stds come from cumulative sums over those frames,
+    and its min / max / percentiles from a strided view of them, so the cost grows
+    linearly with call length. Only the few frames at each window edge, which an
+    extracted clip would compute from STFT padding, are recomputed per window, so a
+    row matches extract_features_batch on the same clip; the one difference is the
+    MFCC dB floor, which is TOP_DB below the loudest frame of the call, not the clip.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    if len(y) < 2:
+        raise ValueError("Audio too short")
+    starts, win, n_head, n_tail = _window_layout(len(y), sr, window_s, hop_s)
+    F, peak = _frame_features(y, sr, n_mfcc, fmin, fmax)
+
+    if n_head or n_tail:
+        # ONE SHORT PADDED PATCH PER WINDOW EDGE, ALL IN ONE BATCH; THE TAIL PATCH STARTS n_head FRAMES EARLY
+        # SO ONLY ITS END IS PADDED. THE LAST WINDOW CAN END UP TO ONE HOP PAST THE CALL, ZEROS THERE
+        n_clip = int(sr * window_s)
+        skip = win - n_tail - n_head
+        length = n_clip - skip * HOP_LENGTH
+        padded = np.concatenate([y, np.zeros(n_clip, dtype=np.float32)])
+        offsets = starts * HOP_LENGTH
+        patches = np.lib.stride_tricks.sliding_window_view(padded, length)[
+            np.concatenate([offsets, offsets + skip * HOP_LENGTH])
+        ]
+        with warnings.catch_warnings():
+            # PATCHES ARE SHORTER THAN n_fft BY DESIGN, ONLY THEIR PADDED EDGE FRAMES ARE KEPT
+            warnings.simplefilter("ignore", UserWarning)
+            edges, _ = _frame_features(patches, sr, n_mfcc, fmin, fmax, peak)
+        head = edges[:len(starts), :, :n_head]
+        tail = edges[len(starts):, :, n_head:n_head + n_tail]
+    else:
+        head = tail = np.empty((1, F.shape[0], 0))
+
+    p = n_mfcc + 1
+
+    def voicing(A):
+        # UNVOICED (NaN) PITCH ADDS 0 TO THE SUMS, AND A 0/1 VOICED ROW IS APPENDED: ITS MEAN IS THE VOICED RATIO
+        return np.concatenate([np.nan_to_num(A), (~np.isnan(A[..., p:p + 1, :])).astype(np.float64)], axis=-2)
+
+    mean, std = _window_moments(voicing(F), voicing(head), voicing(tail), starts, win)
+    out = np.empty((len(starts), 2 * n_mfcc + 18), dtype=np.float64)
+    out[:, 0:2 * n_mfcc:2] = mean[:, :n_mfcc]
+    out[:, 1:2 * n_mfcc:2] = std[:, :n_mfcc]
+    col = 2 * n_mfcc
+
+    rms = _window_values(F[n_mfcc], head[:, n_mfcc], tail[:, n_mfcc], starts, win)
+    rms_max = rms.max(axis=-1)
+    out[:, col] = mean[:, n_mfcc]
+    out[:, col + 1] = std[:, n_mfcc]
+    out[:, col + 2] = rms_max
+    out[:, col + 3] = rms_max - rms.min(axis=-1)
+    col += 4
+
+    # MOMENTS ABOVE ARE OVER ALL win FRAMES, RESCALED HERE TO THE VOICED ONES
+    voiced_ratio = mean[:, -1]
+    voiced_count = np.rint(voiced_ratio * win).astype(np.int64)
+    share = np.where(voiced_count > 0, voiced_ratio, 1.0)
+    pitch_mean = mean[:, p] / share
+    pitch_std = np.sqrt(np.maximum((std[:, p] ** 2 + mean[:, p] ** 2) / share - pitch_mean ** 2, 0.0))
+    # NaN SORTS LAST, SO THE FIRST voiced_count VALUES OF A ROW ARE ITS VOICED FRAMES IN ORDER
+    ordered = np.sort(_window_values(F[p], head[:, p], tail[:, p], starts, win), axis=-1)
+    last = np.maximum(voiced_count - 1, 0)
+    rows = np.arange(len(starts))
+    quartiles = []
+    for q in (0.25, 0.75):
+        # numpy's DEFAULT (LINEAR) PERCENTILE, AS np.nanpercentile IN _features_block
+        pos = q * last
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        quartiles.append(ordered[rows, lo] + (pos - lo) * (ordered[rows, hi] - ordered[rows, lo]))
+    pitch_min = ordered[:, 0]
+    pitch_max = ordered[rows, last]
+    pitch = np.stack([
+        pitch_mean,
+        pitch_std,
+        pitch_min,
+        pitch_max,
+        quartiles[0],
+        quartiles[1],
+        pitch_max - pitch_min,
+        voiced_ratio,
+    ], axis=-1)
+    pitch[voiced_count == 0] = 0.0
+    out[:, col:col + 8] = pitch
+    col += 8
+
+    out[:, col] = mean[:, p + 1]
+    out[:, col + 1] = std[:, p + 1]
+    out[:, col + 2] = mean[:, p + 2]
+    out[:, col + 3] = std[:, p + 2]
+    out[:, col + 4] = mean[:, p + 3]
+    out[:, col + 5] = mean[:, p + 4]
+
+    if columns is not None:
+        base = {name: i for i, name in enumerate(feature_columns(n_mfcc))}
+        out = out[:, [base[c] for c in columns]]
+    return starts * HOP_LENGTH / sr, out
+
+
+def load_waveforms(file_paths, sr=22050, max_duration=5.0):
+    # ONLY DECODES THE FIRST max_duration SECONDS OF EACH FILE
+    return [librosa.load(path, sr=sr, duration=max_duration)[0] for path in file_paths]
+
+
+def extract_features_files(
+    file_paths,
+    sr=22050,
+    n_mfcc=20,
+    fmin=50,
+    fmax=600,
+    max_duration=5.0,
+    columns=None,
+    batch_size=64,
+    n_jobs=1
+):
+    """
+    Yields (start_index, feature_matrix) per batch of files so a whole dataset
+    never has to be decoded into memory at once.
+    """
+    file_paths = list(file_paths)
+    for start in range(0, len(file_paths), batch_size):
+        waveforms = load_waveforms(file_paths[start:start + batch_size], sr, max_duration)
+        yield start, extract_features_batch(
+            waveforms, sr, n_mfcc, fmin, fmax, max_duration, columns, n_jobs
+        )
+
 
 def extract_features(
     file_path,
@@ -9,70 +372,26 @@ def extract_features(
     fmax=600,
     max_duration=5.0
 ):
-    
-    y, sr = librosa.load(file_path, sr=sr)
-
-    max_len  = int(sr * max_duration)
-    y = y[:max_len]
 
+    y, sr = librosa.load(file_path, sr=sr, duration=max_duration)
 
     if len(y) < 2:
         raise ValueError(f"Audio too short: {file_path}")
-    features = {}
 
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-    mfcc_mean = mfcc.mean(axis=1)
-    mfcc_std = mfcc.std(axis=1)
-
-    for i in range(n_mfcc):
-        features[f"mfcc_mean_{i+1}"] = float(mfcc_mean[i])
-        features[f"mfcc_std_{i+1}"] = float(mfcc_std[i])
+    return features_from_waveform(y, sr, n_mfcc, fmin, fmax, max_duration)
 
 
-    rms = librosa.feature.rms(y=y)[0]
-    features["rms_mean"] = float(rms.mean())
-    features["rms_std"] = float(rms.std())
-    features["rms_max"] = float(rms.max())
-    features["rms_range"] = float(rms.max() - rms.min())
-
-    f0 = librosa.yin(y, fmin=fmin, fmax=fmax, sr=sr)
-    # YIN returns np.nan for unvoiced frames
-    voiced = ~np.isnan(f0)
-    voiced_f0 = f0[voiced]
-
-    if voiced_f0.size > 0:
-        features["pitch_mean"] = float(voiced_f0.mean())
-        features["pitch_std"] = float(voiced_f0.std())
-        features["pitch_min"] = float(voiced_f0.min())
-        features["pitch_max"] = float(voiced_f0.max())
-        features["pitch_25"] = float(np.percentile(voiced_f0, 25))
-        features["pitch_75"] = float(np.percentile(voiced_f0, 75))
-        features["pitch_range"] = float(voiced_f0.max() - voiced_f0.min())
-        features["pitch_voiced_ratio"] = float(voiced_f0.size / f0.size)
-    else:
-        # If no voiced frames detected, set to 0 or some sentinel
-        features["pitch_mean"] = 0.0
-        features["pitch_std"] = 0.0
-        features["pitch_min"] = 0.0
-        features["pitch_max"] = 0.0
-        features["pitch_25"] = 0.0
-        features["pitch_75"] = 0.0
-        features["pitch_range"] = 0.0
-        features["pitch_voiced_ratio"] = 0.0
-
-    spec_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-    spec_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-    spec_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)[0]
-    spec_flatness = librosa.feature.spectral_flatness(y=y)[0]
-
-    features["spec_centroid_mean"] = float(spec_centroid.mean())
-    features["spec_centroid_std"] = float(spec_centroid.std())
-    features["spec_bandwidth_mean"] = float(spec_bandwidth.mean())
-    features["spec_bandwidth_std"] = float(spec_bandwidth.std())
-    features["spec_rolloff_mean"] = float(spec_rolloff.mean())
-    features["spec_flatness_mean"] = float(spec_flatness.mean())
-
-    return features
+def features_from_waveform(
+    y,
+    sr=22050,
+    n_mfcc=20,
+    fmin=50,
+    fmax=600,
+    max_duration=5.0
+):
+    # y MUST ALREADY BE MONO AT sr (TRAINING FEATURES ARE COMPUTED AT 22050 Hz)
+    row = extract_features_batch([y], sr, n_mfcc, fmin, fmax, max_duration)[0]
+    return dict(zip(feature_columns(n_mfcc), row.tolist()))
 
 def emotion_to_score(label: str) -> float:
     intensity, emotion = label.split("_", 1)
@@ -91,4 +410,4 @@ def emotion_to_score(label: str) -> float:
     base = base_map.get(emotion, 3.0)
     mult = 1.0 if intensity == "normal" else 1.2
 
-    return round(min(5.0, max(1.0, base * mult)), 2)
\ No newline at end of file
+    return round(min(5.0, max(1.0, base * mult)), 2)
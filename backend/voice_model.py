@@ -1,18 +1,45 @@
-import pandas as pd
+import json
+import time
+import shutil
+import argparse
 import numpy as np
 from pathlib import Path
-import librosa 
 from tqdm import tqdm
 import os
 import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (ENABLES HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, HalvingGridSearchCV, StratifiedKFold, cross_validate
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import LabelEncoder
 from sklearn.preprocessing import label_binarize
 from sklearn.metrics import roc_auc_score
 
-from voice_features import extract_features, emotion_to_score
+from feature_store import FeatureStore
+from compact_forest import export_forest
+from audio_io import file_digest
+
+MODEL_PATH = Path(__file__).resolve().parent / "emotion_model.pkl"
+COMPACT_PATH = Path(__file__).resolve().parent / "emotion_model_compact"
+REPORT_PATH = Path(__file__).resolve().parent / "training_report.json"
+
+
+def export_compact(model_path=MODEL_PATH, out_dir=COMPACT_PATH):
+    """
+    Write the memory-mappable inference artifact (compact_forest) for a saved bundle.
+    voice_api prefers it over the pickle when it exists. Models that aren't tree
+    forests have no compact form, so a stale artifact is removed instead.
+    """
+    bundle = joblib.load(model_path)
+    rf = bundle["model"]
+    if not isinstance(rf, (RandomForestClassifier, ExtraTreesClassifier)):
+        shutil.rmtree(out_dir, ignore_errors=True)
+        print(f"No compact form for {type(rf).__name__}; voice_api will load the pickle")
+        return None
+    classes = bundle["label_encoder"].inverse_transform(rf.classes_)
+    meta = export_forest(rf, classes, bundle["feature_columns"], out_dir, file_digest(model_path))
+    print(f"Saved compact model → {out_dir} ({meta['n_trees']} trees, {meta['n_nodes']} nodes, depth {meta['max_depth']})")
+    return meta
 
 
 def parse_label_from_filename(path):
@@ -45,74 +72,203 @@ def parse_label_from_filename(path):
 
 
 
-if __name__ == "__main__":
-    print(">> TRAINING VOICE MODEL.... ")
-    DATA_DIR = Path("backend/processed")
-    file_paths = sorted(DATA_DIR.glob("*.wav"))
 
-    y_labels = [parse_label_from_filename(fp) for fp in file_paths]
-    rows = []
+# SEARCH SPACE: ONE GRID PER MODEL FAMILY, ALL COMPETING IN THE SAME SUCCESSIVE-HALVING RUN.
+# MODELS RUN SINGLE-THREADED; PARALLELISM COMES FROM FOLDS/CANDIDATES ACROSS THE PROCESS POOL
+def search_space(families, seed):
+    grids = {
+        "rf": {
+            "model": [RandomForestClassifier(random_state=seed, n_jobs=1)],
+            "model__n_estimators": [100, 300],
+            "model__max_depth": [None, 24, 12],
+            "model__min_samples_leaf": [1, 2],
+            "model__max_features": ["sqrt", 0.3],
+        },
+        "extra": {
+            "model": [ExtraTreesClassifier(random_state=seed, n_jobs=1)],
+            "model__n_estimators": [100, 300],
+            "model__max_depth": [None, 24],
+            "model__min_samples_leaf": [1, 2],
+        },
+        "hgb": {
+            "model": [HistGradientBoostingClassifier(random_state=seed)],
+            "model__learning_rate": [0.05, 0.1],
+            "model__max_leaf_nodes": [15, 31],
+            "model__l2_regularization": [0.0, 1.0],
+        },
+    }
+    return [grids[family] for family in families]
+
+
+# ORIGINAL CONFIGURATION (--no-search)
+def baseline_model(seed):
+    return RandomForestClassifier(n_estimators=300, max_depth=None, random_state=seed, n_jobs=1)
+
+
+def ovo_auc(estimator, X, y):
+    """
+    Macro one-vs-one AUC over the classes present in this fold. Successive halving
+    subsamples aren't stratified, so a small fold can miss a class (plain
+    scoring="roc_auc_ovo" then fails and the candidate is scored NaN).
+    """
+    classes = estimator.classes_
+    known = np.isin(y, classes)
+    y = np.asarray(y)[known]
+    present = np.isin(classes, y)
+    if present.sum() < 2:
+        return np.nan
+    proba = estimator.predict_proba(X[known])[:, present] + 1e-12
+    proba /= proba.sum(axis=1, keepdims=True)
+    if present.sum() == 2:
+        return roc_auc_score(y == classes[present][1], proba[:, 1])
+    return roc_auc_score(y, proba, multi_class="ovo", labels=classes[present])
+
+
+def single_row_latency(model, X, n=200):
+    rows = np.asarray(X[:n])
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row[None, :])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+TUNED_PARAMS = ["n_estimators", "max_depth", "min_samples_leaf", "max_features", "learning_rate", "max_leaf_nodes", "l2_regularization"]
 
-    for path, y in tqdm(zip(file_paths, y_labels), total=len(file_paths)):
-        feats = extract_features(path)
-        feats["label"] = y
-        rows.append(feats)
+def describe(model):
+    # JSON-FRIENDLY CANDIDATE NAME: FAMILY + THE HYPERPARAMETERS THE SEARCH CAN CHANGE
+    params = model.get_params()
+    return {"family": type(model).__name__, **{k: params[k] for k in TUNED_PARAMS if k in params}}
 
-    df = pd.DataFrame(rows)
-    X = df.drop(columns = ["label"])
-    y = df["label"]
 
+def test_auc(model, X_test, y_test, n_classes):
+    y_test_bin = label_binarize(y_test, classes=range(n_classes))
+    return float(roc_auc_score(y_test_bin, model.predict_proba(X_test), multi_class="ovo", average="macro"))
+
+
+def main(args):
+    print(">> TRAINING VOICE MODEL.... ")
+    file_paths = sorted(Path(args.data_dir).glob("*.wav"))
+    y_labels = [parse_label_from_filename(fp) for fp in file_paths]
 
     le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
+    y_encoded = le.fit_transform(y_labels)
     classes = le.classes_
-    y_bin = label_binarize(y_encoded, classes=range(len(classes)))
 
-    rf = RandomForestClassifier(
-        n_estimators=300,
-        max_depth=None,
-        random_state=42,
-        n_jobs=-1
-    )
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_encoded, 
+    train_paths, test_paths, y_train, y_test = train_test_split(
+        file_paths, y_encoded,
         test_size = 0.2,
-        random_state=42,
+        random_state=args.seed,
         stratify=y_encoded
     )
 
-    kf = StratifiedKFold(n_splits = 5, shuffle = True, random_state=42)
-    auc_scores = []
+    # ONLY FILES NOT ALREADY IN THE FEATURE CACHE ARE DECODED. THE TRAINING MATRIX IS MEMORY-MAPPED,
+    # SO joblib HANDS WORKERS THE FILE INSTEAD OF PICKLING A COPY PER FOLD/CANDIDATE
+    store = FeatureStore()
+    X_train = store.training_matrix(train_paths, progress=tqdm)
+    X_test = store.features_for(test_paths)
 
-    for train_idx, val_idx in kf.split(X_train, y_train):
-        X_tr, X_val= X_train.iloc[train_idx], X_train.iloc[val_idx]
-        y_tr, y_val = y_train[train_idx], y_train[val_idx]
+    kf = StratifiedKFold(n_splits=args.cv, shuffle=True, random_state=args.seed)
+    start = time.perf_counter()
+    report = {"n_train": len(y_train), "n_test": len(y_test), "classes": classes.tolist(), "cv": args.cv}
 
-        rf.fit(X_tr, y_tr)
-        y_val_prob = rf.predict_proba(X_val)
+    if args.no_search:
+        model = baseline_model(args.seed)
+        # FOLDS RUN IN PARALLEL ON CLONES (THE OLD LOOP REFIT ONE rf IN PLACE, ONE FOLD AT A TIME)
+        cv = cross_validate(model, X_train, y_train, cv=kf, scoring="roc_auc_ovo", n_jobs=args.n_jobs)
+        print("AUC scores per fold:", cv["test_score"])
+        print("Mean AUC:", np.mean(cv["test_score"]))
+        print("Std AUC:", np.std(cv["test_score"]))
+        model.fit(X_train, y_train)
+        report["candidates"] = [{
+            **describe(model),
+            "cv_auc_mean": float(np.mean(cv["test_score"])),
+            "cv_auc_std": float(np.std(cv["test_score"])),
+            "fit_s": float(np.mean(cv["fit_time"])),
+        }]
+    else:
+        # SUCCESSIVE HALVING: EVERY CANDIDATE SEES A SMALL SUBSAMPLE FIRST, ONLY THE BEST 1/factor
+        # MOVE ON TO factor TIMES MORE SAMPLES. min_resources KEEPS EVERY CLASS IN EVERY FOLD
+        search = HalvingGridSearchCV(
+            Pipeline([("model", baseline_model(args.seed))]),
+            search_space(args.families, args.seed),
+            factor=args.factor,
+            min_resources=min(len(y_train), 2 * args.cv * len(classes)),
+            cv=kf,
+            scoring=ovo_auc,
+            n_jobs=args.n_jobs,
+            random_state=args.seed,
+        )
+        search.fit(X_train, y_train)
+        model = search.best_estimator_.named_steps["model"]
+        results = search.cv_results_
+        report["candidates"] = sorted(
+            (
+                {
+                    **describe(Pipeline([("model", baseline_model(args.seed))]).set_params(**results["params"][i]).named_steps["model"]),
+                    "iteration": int(results["iter"][i]),
+                    "n_samples": int(results["n_resources"][i]),
+                    "cv_auc_mean": float(results["mean_test_score"][i]),
+                    "cv_auc_std": float(results["std_test_score"][i]),
+                    "fit_s": float(results["mean_fit_time"][i]),
+                    "score_s": float(results["mean_score_time"][i]),
+                }
+                for i in range(len(results["params"]))
+            ),
+            key=lambda c: (-c["iteration"], -c["cv_auc_mean"]),
+        )
+        report["halving"] = {"factor": args.factor, "n_candidates": [int(n) for n in search.n_candidates_], "n_resources": [int(n) for n in search.n_resources_]}
+        print("Best candidate:", describe(model), "CV AUC:", search.best_score_)
 
-        y_val_bin = label_binarize(y_val, classes=range(len(classes)))
+    report["search_s"] = time.perf_counter() - start
+    auc = test_auc(model, X_test, y_test, len(classes))
+    print("Final Test AUC:", auc)
 
-        auc = roc_auc_score(y_val_bin, y_val_prob, multi_class="ovo", average="macro")
-        auc_scores.append(auc)
+    bundle = {
+        "model": model,
+        "label_encoder": le,
+        "feature_columns": store.columns
+    }
 
-    print("AUC scores per fold:", auc_scores)
-    print("Mean AUC:", np.mean(auc_scores))
-    print("Std AUC:", np.std(auc_scores))
+    joblib.dump(bundle, args.out)
+    print(f"Saved model → {args.out}")
+    compact = export_compact(args.out, Path(args.out).parent / COMPACT_PATH.name)
 
-    rf.fit(X_train, y_train)
-    y_test_prob = rf.predict_proba(X_test)
+    p50, p99 = single_row_latency(model, X_test)
+    report["best"] = {
+        **describe(model),
+        "test_auc": auc,
+        "pickle_mb": os.path.getsize(args.out) / 2**20,
+        "latency_ms_p50": p50,
+        "latency_ms_p99": p99,
+    }
+    if compact:
+        from compact_forest import CompactForest
+        p50, p99 = single_row_latency(CompactForest(Path(args.out).parent / COMPACT_PATH.name), X_test)
+        report["best"].update(compact_latency_ms_p50=p50, compact_latency_ms_p99=p99)
 
-    y_test_bin = label_binarize(y_test, classes=range(len(classes)))
-    test_auc = roc_auc_score(y_test_bin, y_test_prob, multi_class="ovo", average="macro")
-    print("Final Test AUC:", test_auc)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=1, default=str)
+    print(f"Saved report → {args.report}")
 
-    bundle = {
-        "model": rf,
-        "label_encoder": le,
-        "feature_columns": X.columns.tolist()
-    }
 
-    joblib.dump(bundle, "backend/emotion_model.pkl")
-    print("Saved model → emotion_model.pkl")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the voice emotion model")
+    parser.add_argument("--data-dir", default="backend/processed")
+    parser.add_argument("--out", default=str(MODEL_PATH))
+    parser.add_argument("--report", default=str(REPORT_PATH))
+    parser.add_argument("--families", nargs="+", choices=["rf", "extra", "hgb"], default=["rf", "extra", "hgb"])
+    parser.add_argument("--factor", type=int, default=3, help="Successive halving: keep 1/factor of candidates per round")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Process pool size for folds and candidates")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-search", action="store_true", help="Train the original single RandomForest configuration")
+    parser.add_argument("--export-only", action="store_true", help="Rebuild the compact artifact from an existing --out bundle")
+    args = parser.parse_args()
+
+    if args.export_only:
+        # REBUILD THE COMPACT ARTIFACT FROM AN EXISTING emotion_model.pkl WITHOUT RETRAINING
+        export_compact(args.out, Path(args.out).parent / COMPACT_PATH.name)
+    else:
+        main(args)